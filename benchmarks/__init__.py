@@ -0,0 +1,9 @@
+"""Benchmarks for enpyronments. Run a benchmark from the repository root, e.g.
+
+    python -m benchmarks.bench_lazy_discovery
+
+Or run the whole suite at increasing scales, saving the results to compare against later versions:
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --compare before.json
+"""
@@ -0,0 +1,58 @@
+"""
+Loading settings with slow asynchronous sources: resolved one at a time on first read vs. concurrently by
+Loader.aload_settings
+"""
+
+import asyncio
+import os
+import time
+
+from benchmarks.generate import temp_root
+from enpyronments.loader import Loader
+
+SOURCES = 40
+LATENCY = 0.02
+
+SETTINGS = """
+import asyncio
+
+from enpyronments.aio import Deferred
+
+
+async def fetch(key):
+    await asyncio.sleep({latency})
+    return key
+
+{assignments}
+"""
+
+
+def main():
+    with temp_root() as root:
+        directory = os.path.join(root, "bench_async")
+        os.makedirs(directory)
+        assignments = "\n".join(f"SOURCE_{i} = Deferred(fetch, {i})" for i in range(SOURCES))
+        with open(os.path.join(directory, "env.py"), "w") as f:
+            f.write(SETTINGS.format(latency=LATENCY, assignments=assignments))
+        loader = Loader(root, isolated=True)
+
+        print(f"{SOURCES} sources, {LATENCY * 1e3:.0f} ms each")
+        start = time.perf_counter()
+        settings = loader.load_settings("bench_async")
+        for key in list(settings):
+            settings[key]
+        print(f"{'load_settings, then read each':<34} {(time.perf_counter() - start) * 1e3:>8.1f} ms")
+
+        for concurrency in (1, 10, SOURCES):
+            loop = asyncio.new_event_loop()
+            try:
+                start = time.perf_counter()
+                loop.run_until_complete(loader.aload_settings("bench_async", concurrency=concurrency))
+                elapsed = time.perf_counter() - start
+            finally:
+                loop.close()
+            print(f"{f'aload_settings, concurrency={concurrency}':<34} {elapsed * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
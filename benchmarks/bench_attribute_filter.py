@@ -0,0 +1,57 @@
+"""
+Micro-benchmark of Loader.get_module_attrs on generated modules with 10k attributes
+"""
+
+import re
+import timeit
+import types
+
+from enpyronments.loader import Loader, default_attribute_pattern, default_builtin_pattern
+
+ATTRIBUTES = 10_000
+NUMBER = 20
+
+
+def make_module(size):
+    module = types.ModuleType("generated_settings")
+    for i in range(size):
+        # mix of settings, helpers and dunders, like a generated settings module
+        if i % 10 == 0:
+            module.__dict__[f"helper_{i}"] = i
+        elif i % 50 == 1:
+            module.__dict__[f"__dunder_{i}__"] = i
+        else:
+            module.__dict__[f"SETTING_{i}"] = i
+    return module
+
+
+def uncompiled_attrs(module):
+    """ The pre-compilation implementation, for comparison """
+    for key, val in module.__dict__.copy().items():
+        if re.match(default_builtin_pattern, key):
+            continue
+        if not re.match(default_attribute_pattern, key):
+            continue
+        yield key, val
+
+
+def main():
+    module = make_module(ATTRIBUTES)
+    cases = {
+        "re.match per key (old)": lambda: dict(uncompiled_attrs(module)),
+        "compiled patterns": lambda: dict(
+            Loader(".", attribute_pattern=re.compile(default_attribute_pattern)).get_module_attrs(module)
+        ),
+        "default fast path": lambda: dict(Loader(".").get_module_attrs(module)),
+        "predicate": lambda: dict(
+            Loader(".", attribute_filter=str.isupper).get_module_attrs(module)
+        ),
+    }
+    print(f"{ATTRIBUTES} attributes, best of 5 x {NUMBER} runs")
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=NUMBER, repeat=5)) / NUMBER
+        print(f"{name:<24} {best * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Process start-up: importing enpyronments and loading a settings package vs. importing the module compile_package
+wrote from it. Each case runs in a fresh interpreter, so import costs are included.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.generate import make_scaled_package, temp_root
+from enpyronments.compiler import compile_package
+from enpyronments.loader import Loader
+
+# (files, keys per file, modes)
+SCALES = ((6, 10, 2), (20, 100, 3), (60, 500, 4))
+RUNS = 10
+
+LOAD = "from enpyronments.loader import Loader; Loader({root!r}).load_settings({package!r})"
+IMPORT = "import sys; sys.path.insert(0, {root!r}); import {module}"
+
+
+def best_run(code):
+    """ Returns the fastest wall time, in seconds, of running code in a new interpreter """
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    empty = best_run("pass")
+    print(f"empty interpreter: {empty * 1e3:.1f} ms, the times below are on top of it")
+    print(f"{'settings':>9} {'case':<34} {'start-up (ms)':>14}")
+    with temp_root() as root:
+        for files, keys, modes in SCALES:
+            package = make_scaled_package(root, files, keys, modes)
+            module = f"{package}_compiled"
+            settings = compile_package(Loader(root), package, os.path.join(root, f"{module}.py"))
+            # the first import writes the module's bytecode cache, as it would on the first start after a deploy
+            best_run(IMPORT.format(root=root, module=module))
+
+            cases = [
+                ("import enpyronments, load_settings", LOAD.format(root=root, package=package)),
+                ("import the compiled module", IMPORT.format(root=root, module=module)),
+            ]
+            for name, code in cases:
+                seconds = best_run(code) - empty
+                print(f"{len(settings):>9} {name:<34} {seconds * 1e3:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Read throughput of Settings vs. ConcurrentSettings from several threads while another thread keeps reloading
+"""
+
+import threading
+import time
+
+from enpyronments.settings import ConcurrentSettings, Settings
+
+KEYS = 500
+READERS = 4
+DURATION = 1.0
+RELOAD_INTERVAL = 0.001
+
+
+def make_data(generation):
+    return {f"KEY_{i}": generation for i in range(KEYS)}
+
+
+def run(settings_class):
+    settings = settings_class(make_data(0))
+    stop = threading.Event()
+    counts = [0] * READERS
+    reloads = [0]
+
+    def read(index):
+        count = 0
+        while not stop.is_set():
+            for i in range(0, KEYS, 10):
+                settings[f"KEY_{i}"]
+            count += KEYS // 10
+        counts[index] = count
+
+    def reload():
+        generation = 0
+        while not stop.is_set():
+            generation += 1
+            settings.update(make_data(generation))
+            reloads[0] += 1
+            time.sleep(RELOAD_INTERVAL)
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(READERS)]
+    threads.append(threading.Thread(target=reload))
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / DURATION, reloads[0] / DURATION
+
+
+def main():
+    print(f"{READERS} readers, {KEYS} keys, reloading every {RELOAD_INTERVAL * 1000:g} ms")
+    for settings_class in (Settings, ConcurrentSettings):
+        reads, reloads = run(settings_class)
+        print(f"{settings_class.__name__:<20} {reads / 1e6:8.2f} M reads/s {reloads:8.0f} reloads/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Reading settings through a SettingsClient: latency of cached and uncached reads vs. a local Settings object, and
+throughput of uncached reads with several clients at once. The clients are threads of this process, so they share
+the GIL with each other and with the daemon.
+"""
+
+import os
+import threading
+import time
+import timeit
+
+from benchmarks.generate import make_scaled_package, temp_root
+from enpyronments.daemon import SettingsClient, SettingsDaemon
+from enpyronments.loader import Loader
+
+NUMBER = 20_000
+CLIENTS = (1, 2, 4, 8)
+THROUGHPUT_SECONDS = 1.0
+
+
+def uncached_reader(client, key):
+    """ Reads key from the daemon every time """
+
+    def read():
+        client.cache.clear()
+        return client[key]
+
+    return read
+
+
+def measure_throughput(path, key, clients):
+    """ Returns the total uncached reads per second of clients reading in parallel threads """
+    counts = [0] * clients
+    stopping = threading.Event()
+
+    def run(index):
+        with SettingsClient(path) as client:
+            read = uncached_reader(client, key)
+            while not stopping.is_set():
+                read()
+                counts[index] += 1
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(THROUGHPUT_SECONDS)
+    stopping.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / THROUGHPUT_SECONDS
+
+
+def main():
+    with temp_root() as root:
+        package = make_scaled_package(root, 20, 100, 3)
+        loader = Loader(root)
+        settings = loader.load_settings(package)
+        key = next(iter(settings))
+        with SettingsDaemon(loader, package, os.path.join(root, "settings.sock")) as daemon:
+            with SettingsClient(daemon.path) as client:
+                client[key]
+                cases = [
+                    ("local Settings", lambda: settings[key]),
+                    ("client, cached", lambda: client[key]),
+                    ("client, uncached (round trip)", uncached_reader(client, key)),
+                ]
+                print(f"{len(settings)} settings")
+                print(f"{'case':<32} {'per read (us)':>14}")
+                for name, func in cases:
+                    number = NUMBER if "uncached" not in name else NUMBER // 10
+                    seconds = min(timeit.repeat(func, number=number, repeat=3))
+                    print(f"{name:<32} {seconds / number * 1e6:>14.2f}")
+
+            print(f"{'clients':>7} {'uncached reads/s':>18}")
+            for clients in CLIENTS:
+                print(f"{clients:>7} {measure_throughput(daemon.path, key, clients):>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
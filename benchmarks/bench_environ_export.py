@@ -0,0 +1,62 @@
+"""
+Cost of exporting settings to os.environ repeatedly, and of building a child process environment, before and after
+diffed exports
+"""
+
+import json
+import os
+import timeit
+
+from enpyronments.settings import Settings
+from enpyronments.utils import Sensitive
+
+KEYS = 500
+NUMBER = 200
+
+
+def export_everything(settings):
+    """ The old save_to_environ: serialize and write every setting on every call """
+    for key, val in settings.data.items():
+        if isinstance(val, Sensitive):
+            val = val.obj
+        if isinstance(val, (list, dict)):
+            val = json.dumps(val)
+        os.environ[key] = str(val)
+
+
+def child_environ_copy(settings):
+    """ Copy os.environ and export over it for every child process """
+    env = dict(os.environ)
+    for key, val in settings.data.items():
+        env[key] = str(val.obj if isinstance(val, Sensitive) else val)
+    return env
+
+
+def main():
+    data = {f"ENPY_BENCH_{i}": i for i in range(KEYS)}
+    data.update(ENPY_BENCH_HOSTS=["a", "b"], ENPY_BENCH_SECRET=Sensitive("hunter2"))
+    settings = Settings(data)
+    settings.export_environ()
+
+    def changed_one():
+        settings["ENPY_BENCH_0"] += 1
+        settings.export_environ()
+
+    cases = [
+        ("export all keys every call", lambda: export_everything(settings)),
+        ("export_environ, nothing changed", settings.export_environ),
+        ("export_environ, one key changed", changed_one),
+        ("copy os.environ per child", lambda: child_environ_copy(settings)),
+        ("child_environ, cached", settings.child_environ),
+    ]
+    print(f"{'case':<34} {'per call (us)':>14}")
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=3))
+        print(f"{name:<34} {seconds / NUMBER * 1e6:>14.1f}")
+
+    for key in settings:
+        os.environ.pop(key, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Overriding settings from environment variables: a settings file with an ``os.environ.get`` lookup (and hand-written
+conversion) per setting vs. a plain settings file loaded with ``environ_prefix``, which scans the environment once.
+Times whole isolated loads, with a few of the settings overridden and a padded environment.
+"""
+
+import os
+import timeit
+
+from benchmarks.generate import temp_root
+from enpyronments.loader import Loader
+
+KEYS = (50, 500)
+OVERRIDDEN = 10
+# unrelated variables, like a typical shell or container environment
+PADDING = 200
+NUMBER = 50
+PREFIX = "BENCH_APP_"
+
+
+def write_package(root, name, keys, scattered):
+    """ Writes a settings package of int settings, looking each one up in the environment if scattered """
+    directory = os.path.join(root, name)
+    os.makedirs(directory)
+    lines = ["import os", ""]
+    for i in range(keys):
+        if scattered:
+            lines.append(f'SETTING_{i} = int(os.environ.get("{PREFIX}SETTING_{i}", {i}))')
+        else:
+            lines.append(f"SETTING_{i} = {i}")
+    with open(os.path.join(directory, "env.py"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return name
+
+
+def main():
+    for i in range(PADDING):
+        os.environ.setdefault(f"BENCH_PADDING_{i}", "x" * 40)
+    for i in range(OVERRIDDEN):
+        os.environ[f"{PREFIX}SETTING_{i}"] = str(i * 100)
+
+    print(f"{OVERRIDDEN} settings overridden, {len(os.environ)} environment variables")
+    print(f"{'keys':>6} {'case':<26} {'per load (ms)':>14}")
+    with temp_root() as root:
+        for keys in KEYS:
+            scattered = Loader(root, isolated=True)
+            overlay = Loader(root, isolated=True, environ_prefix=PREFIX)
+            cases = [
+                ("os.environ.get per key", scattered, write_package(root, f"scattered_{keys}", keys, True)),
+                ("environ_prefix overlay", overlay, write_package(root, f"overlay_{keys}", keys, False)),
+            ]
+            results = []
+            for name, loader, package in cases:
+                results.append(loader.load_settings(package)["SETTING_1"])
+                seconds = min(timeit.repeat(lambda: loader.load_settings(package), number=NUMBER, repeat=3))
+                print(f"{keys:>6} {name:<26} {seconds / NUMBER * 1e3:>14.3f}")
+            assert results[0] == results[1] == 100
+
+
+if __name__ == "__main__":
+    main()
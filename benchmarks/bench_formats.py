@@ -0,0 +1,50 @@
+"""
+Parse time of large declarative settings files vs. executing the equivalent Python module
+"""
+
+import json
+import os
+import timeit
+
+from benchmarks.generate import temp_root
+from enpyronments.formats import default_formats
+from enpyronments.loader import Loader
+
+KEY_COUNTS = [100, 1_000, 10_000]
+NUMBER = 10
+
+
+def write_package(root, name, keys, ext):
+    directory = os.path.join(root, name)
+    os.makedirs(directory)
+    settings = {f"KEY_{i}": f"value {i}" if i % 2 else i for i in range(keys)}
+    path = os.path.join(directory, f"env{ext}")
+    with open(path, "w") as f:
+        if ext == ".py":
+            f.writelines(f"{key} = {val!r}\n" for key, val in settings.items())
+        elif ext == ".json":
+            json.dump(settings, f)
+        elif ext == ".toml":
+            f.writelines(f"{key} = {json.dumps(val)}\n" for key, val in settings.items())
+        else:
+            f.writelines(f"{key}={val}\n" for key, val in settings.items())
+    return name
+
+
+def main():
+    print(f"{'keys':>6} " + " ".join(f"{ext + ' (ms)':>12}" for ext in (".py", ".json", ".toml", ".env")))
+    with temp_root() as root:
+        loader = Loader(root, isolated=True, formats=default_formats)
+        for keys in KEY_COUNTS:
+            row = []
+            for ext in (".py", ".json", ".toml", ".env"):
+                package = write_package(root, f"formats_{ext[1:]}_{keys}", keys, ext)
+                best = min(
+                    timeit.repeat(lambda: loader.load_module(package, "env"), number=NUMBER, repeat=3)
+                )
+                row.append(best / NUMBER * 1000)
+            print(f"{keys:>6} " + " ".join(f"{ms:>12.2f}" for ms in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Attribute and item access latency of mutable vs. frozen Settings
+"""
+
+import timeit
+
+from enpyronments.settings import Settings
+from enpyronments.utils import Sensitive
+
+KEYS = 200
+NUMBER = 1_000_000
+
+
+def main():
+    data = {f"KEY_{i}": i for i in range(KEYS)}
+    data.update(DEBUG=True, SECRET_KEY=Sensitive("hunter2"))
+    settings = Settings(data)
+    frozen = settings.freeze()
+
+    cases = [
+        ("settings.DEBUG", "attribute"),
+        ("settings.debug", "lowercase attribute"),
+        ("settings.secret_key", "Sensitive attribute"),
+        ("settings['DEBUG']", "item"),
+    ]
+    print(f"{'access':<22} {'mutable (ns)':>13} {'frozen (ns)':>12} {'speedup':>8}")
+    for statement, name in cases:
+        mutable_time = min(timeit.repeat(statement, globals={"settings": settings}, number=NUMBER, repeat=3))
+        frozen_time = min(timeit.repeat(statement, globals={"settings": frozen}, number=NUMBER, repeat=3))
+        print(
+            f"{name:<22} {mutable_time / NUMBER * 1e9:>13.1f} {frozen_time / NUMBER * 1e9:>12.1f}"
+            f" {mutable_time / frozen_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Merging settings files: the copy-merge (a new Settings updated with each layer) vs. Settings.from_layers and
+LayeredSettings, and replacing one layer by merging every layer again vs. LayeredSettings.replace_layer
+"""
+
+import timeit
+
+from enpyronments.settings import LayeredSettings, Settings
+from enpyronments.utils import Sensitive
+
+LAYERS = 4
+SENSITIVE_SHARE = 0.1
+OVERRIDE_SHARE = 0.2
+NUMBER = 5
+
+
+def copy_merge(layers):
+    """ How the loader merged layers before: every key copied through __setitem__ """
+    settings = Settings()
+    for _, layer in layers:
+        settings.update(layer)
+    return settings
+
+
+def make_layers(keys):
+    """ A base layer with every key, and smaller layers above it overriding a share of them """
+    every = int(1 / SENSITIVE_SHARE)
+    layers = [
+        ("env", {f"KEY_{i}": Sensitive(f"secret-{i}") if i % every == 0 else f"value-{i}" for i in range(keys)})
+    ]
+    step = int(1 / OVERRIDE_SHARE)
+    for n in range(1, LAYERS):
+        layers.append((f"layer_{n}", {f"KEY_{i}": f"layer-{n}-{i}" for i in range(n, keys, step)}))
+    return layers
+
+
+def main():
+    print(f"{LAYERS} layers, each above the first overriding {OVERRIDE_SHARE:.0%} of the keys")
+    print(f"{'keys':>7} {'case':<42} {'per call (ms)':>14}")
+    for keys in (1_000, 10_000, 100_000):
+        layers = make_layers(keys)
+        layered = LayeredSettings.from_layers(layers)
+        assert copy_merge(layers).data == layered.data
+        layered.get_key_index()
+        layered.masked()
+        request = {"KEY_1": "request", "KEY_2": "request"}
+        replaced = [layers[0], ("layer_1", dict(layers[1][1], KEY_1="changed"))] + layers[2:]
+
+        def set_layers():
+            layered.set_layers(replaced)
+            layered.set_layers(layers)
+
+        def replace_one():
+            layered.replace_layer("request", request)
+            layered.remove_layer("request")
+
+        cases = [
+            ("copy-merge", lambda: copy_merge(layers)),
+            ("Settings.from_layers", lambda: Settings.from_layers(layers)),
+            ("LayeredSettings.from_layers", lambda: LayeredSettings.from_layers(layers)),
+            ("one layer changed, copy-merge again", lambda: copy_merge(replaced)),
+            ("one layer changed, set_layers and back", set_layers),
+            ("2-key request layer, copy-merge again", lambda: copy_merge(layers + [("request", request)])),
+            ("2-key request layer, add and remove", replace_one),
+        ]
+        for name, func in cases:
+            seconds = min(timeit.repeat(func, number=NUMBER, repeat=3))
+            print(f"{keys:>7} {name:<42} {seconds / NUMBER * 1e3:>14.3f}")
+
+    settings = Settings(layered.data)
+    for name, instance in (("Settings", settings), ("LayeredSettings", layered)):
+        seconds = min(timeit.repeat(lambda: instance.key_5, number=100_000, repeat=3))
+        print(f"attribute access, {name:<22} {seconds / 100_000 * 1e9:>10.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Startup time of Loader.load_settings, eager vs. lazy discovery, as the number of env files grows
+"""
+
+import time
+
+from benchmarks.generate import make_package, temp_root
+from enpyronments.loader import Loader
+
+FILE_COUNTS = [5, 20, 80, 320]
+MODES = tuple(f"mode{i}" for i in range(8))
+REPEAT = 5
+
+
+def time_load(loader, package):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        loader.load_settings(package)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'files':>6} {'eager (ms)':>12} {'lazy (ms)':>12} {'speedup':>8}")
+    with temp_root() as root:
+        for count in FILE_COUNTS:
+            package = make_package(root, modes=MODES, keys=20, extra_files=count)
+            eager = time_load(Loader(root), package)
+            lazy = time_load(Loader(root, lazy=True), package)
+            print(f"{count:>6} {eager * 1000:>12.2f} {lazy * 1000:>12.2f} {eager / lazy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Startup time of settings with expensive values built eagerly vs. wrapped in Lazy, when only some of them are read
+"""
+
+import os
+import time
+
+from benchmarks.generate import temp_root
+from enpyronments.loader import Loader
+
+TABLES = 8
+ROWS = 100_000
+REPEAT = 5
+
+EAGER = """
+def build_table(seed):
+    return {{f"{{seed}}-{{i}}": i * seed for i in range({rows})}}
+
+{assignments}
+"""
+
+LAZY = """
+from enpyronments.utils import Lazy
+
+def build_table(seed):
+    return {{f"{{seed}}-{{i}}": i * seed for i in range({rows})}}
+
+{assignments}
+"""
+
+
+def write_package(root, package, source, value):
+    directory = os.path.join(root, package)
+    os.makedirs(directory)
+    assignments = "\n".join(f"TABLE_{i} = {value.format(i=i + 1)}" for i in range(TABLES))
+    with open(os.path.join(directory, "env.py"), "w") as f:
+        f.write(source.format(rows=ROWS, assignments=assignments))
+    with open(os.path.join(directory, "env_local.py"), "w") as f:
+        f.write("MODE = 'dev'\n")
+
+
+def time_startup(root, package, reads):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        settings = Loader(root, isolated=True).load_settings(package)
+        for i in range(reads):
+            settings[f"TABLE_{i}"]
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    with temp_root() as root:
+        write_package(root, "bench_eager", EAGER, "build_table({i})")
+        write_package(root, "bench_lazy", LAZY, "Lazy(lambda: build_table({i}))")
+
+        print(f"{TABLES} tables of {ROWS} rows")
+        print(f"{'tables read':<12} {'eager (ms)':>11} {'lazy (ms)':>10}")
+        for reads in (0, 1, TABLES):
+            eager = time_startup(root, "bench_eager", reads)
+            lazy = time_startup(root, "bench_lazy", reads)
+            print(f"{reads:<12} {eager * 1e3:>11.1f} {lazy * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
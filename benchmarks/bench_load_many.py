@@ -0,0 +1,39 @@
+"""
+Loader.load_many vs. serial Loader.load_settings calls as the number of packages grows
+"""
+
+import time
+
+from benchmarks.generate import make_package, temp_root
+from enpyronments.loader import Loader
+
+PACKAGE_COUNTS = [10, 40, 160]
+KEYS = 200
+WORKERS = 8
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"{'packages':>8} {'serial (ms)':>12} {'threads (ms)':>13} {'processes (ms)':>15}")
+    with temp_root() as root:
+        for count in PACKAGE_COUNTS:
+            packages = [make_package(root, keys=KEYS) for _ in range(count)]
+            loader = Loader(root, isolated=True)
+
+            serial = timed(lambda: [loader.load_settings(package) for package in packages])
+            threads = timed(lambda: loader.load_many(packages, max_workers=WORKERS))
+            processes = timed(
+                lambda: loader.load_many(packages, max_workers=WORKERS, processes=True)
+            )
+            print(
+                f"{count:>8} {serial * 1000:>12.1f} {threads * 1000:>13.1f} {processes * 1000:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Logging masked settings: rebuilding the masked dict on every call vs. the cached masked view, and json.dumps of a
+masked dict vs. streaming with redact.dump_json
+"""
+
+import io
+import json
+import os
+import timeit
+
+from enpyronments.redact import dump_dotenv, dump_json
+from enpyronments.settings import Settings, mask_value
+from enpyronments.utils import Sensitive
+
+SENSITIVE_SHARE = 0.1
+NUMBER = 20
+
+
+def masked_uncached(settings):
+    """ masked() before the cache: a new dict built from every setting on every call """
+    return {key: mask_value(val) for key, val in settings.data.items()}
+
+
+def make_settings(keys):
+    every = int(1 / SENSITIVE_SHARE)
+    return Settings(
+        {f"KEY_{i}": Sensitive(f"secret-{i}") if i % every == 0 else f"value-{i}" for i in range(keys)}
+    )
+
+
+def main():
+    print(f"{'keys':>7} {'case':<36} {'per call (ms)':>14}")
+    for keys in (1_000, 10_000, 100_000):
+        settings = make_settings(keys)
+        settings.masked()
+
+        def write_one():
+            settings["KEY_1"] = "changed"
+            settings.masked()
+
+        with open(os.devnull, "w") as devnull:
+            cases = [
+                ("masked(), rebuilt every call", lambda: masked_uncached(settings)),
+                ("masked(), cached", settings.masked),
+                ("masked(), cached, after one write", write_one),
+                ("json.dumps(rebuilt masked())", lambda: json.dumps(masked_uncached(settings))),
+                ("json.dumps(masked())", lambda: json.dumps(settings.masked())),
+                ("dump_json to StringIO", lambda: dump_json(settings, io.StringIO())),
+                ("dump_json to a file", lambda: dump_json(settings, devnull)),
+                ("dump_dotenv to a file", lambda: dump_dotenv(settings, devnull)),
+            ]
+            for name, func in cases:
+                seconds = min(timeit.repeat(func, number=NUMBER, repeat=3))
+                print(f"{keys:>7} {name:<36} {seconds / NUMBER * 1e3:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
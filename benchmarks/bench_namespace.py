@@ -0,0 +1,45 @@
+"""
+Selecting the settings under a prefix by scanning every key vs. through the sorted key index
+"""
+
+import timeit
+from fnmatch import fnmatchcase
+
+from enpyronments.settings import Settings
+
+GROUPS = 200
+KEYS_PER_GROUP = 10
+NUMBER = 2_000
+
+
+def main():
+    settings = Settings(
+        {f"GROUP{group}_KEY_{i}": i for group in range(GROUPS) for i in range(KEYS_PER_GROUP)}
+    )
+    settings.get_key_index()
+    database = settings.namespace("GROUP7")
+
+    cases = [
+        ("scan with startswith", lambda: {k: v for k, v in settings.data.items() if k.startswith("GROUP7_")}),
+        ("dict(namespace)", lambda: dict(database)),
+        ("select('GROUP7_*')", lambda: settings.select("GROUP7_*")),
+        ("scan with fnmatch", lambda: {k: v for k, v in settings.data.items() if fnmatchcase(k, "GROUP7_KEY_?")}),
+        ("select('GROUP7_KEY_?')", lambda: settings.select("GROUP7_KEY_?")),
+        ("get_many of 5 keys", lambda: settings.get_many([f"GROUP7_KEY_{i}" for i in range(5)])),
+    ]
+    print(f"{GROUPS * KEYS_PER_GROUP} settings, {KEYS_PER_GROUP} per prefix")
+    print(f"{'case':<24} {'per call (us)':>14}")
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=NUMBER, repeat=3))
+        print(f"{name:<24} {seconds / NUMBER * 1e6:>14.2f}")
+
+    def write():
+        settings["GROUP7_NEW"] = 1
+        del settings["GROUP7_NEW"]
+
+    seconds = min(timeit.repeat(write, number=NUMBER, repeat=3))
+    print(f"{'add and remove a key':<24} {seconds / NUMBER * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Memory held by 1k tenant settings objects that share the same env.py: copy-merged Settings vs. LayeredSettings vs.
+LayeredSettings sharing their layers through a LayerPool
+"""
+
+import gc
+import time
+import tracemalloc
+
+from enpyronments.pool import LayerPool
+from enpyronments.settings import LayeredSettings, Settings
+from enpyronments.utils import Sensitive
+
+TENANTS = 1_000
+KEYS = 500
+# share of the base settings each tenant overrides
+OVERRIDE_SHARE = 0.05
+
+
+def load_env():
+    """ A fresh env.py layer, with new objects each time like executing the file again """
+    layer = {}
+    for i in range(KEYS):
+        if i % 10 == 0:
+            layer[f"SECRET_{i}"] = Sensitive(f"secret-value-{i}")
+        elif i % 10 == 1:
+            layer[f"HOSTS_{i}"] = [f"host-{i}-a.example.com", f"host-{i}-b.example.com"]
+        elif i % 10 == 2:
+            layer[f"PORT_{i}"] = 10_000 + i
+        else:
+            layer[f"SETTING_NUMBER_{i}"] = f"a typical settings value {i}"
+    return layer
+
+
+def load_tenant(tenant):
+    """ A fresh env_local.py layer for a tenant, overriding a few of the base settings """
+    step = int(1 / OVERRIDE_SHARE)
+    layer = {f"SETTING_NUMBER_{i}": f"tenant {tenant} value {i}" for i in range(3, KEYS, step)}
+    layer["TENANT"] = tenant
+    return layer
+
+
+def copy_merge(layers):
+    settings = Settings()
+    for _, layer in layers:
+        settings.update(layer)
+    return settings
+
+
+def build_copy_merge():
+    return [copy_merge([("env", load_env()), ("env_local", load_tenant(i))]) for i in range(TENANTS)]
+
+
+def build_layered():
+    return [LayeredSettings.from_layers([("env", load_env()), ("env_local", load_tenant(i))]) for i in range(TENANTS)]
+
+
+def build_pooled():
+    pool = LayerPool()
+    tenants = [
+        LayeredSettings.from_layers(pool.share_layers([("env", load_env()), ("env_local", load_tenant(i))]))
+        for i in range(TENANTS)
+    ]
+    # the pool's index isn't needed once every tenant is loaded
+    pool.clear()
+    return tenants
+
+
+def measure(build):
+    """ Returns (bytes held by what build returns, seconds it took) """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tenants = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tenants
+    return held, elapsed
+
+
+def main():
+    print(f"{TENANTS} tenants x {KEYS} settings, each overriding {OVERRIDE_SHARE:.0%} of them")
+    print(f"{'case':<28} {'total (MB)':>11} {'per tenant (KB)':>16} {'build (s)':>10}")
+    for name, build in (
+        ("Settings, copy-merge", build_copy_merge),
+        ("LayeredSettings", build_layered),
+        ("LayeredSettings, LayerPool", build_pooled),
+    ):
+        held, elapsed = measure(build)
+        print(f"{name:<28} {held / 2 ** 20:>11.1f} {held / TENANTS / 1024:>16.1f} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Cost of applying a schema with thousands of keys once at load, vs. parsing string settings on every read
+"""
+
+import timeit
+
+from enpyronments.schema import Field, Schema, to_bool, to_int
+from enpyronments.settings import Settings
+
+KEYS = 5_000
+READS = 200_000
+
+
+def make_data():
+    data = {}
+    fields = {}
+    for i in range(KEYS):
+        kind = i % 4
+        if kind == 0:
+            data[f"FLAG_{i}"], fields[f"FLAG_{i}"] = "false", bool
+        elif kind == 1:
+            data[f"COUNT_{i}"], fields[f"COUNT_{i}"] = str(i), Field(int, min=0)
+        elif kind == 2:
+            data[f"NAME_{i}"], fields[f"NAME_{i}"] = f"name-{i}", str
+        else:
+            data[f"LEVEL_{i}"], fields[f"LEVEL_{i}"] = "info", Field(str, choices=["info", "debug"])
+    return data, fields
+
+
+def main():
+    data, fields = make_data()
+
+    compile_time = min(timeit.repeat(lambda: Schema(fields), number=1, repeat=5))
+    schema = Schema(fields)
+    apply_time = min(timeit.repeat(lambda: schema.apply(Settings(data)), number=1, repeat=5))
+    print(f"{KEYS} keys: compile {compile_time * 1e3:.2f} ms, apply {apply_time * 1e3:.2f} ms"
+          f" ({apply_time / KEYS * 1e9:.0f} ns per key)")
+
+    raw = Settings(data)
+    coerced = schema.apply(Settings(data))
+    cases = [
+        ("parse on every read", "to_bool(settings['FLAG_0']) and to_int(settings['COUNT_1'])", raw),
+        ("coerced once by schema", "settings['FLAG_0'] and settings['COUNT_1']", coerced),
+    ]
+    print(f"{'reads':<24} {'per read (ns)':>14}")
+    for name, statement, settings in cases:
+        seconds = min(timeit.repeat(
+            statement,
+            globals={"settings": settings, "to_bool": to_bool, "to_int": to_int},
+            number=READS,
+            repeat=3,
+        ))
+        print(f"{name:<24} {seconds / READS * 1e9:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Resolving secret references one round trip at a time vs. batched per load, and reads served from the TTL cache
+"""
+
+import os
+import time
+import timeit
+
+from benchmarks.generate import temp_root
+from enpyronments.loader import Loader
+from enpyronments.providers import SecretProvider, SecretRef, default_registry
+
+REFS = 50
+ROUND_TRIP = 0.005
+
+
+class SlowProvider(SecretProvider):
+    """ Pays a fixed round trip per call, however many secrets it fetches """
+
+    def __init__(self):
+        self.calls = 0
+
+    def fetch_many(self, paths):
+        self.calls += 1
+        time.sleep(ROUND_TRIP)
+        return {path: f"secret-{path}" for path in paths}
+
+
+def main():
+    provider = SlowProvider()
+    default_registry.register("bench", provider)
+    try:
+        with temp_root() as root:
+            directory = os.path.join(root, "bench_secrets")
+            os.makedirs(directory)
+            with open(os.path.join(directory, "env.py"), "w") as f:
+                f.write("from enpyronments.utils import Sensitive\n")
+                for i in range(REFS):
+                    f.write(f'SECRET_{i} = Sensitive.ref("bench://secret/{i}")\n')
+            loader = Loader(root, isolated=True)
+
+            print(f"{REFS} references, {ROUND_TRIP * 1e3:.0f} ms per provider call")
+
+            default_registry.cache.clear()
+            refs = [SecretRef(f"bench://secret/{i}") for i in range(REFS)]
+            start = time.perf_counter()
+            for ref in refs:
+                ref.resolve()
+            print(f"{'unbatched, one call per ref':<30} {(time.perf_counter() - start) * 1e3:>8.1f} ms")
+
+            default_registry.cache.clear()
+            provider.calls = 0
+            settings = loader.load_settings("bench_secrets")
+            start = time.perf_counter()
+            for key in list(settings):
+                settings[key]
+            elapsed = time.perf_counter() - start
+            print(f"{f'batched ({provider.calls} call)':<30} {elapsed * 1e3:>8.1f} ms")
+
+            seconds = min(timeit.repeat(lambda: settings["SECRET_0"], number=100_000, repeat=3)) / 100_000
+            print(f"{'cached read':<30} {seconds * 1e9:>8.0f} ns")
+    finally:
+        default_registry.unregister("bench")
+        default_registry.cache.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Memory used by N forked workers holding their own copy of the settings vs. attaching to a shared snapshot. Counts
+each worker's anonymous (heap) memory growth; the snapshot itself is file-backed and stored once, in the page cache.
+Linux only (reads /proc/self/smaps_rollup).
+"""
+
+import os
+import pickle
+
+from benchmarks.generate import temp_root
+from enpyronments.settings import Settings
+from enpyronments.shared import SharedSettings, publish
+
+KEYS = 20_000
+WORKER_COUNTS = [1, 4, 16]
+
+
+def private_kb():
+    """ Anonymous memory of the current process, in kB """
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Anonymous:"):
+                return int(line.split()[1])
+    return 0
+
+
+def make_payload():
+    return pickle.dumps({f"KEY_{i}": f"value {i} " * 20 for i in range(KEYS)})
+
+
+def run_workers(count, work):
+    """ Forks count workers running work(), and returns the anonymous memory each added, in kB """
+    pipes = []
+    for _ in range(count):
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            before = private_kb()
+            keep = work()  # noqa: F841, keep the settings alive while measuring
+            os.write(write, str(private_kb() - before).encode())
+            os._exit(0)
+        os.close(write)
+        pipes.append((pid, read))
+
+    used = []
+    for pid, read in pipes:
+        used.append(int(os.read(read, 64)))
+        os.close(read)
+        os.waitpid(pid, 0)
+    return used
+
+
+def main():
+    payload = make_payload()
+    with temp_root() as root:
+        path = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else root, f"enpyronments_bench_{os.getpid()}")
+        publish(Settings(pickle.loads(payload)), path)
+        try:
+            print(f"{KEYS} keys, snapshot {os.path.getsize(path) // 1024} kB")
+            print(f"{'workers':>8} {'private copies (kB)':>20} {'shared snapshot (kB)':>21}")
+            for count in WORKER_COUNTS:
+                private = run_workers(count, lambda: Settings(pickle.loads(payload)))
+
+                def attach():
+                    shared = SharedSettings(path)
+                    for i in range(0, KEYS, 100):
+                        shared[f"KEY_{i}"]
+                    return shared
+
+                shared = run_workers(count, attach)
+                print(f"{count:>8} {sum(private):>20} {sum(shared):>21}")
+        finally:
+            os.unlink(path)
+            os.unlink(f"{path}.generation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Cost of Loader.load_settings without a trace, with a trace, and with a trace and callback
+"""
+
+import timeit
+
+from benchmarks.generate import make_package, temp_root
+from enpyronments.loader import Loader
+from enpyronments.trace import LoadTrace
+
+NUMBER = 50
+
+
+def main():
+    with temp_root() as root:
+        package = make_package(root, keys=50, extra_files=20)
+        loader = Loader(root, isolated=True)
+        cases = {
+            "untraced": lambda: loader.load_settings(package),
+            "traced": lambda: loader.load_settings(package, trace=LoadTrace()),
+            "traced + callback": lambda: loader.load_settings(
+                package, trace=LoadTrace(callback=lambda event: None)
+            ),
+        }
+        for name, case in cases.items():
+            best = min(timeit.repeat(case, number=NUMBER, repeat=5)) / NUMBER
+            print(f"{name:<18} {best * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Synthetic settings package generator used by the benchmarks
+"""
+
+import itertools
+import os
+import tempfile
+
+_counter = itertools.count()
+
+
+def is_sensitive(index, share):
+    """ Spreads sensitive settings evenly: about ``share`` of the indices are sensitive """
+    return int((index + 1) * share) != int(index * share)
+
+
+def make_package(
+    root, modes=("dev", "prod"), keys=10, extra_files=0, package=None, sensitive=0.0, imports=0
+):
+    """Writes a settings package under root and returns its package name. The package contains env.py,
+    env_local.py (setting MODE to the first mode), env_{mode}.py and env_{mode}_local.py for every mode, plus
+    ``extra_files`` additional per-mode files to pad out the directory.
+
+    Arguments:
+        root {str} -- directory to write the package in
+
+    Keyword Arguments:
+        modes {tuple} -- names of the modes to generate files for
+        keys {int} -- number of settings per file
+        extra_files {int} -- number of additional mode files (spread across modes) to generate
+        package {str} -- package name, a unique name is generated if not given
+        sensitive {float} -- share of the settings (0 to 1) wrapped in Sensitive
+        imports {int} -- number of settings every file but env.py imports from env.py
+    """
+    package = package or f"bench_settings_{os.getpid()}_{next(_counter)}"
+    directory = os.path.join(root, package)
+    os.makedirs(directory)
+
+    def write(name, prelude="", imported=0):
+        lines = [prelude]
+        if sensitive:
+            lines.append("from enpyronments.utils import Sensitive")
+        if imported:
+            lines.append(f"from {package}.env import " + ", ".join(f"KEY_{i}" for i in range(imported)))
+        for i in range(imported, keys):
+            if is_sensitive(i, sensitive):
+                lines.append(f"KEY_{i} = Sensitive({i!r})")
+            else:
+                lines.append(f"KEY_{i} = {i!r}")
+        with open(os.path.join(directory, f"{name}.py"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    imported = min(imports, keys)
+    write("env")
+    write("env_local", prelude=f"MODE = {modes[0]!r}", imported=imported)
+    for mode in modes:
+        write(f"env_{mode}", imported=imported)
+        write(f"env_{mode}_local", imported=imported)
+    for i in range(extra_files):
+        write(f"env_{modes[i % len(modes)]}_region{i}", imported=imported)
+
+    return package
+
+
+def make_scaled_package(root, files, keys, modes, sensitive=0.1, imports=0, package=None):
+    """Writes a package of ``files`` settings files with ``keys`` settings each, across ``modes`` modes, and returns
+    its package name. Every package has at least env.py, env_local.py and two files per mode, so files is raised to
+    that minimum if it's lower.
+
+    Arguments:
+        root {str} -- directory to write the package in
+        files {int} -- number of settings files
+        keys {int} -- number of settings per file
+        modes {int} -- number of modes
+
+    Keyword Arguments:
+        sensitive {float} -- share of the settings (0 to 1) wrapped in Sensitive
+        imports {int} -- number of settings every file but env.py imports from env.py
+        package {str} -- package name, a unique name is generated if not given
+    """
+    mode_names = tuple(f"mode{i}" for i in range(modes))
+    return make_package(
+        root,
+        modes=mode_names,
+        keys=keys,
+        extra_files=max(0, files - 2 - 2 * modes),
+        package=package,
+        sensitive=sensitive,
+        imports=imports,
+    )
+
+
+def temp_root():
+    """ Returns a TemporaryDirectory to generate packages in """
+    return tempfile.TemporaryDirectory(prefix="enpyronments_bench_")
@@ -0,0 +1,198 @@
+"""
+Benchmark suite: times loading, discovery, access, masking and exporting of generated settings packages at
+increasing scales, and stores the results as JSON so runs of different versions can be compared.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --scales small,medium --compare results.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import timeit
+
+from benchmarks.generate import make_scaled_package, temp_root
+from enpyronments.loader import Loader
+from enpyronments.settings import Settings
+
+# name: (files, keys per file, modes)
+scales = {
+    "small": (6, 10, 2),
+    "medium": (20, 100, 3),
+    "large": (60, 500, 4),
+    "huge": (200, 2000, 5),
+}
+default_scales = ("small", "medium", "large")
+
+
+def get_version():
+    """ Returns the installed enpyronments version, or "unknown" when running from a checkout """
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        return "unknown"
+    try:
+        return version("enpyronments")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def best_of(func, number, repeat):
+    """ Returns the fastest time of one call of func, out of repeat runs of number calls """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def clear_environ(settings):
+    for key in settings.data:
+        os.environ.pop(key, None)
+
+
+def run_scale(root, files, keys, modes, sensitive, imports, repeat):
+    """Generates a package at one scale and returns a dict of metric name to seconds per operation
+
+    Arguments:
+        root {str} -- directory to generate the package in
+        files {int} -- number of settings files
+        keys {int} -- number of settings per file
+        modes {int} -- number of modes
+        sensitive {float} -- share of Sensitive settings
+        imports {int} -- number of settings each file imports from env.py
+        repeat {int} -- number of runs to take the best of
+    """
+    package = make_scaled_package(root, files, keys, modes, sensitive=sensitive, imports=imports)
+    loads = max(1, 200 // files)
+    loader = Loader(root)
+    isolated = Loader(root, isolated=True)
+    settings = loader.load_settings(package)
+    key = f"KEY_{keys - 1}"
+    attribute = key.lower()
+
+    def export_fresh():
+        fresh = Settings(settings.data)
+        fresh.save_to_environ()
+        clear_environ(fresh)
+
+    metrics = {
+        "load_settings": best_of(lambda: loader.load_settings(package), loads, repeat),
+        "load_settings_isolated": best_of(lambda: isolated.load_settings(package), loads, repeat),
+        "find_modules": best_of(lambda: dict(loader.find_modules(package)), loads, repeat),
+        "attribute_access": best_of(lambda: getattr(settings, attribute), 100_000, repeat),
+        "item_access": best_of(lambda: settings[key], 100_000, repeat),
+        "masked": best_of(settings.masked, max(1, 20_000 // keys), repeat),
+        "save_to_environ": best_of(export_fresh, max(1, 2_000 // keys), repeat),
+    }
+    settings.save_to_environ()
+    metrics["save_to_environ_unchanged"] = best_of(settings.save_to_environ, 10_000, repeat)
+    clear_environ(settings)
+    return metrics
+
+
+def run(scale_names, sensitive=0.1, imports=2, repeat=5):
+    """Runs every scale in scale_names, printing each result, and returns the results as a JSON-serializable dict
+
+    Arguments:
+        scale_names {list} -- names of scales (keys of ``scales``) to run
+
+    Keyword Arguments:
+        sensitive {float} -- share of Sensitive settings
+        imports {int} -- number of settings each file imports from env.py
+        repeat {int} -- number of runs to take the best of
+    """
+    results = {
+        "meta": {
+            "version": get_version(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "sensitive": sensitive,
+            "imports": imports,
+            "repeat": repeat,
+        },
+        "scales": {},
+    }
+    with temp_root() as root:
+        for name in scale_names:
+            files, keys, modes = scales[name]
+            metrics = run_scale(root, files, keys, modes, sensitive, imports, repeat)
+            results["scales"][name] = {"files": files, "keys": keys, "modes": modes, "metrics": metrics}
+            print(f"{name} ({files} files x {keys} keys x {modes} modes)")
+            for metric, seconds in metrics.items():
+                print(f"    {metric:<28} {seconds * 1e6:>12.2f} us")
+    return results
+
+
+def compare(baseline, results, threshold):
+    """Prints each metric of results next to the same metric in baseline, and returns the list of (scale, metric)
+    that got slower by more than threshold (a fraction, e.g. 0.1 for 10%)
+
+    Arguments:
+        baseline {dict} -- results of an earlier run
+        results {dict} -- results of this run
+        threshold {float} -- slowdown to report as a regression
+    """
+    regressions = []
+    print(f"compared to {baseline['meta'].get('version')} ({baseline['meta'].get('date')})")
+    print(f"{'scale':<8} {'metric':<28} {'before (us)':>12} {'after (us)':>12} {'change':>8}")
+    for name, scale in results["scales"].items():
+        before = baseline["scales"].get(name, {}).get("metrics", {})
+        for metric, seconds in scale["metrics"].items():
+            if metric not in before:
+                continue
+            change = seconds / before[metric] - 1
+            flag = ""
+            if change > threshold:
+                flag = "  slower"
+                regressions.append((name, metric))
+            print(
+                f"{name:<8} {metric:<28} {before[metric] * 1e6:>12.2f} {seconds * 1e6:>12.2f}"
+                f" {change:>+7.0%}{flag}"
+            )
+    return regressions
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scales",
+        default=",".join(default_scales),
+        help=f"comma separated scales to run, out of {', '.join(scales)} (default: %(default)s)",
+    )
+    parser.add_argument("--sensitive", type=float, default=0.1, help="share of Sensitive settings")
+    parser.add_argument("--imports", type=int, default=2, help="settings each file imports from env.py")
+    parser.add_argument("--repeat", type=int, default=5, help="runs to take the best of")
+    parser.add_argument("--output", help="file to write the results to, as JSON")
+    parser.add_argument("--compare", help="results of an earlier run to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown (as a fraction) reported as a regression when comparing (default: %(default)s)",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    scale_names = [name.strip() for name in args.scales.split(",") if name.strip()]
+    unknown = [name for name in scale_names if name not in scales]
+    if unknown:
+        get_parser().error(f"unknown scale(s): {', '.join(unknown)}")
+
+    results = run(scale_names, sensitive=args.sensitive, imports=args.imports, repeat=args.repeat)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
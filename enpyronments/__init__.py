@@ -2,6 +2,40 @@
 """
 
 
-from enpyronments import loader, settings, utils
+# aio, cache, compiler, daemon and shared aren't imported eagerly: they import asyncio, pickle, tempfile, socket
+# and logging, which would take several times longer to import than the rest of enpyronments. Import them directly
+# (``from enpyronments.cache import SnapshotCache``) to use them.
+from enpyronments import (
+    environ,
+    executor,
+    formats,
+    loader,
+    pool,
+    providers,
+    redact,
+    schema,
+    settings,
+    trace,
+    utils,
+    watcher,
+)
 
-__all__ = ["loader", "settings", "utils"]
+__all__ = [
+    "aio",
+    "cache",
+    "compiler",
+    "daemon",
+    "environ",
+    "executor",
+    "formats",
+    "loader",
+    "pool",
+    "providers",
+    "redact",
+    "schema",
+    "settings",
+    "shared",
+    "trace",
+    "utils",
+    "watcher",
+]
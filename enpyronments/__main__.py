@@ -0,0 +1,88 @@
+"""
+Command line interface, run with ``python -m enpyronments``
+"""
+
+import argparse
+import os
+import threading
+
+from enpyronments.cache import BytecodeCache
+from enpyronments.compiler import compile_package
+from enpyronments.daemon import SettingsDaemon
+from enpyronments.loader import Loader
+
+
+def prewarm(args):
+    """ Compiles a settings package into a bytecode cache """
+    cache = BytecodeCache(args.cache_dir)
+    paths = cache.prewarm(os.path.join(args.root, args.package))
+    for path in paths:
+        print(f"compiled {path}")
+
+
+def compile_command(args):
+    """ Compiles a settings package into a Python module of constants """
+    settings = compile_package(Loader(args.root), args.package, args.output)
+    print(f"compiled {len(settings)} settings from {args.package} into {args.output}")
+
+
+def serve(args):
+    """ Serves a settings package over a Unix domain socket until interrupted """
+    daemon = SettingsDaemon(
+        Loader(args.root, isolated=True), args.package, args.socket, interval=args.interval, backend=args.backend
+    )
+    with daemon:
+        print(f"serving {args.package} on {args.socket}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+def get_parser():
+    """ Builds the argument parser for the command line interface """
+    parser = argparse.ArgumentParser(prog="python -m enpyronments")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    prewarm_parser = commands.add_parser(
+        "prewarm", help="compile a settings package into a bytecode cache ahead of time"
+    )
+    prewarm_parser.add_argument("root", help="directory containing the settings package")
+    prewarm_parser.add_argument("package", help="name of the settings package")
+    prewarm_parser.add_argument(
+        "--cache-dir", required=True, help="bytecode cache directory, as passed to BytecodeCache"
+    )
+    prewarm_parser.set_defaults(func=prewarm)
+
+    compile_parser = commands.add_parser(
+        "compile", help="load a settings package once and write it out as a plain Python module of constants"
+    )
+    compile_parser.add_argument("root", help="directory containing the settings package")
+    compile_parser.add_argument("package", help="name of the settings package")
+    compile_parser.add_argument("--output", "-o", required=True, help="path of the module to write")
+    compile_parser.set_defaults(func=compile_command)
+
+    serve_parser = commands.add_parser(
+        "serve", help="serve a settings package to local processes over a Unix domain socket"
+    )
+    serve_parser.add_argument("root", help="directory containing the settings package")
+    serve_parser.add_argument("package", help="name of the settings package")
+    serve_parser.add_argument("--socket", required=True, help="path of the socket to serve on")
+    serve_parser.add_argument(
+        "--interval", type=float, default=1.0, help="seconds between checks for changed settings files"
+    )
+    serve_parser.add_argument("--backend", choices=("poll", "inotify"), default="poll", help="how to watch for changes")
+    serve_parser.set_defaults(func=serve)
+
+    return parser
+
+
+def main(argv=None):
+    """ Entry point for the command line interface """
+    args = get_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
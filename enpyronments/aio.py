@@ -0,0 +1,146 @@
+"""
+Asynchronous setting sources
+"""
+
+import asyncio
+import inspect
+
+from enpyronments.utils import Lazy, Sensitive
+
+
+class ResolveError(Exception):
+    """ Raised when asynchronous settings can't be resolved. ``errors`` is a dict of each failed setting's name to
+    the exception it raised (``asyncio.TimeoutError`` when it timed out), covering every failed setting. """
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = "\n".join(
+            f"    {key}: {type(error).__name__}: {error}" for key, error in errors.items()
+        )
+        super().__init__(f"{len(errors)} setting(s) couldn't be resolved:\n{lines}")
+
+
+class Deferred(Lazy):
+    """ A setting whose value comes from an async function, e.g. a secrets agent on a Unix socket. The function
+    isn't called when the settings file is executed: :meth:`Loader.aload_settings` calls the functions of every
+    deferred setting concurrently. A deferred setting read without being resolved first is resolved on the spot, in
+    its own event loop, so it can't be read synchronously from inside a running event loop.
+
+    Like any Lazy setting, it can be wrapped in Sensitive, and ``masked()`` never resolves it. """
+
+    def __init__(self, func, *args, timeout=None, **kwargs):
+        """
+        Arguments:
+            func {callable} -- async function (or any function returning an awaitable) giving the value
+            *args -- positional arguments to call func with
+
+        Keyword Arguments:
+            timeout {float} -- seconds to wait for the value before giving up, overriding the timeout given to
+                aload_settings (default: {None})
+            **kwargs -- keyword arguments to call func with
+        """
+        super().__init__(self.run)
+        self.source = func
+        self.args = args
+        self.kwargs = kwargs
+        self.timeout = timeout
+
+    async def wait(self, timeout=None):
+        """ Calls the source and waits for its value, for at most this setting's timeout, or else timeout """
+        timeout = self.timeout if self.timeout is not None else timeout
+        awaitable = self.source(*self.args, **self.kwargs)
+        if timeout is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, timeout)
+
+    async def aresolve(self, timeout=None):
+        """ Returns the value, waiting for the source if this is the first time """
+        if self.evaluated:
+            return self.peek()
+        return self.fulfill(await self.wait(timeout))
+
+    def run(self):
+        """ Resolves the value synchronously, in a new event loop """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.wait())
+        finally:
+            loop.close()
+
+    def __getstate__(self):
+        """ Pickles the value once it's resolved, or the source until then """
+        if self.evaluated:
+            return {"value": self.peek()}
+        return {"source": self.source, "args": self.args, "kwargs": self.kwargs, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        if "value" in state:
+            super().__setstate__({"value": state["value"]})
+            self.source, self.args, self.kwargs, self.timeout = None, (), {}, None
+        else:
+            self.__init__(state["source"], *state["args"], timeout=state["timeout"], **state["kwargs"])
+
+    def __repr__(self):
+        if self.evaluated:
+            return f"Deferred ({repr(self.peek())})"
+        return f"Deferred ({getattr(self.source, '__qualname__', repr(self.source))}, not resolved)"
+
+
+def is_async_source(val):
+    """ Whether val is a setting resolve_settings waits for: an unresolved Deferred, or any other awaitable """
+    if isinstance(val, Deferred):
+        return not val.evaluated
+    return inspect.isawaitable(val)
+
+
+async def resolve_settings(settings, concurrency=10, timeout=None):
+    """Resolves every Deferred (and other awaitable) setting in settings concurrently, with at most concurrency of
+    them pending at once, and replaces them with their values in one swap. Sensitive settings stay Sensitive. Raises
+    ResolveError listing every setting that failed or timed out, leaving settings unchanged.
+
+    Arguments:
+        settings {Settings} -- settings to resolve
+
+    Keyword Arguments:
+        concurrency {int} -- maximum number of sources awaited at once (default: {10})
+        timeout {float} -- seconds to wait for each source that doesn't set its own timeout (default: {None})
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(source):
+        async with semaphore:
+            if isinstance(source, Deferred):
+                return await source.aresolve(timeout)
+            if timeout is None:
+                return await source
+            return await asyncio.wait_for(source, timeout)
+
+    data = settings.data
+    pending = []
+    tasks = {}
+    for key, val in data.items():
+        source = val.obj if isinstance(val, Sensitive) else val
+        if is_async_source(source):
+            pending.append((key, val))
+            # settings sharing a source (e.g. imported from another settings file) only wait for it once
+            if id(source) not in tasks:
+                tasks[id(source)] = asyncio.ensure_future(resolve(source))
+    if not pending:
+        return settings
+
+    await asyncio.wait(list(tasks.values()))
+    resolved = dict(data)
+    errors = {}
+    for key, val in pending:
+        source = val.obj if isinstance(val, Sensitive) else val
+        task = tasks[id(source)]
+        if task.exception() is not None:
+            errors[key] = task.exception()
+        elif isinstance(val, Sensitive):
+            resolved[key] = Sensitive(task.result(), stars=val.stars)
+        else:
+            resolved[key] = task.result()
+    if errors:
+        raise ResolveError(errors)
+    settings.swap(resolved)
+    return settings
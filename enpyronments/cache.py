@@ -0,0 +1,266 @@
+"""
+Snapshot cache
+"""
+
+import hashlib
+import io
+import marshal
+import os
+import pickle
+import sys
+import tempfile
+import warnings
+from glob import glob
+from importlib.util import MAGIC_NUMBER
+
+from enpyronments.trace import null_trace
+
+
+def write_atomic(path, payload):
+    """ Writes payload to path via a temporary file in the same directory, so readers never see a partial file """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class SnapshotChecker(pickle.Unpickler):
+    """Unpickles a snapshot like a new process would, refusing objects defined in the settings package. Those are
+    pickled by reference to the settings modules, which aren't importable without the loader (and would be executed
+    again if they were), so a snapshot holding them could never be loaded on a warm start.
+
+    Arguments:
+        file {file} -- binary file to unpickle from
+        package {str} -- name of the settings package
+    """
+
+    def __init__(self, file, package):
+        super().__init__(file)
+        self.package = package
+
+    def find_class(self, module, name):
+        if module == self.package or module.startswith(f"{self.package}."):
+            raise pickle.UnpicklingError(f"{module}.{name} is defined in the settings package")
+        return super().find_class(module, name)
+
+
+class SnapshotCache:
+    """Opt-in on-disk cache of the settings merged by a :class:`Loader`. The snapshot is keyed on the path, mtime,
+    size and content hash of every settings file in the package, the loader's configuration, and the environment
+    variables the settings depend on. A warm start loads the snapshot without executing any settings modules; a stale
+    snapshot is rebuilt and atomically replaced.
+
+    Snapshots are pickled, and contain the unmasked values of ``Sensitive`` settings, so they're written with
+    owner-only permissions. Only point the cache at a directory you trust.
+
+    Arguments:
+        directory {str} -- Directory to store snapshots in (created if missing)
+
+    Keyword Arguments:
+        environ_keys {iterable} -- Names of the environment variables the settings depend on. If None (the
+        default), the whole environment is part of the key.
+    """
+
+    version = 2
+
+    def __init__(self, directory, environ_keys=None):
+        self.directory = directory
+        self.environ_keys = None if environ_keys is None else sorted(environ_keys)
+
+    def get_snapshot_path(self, root, package):
+        """ Returns the path of the snapshot for package under root """
+        name = hashlib.sha256(f"{os.path.abspath(root)}\0{package}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{name[:32]}.snapshot")
+
+    def get_environ_digest(self):
+        """ Returns a digest of the environment variables the settings depend on """
+        if self.environ_keys is None:
+            items = sorted(os.environ.items())
+        else:
+            items = [(key, os.environ.get(key)) for key in self.environ_keys]
+        return hashlib.sha256(repr(items).encode()).hexdigest()
+
+    def get_fingerprint(self, paths, config=None):
+        """Builds the key a snapshot is validated against
+
+        Arguments:
+            paths {list} -- paths of the settings files in the package
+
+        Keyword Arguments:
+            config {tuple} -- loader configuration that affects the merged settings
+        """
+        files = []
+        for path in sorted(paths):
+            stat = os.stat(path)
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            files.append((path, stat.st_mtime_ns, stat.st_size, digest))
+        return (self.version, config, tuple(files), self.get_environ_digest())
+
+    def load(self, snapshot_path, fingerprint):
+        """Returns the settings layers stored at snapshot_path, or None if it's missing, unreadable or stale
+
+        Arguments:
+            snapshot_path {str} -- path of the snapshot
+            fingerprint {tuple} -- key the snapshot must match
+        """
+        try:
+            with open(snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (ImportError, AttributeError) as e:
+            # the snapshot refers to something that's gone, so it's rebuilt on every start until that's fixed
+            warnings.warn(f"Settings snapshot {snapshot_path} can't be loaded, rebuilding it: {e}")
+            return None
+        except Exception:  # pylint: disable=broad-except
+            # A corrupt or incompatible snapshot is just a stale one
+            return None
+        if snapshot.get("fingerprint") != fingerprint:
+            return None
+        return snapshot["layers"]
+
+    def store(self, snapshot_path, fingerprint, layers, package=None):
+        """Atomically writes layers to snapshot_path. Settings that can't be pickled, or couldn't be unpickled by a
+        new process (such as functions defined in the settings files, see :class:`SnapshotChecker`), aren't cached,
+        and a warning is issued instead.
+
+        Arguments:
+            snapshot_path {str} -- path of the snapshot
+            fingerprint {tuple} -- key the snapshot is stored under
+            layers {list} -- (name, dict of settings) pairs to store, lowest priority first
+
+        Keyword Arguments:
+            package {str} -- name of the settings package, whose objects can't be stored
+        """
+        try:
+            payload = pickle.dumps(
+                {"fingerprint": fingerprint, "layers": layers}, pickle.HIGHEST_PROTOCOL
+            )
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            warnings.warn(f"Settings snapshot not cached, settings can't be pickled: {e}")
+            return
+        if package is not None:
+            try:
+                SnapshotChecker(io.BytesIO(payload), package).load()
+            except Exception as e:  # pylint: disable=broad-except
+                warnings.warn(f"Settings snapshot not cached, it couldn't be loaded back: {e}")
+                return
+
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(snapshot_path, payload)
+
+    def load_settings(self, loader, package, trace=None):
+        """Returns the settings for package from the snapshot if it's fresh, otherwise builds them with loader and
+        stores a new snapshot. Snapshots keep the settings' layers (one per settings file, see LayeredSettings), so
+        settings loaded from a snapshot know where each setting comes from, like freshly built ones. The layers are
+        shared through the loader's pool, if it has one.
+
+        Arguments:
+            loader {Loader} -- the loader to build settings with
+            package {str} -- package name
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record timings on
+        """
+        trace = trace or null_trace
+        snapshot_path = self.get_snapshot_path(loader.root, package)
+        with trace.phase("snapshot") as phase:
+            fingerprint = self.get_fingerprint(
+                loader.get_module_paths(package), loader.get_config()
+            )
+            layers = self.load(snapshot_path, fingerprint)
+            phase.set(hit=layers is not None)
+            if layers is not None:
+                if loader.pool is not None:
+                    layers = loader.pool.share_layers(layers)
+                return loader.settings_class.from_layers(layers)
+
+        settings = loader.build_settings(package, trace)
+        layers = getattr(settings, "layers", None)
+        if layers is None:
+            layers = {"<snapshot>": dict(settings.data)}
+        self.store(snapshot_path, fingerprint, list(layers.items()), package)
+        return settings
+
+
+class BytecodeCache:
+    """Caches the compiled bytecode of settings files executed by a :class:`FileExecutor`, in a directory separate
+    from the settings package (so read-only settings directories can still be cached). Cached bytecode is validated
+    against a hash of the source rather than its mtime, so bytecode compiled ahead of time (see ``prewarm``) stays
+    valid when shipped in a container image.
+
+    The cache mirrors the absolute path of each source file under directory, like ``sys.pycache_prefix``. If the
+    cache can't be written to, files are compiled as usual.
+
+    Arguments:
+        directory {str} -- Directory to store bytecode in
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def get_cache_path(self, source_path):
+        """ Returns the path bytecode for source_path is cached at """
+        head, tail = os.path.split(os.path.abspath(source_path))
+        head = os.path.splitdrive(head)[1].lstrip(os.sep)
+        name = f"{os.path.splitext(tail)[0]}.{sys.implementation.cache_tag}.pyc"
+        return os.path.join(self.directory, head, name)
+
+    def get_code(self, source_path, source):
+        """Returns the code object for source, loading it from the cache if the cached bytecode was compiled from the
+        same source, and compiling and caching it otherwise
+
+        Arguments:
+            source_path {str} -- path of the source file
+            source {bytes} -- contents of the source file
+        """
+        header = MAGIC_NUMBER + hashlib.sha256(source).digest()
+        cache_path = self.get_cache_path(source_path)
+
+        code = self.load(cache_path, header)
+        if code is None:
+            code = compile(source, source_path, "exec", dont_inherit=True)
+            self.store(cache_path, header, code)
+        return code
+
+    def load(self, cache_path, header):
+        """ Returns the code object cached at cache_path, or None if it's missing, invalid or doesn't match header """
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if not data.startswith(header):
+            return None
+        try:
+            return marshal.loads(data[len(header) :])
+        except (EOFError, ValueError, TypeError):
+            return None
+
+    def store(self, cache_path, header, code):
+        """ Writes code to cache_path, ignoring errors from an unwritable cache """
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            write_atomic(cache_path, header + marshal.dumps(code))
+        except OSError:
+            pass
+
+    def prewarm(self, directory, pattern="*.py"):
+        """Compiles every file matching pattern in directory into the cache ahead of time, and returns their paths
+
+        Arguments:
+            directory {str} -- settings package directory
+
+        Keyword Arguments:
+            pattern {str} -- glob pattern of the files to compile
+        """
+        paths = sorted(glob(os.path.join(directory, pattern)))
+        for path in paths:
+            with open(path, "rb") as f:
+                self.get_code(path, f.read())
+        return paths
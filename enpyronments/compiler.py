@@ -0,0 +1,161 @@
+"""
+Ahead-of-time compilation of settings into a plain Python module
+"""
+
+import keyword
+import math
+import os
+
+from enpyronments.cache import write_atomic
+from enpyronments.providers import SecretRef
+from enpyronments.utils import Lazy, Sensitive
+
+# names the generated module defines itself, so settings can't use them
+reserved_names = frozenset(("masked", "__settings__", "__sensitive__"))
+
+literal_types = (type(None), bool, int, str, bytes)
+
+MODULE_TEMPLATE = '''"""
+Settings compiled from the {package!r} package by enpyronments. Don't edit this file: compile the package again.
+"""
+
+{assignments}
+
+# names of the settings, in load order
+__settings__ = {names}
+
+# number of asterisks shown in place of each Sensitive setting
+__sensitive__ = {sensitive}
+
+
+def masked():
+    """ Returns the settings as a dict, with Sensitive values replaced by asterisks """
+    values = globals()
+    return {{key: "*" * __sensitive__[key] if key in __sensitive__ else values[key] for key in __settings__}}
+'''
+
+
+class CompileError(ValueError):
+    """ Raised when settings can't be compiled into a module. ``errors`` is a dict of each setting's name to why it
+    can't be, covering every such setting. """
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = "\n".join(f"    {key}: {message}" for key, message in errors.items())
+        super().__init__(f"{len(errors)} setting(s) can't be compiled:\n{lines}")
+
+
+def to_source(val):
+    """Returns Python source that evaluates to val, without importing anything. Raises ValueError for values that
+    can't be written as source: anything but None, bools, numbers, strings, bytes, and lists, tuples, sets,
+    frozensets and dicts of them.
+
+    Arguments:
+        val -- setting value
+    """
+    val_type = type(val)
+    if val_type in literal_types:
+        return repr(val)
+    if val_type is float:
+        if math.isfinite(val):
+            return repr(val)
+        return f"float({str(val)!r})"
+    if val_type is complex:
+        return f"complex({to_source(val.real)}, {to_source(val.imag)})"
+    if val_type is list:
+        return f"[{', '.join(to_source(item) for item in val)}]"
+    if val_type is tuple:
+        if len(val) == 1:
+            return f"({to_source(val[0])},)"
+        return f"({', '.join(to_source(item) for item in val)})"
+    if val_type in (set, frozenset):
+        items = sorted((to_source(item) for item in val))
+        if val_type is frozenset:
+            return f"frozenset({{{', '.join(items)}}})" if items else "frozenset()"
+        return f"{{{', '.join(items)}}}" if items else "set()"
+    if val_type is dict:
+        return f"{{{', '.join(f'{to_source(key)}: {to_source(item)}' for key, item in val.items())}}}"
+    raise ValueError(f"{val_type.__name__} values can't be compiled, only literals (got {val!r})")
+
+
+def get_secret_ref(val):
+    """ Returns the secret reference val is, or wraps (e.g. a Lazy coercing it for a schema), or None """
+    while val is not None:
+        if isinstance(val, SecretRef):
+            return val
+        val = getattr(val, "wrapped", None)
+    return None
+
+
+def get_value(val):
+    """ Returns the plain value of a setting and whether it's Sensitive (with its number of stars, or None). Lazy
+    values are computed, and secret references (including ones coerced by a schema) raise ValueError, so fetched
+    secrets never end up in a file by accident. """
+    stars = None
+    if isinstance(val, Sensitive):
+        stars = val.stars
+        val = val.obj
+    ref = get_secret_ref(val)
+    if ref is not None:
+        raise ValueError(f"secret reference {ref.uri!r} would be fetched and written to the module")
+    if isinstance(val, Lazy):
+        val = val.resolve()
+    return val, stars
+
+
+def compile_settings(settings, package="settings"):
+    """Returns the source of a Python module defining settings as module level constants. The module doesn't
+    import anything: it has a ``__settings__`` tuple of the setting names, a ``__sensitive__`` dict of the Sensitive
+    ones, and a ``masked()`` function. Lazy settings are computed. Raises CompileError listing every setting that
+    isn't a valid name or a literal value.
+
+    Sensitive values are written to the module as they are, so keep it as private as the settings themselves.
+
+    Arguments:
+        settings {Mapping} -- settings to compile (Settings, or a dict of settings)
+
+    Keyword Arguments:
+        package {str} -- name of the settings package, for the module's docstring (default: {"settings"})
+    """
+    data = getattr(settings, "data", settings)
+    assignments = []
+    sensitive = {}
+    errors = {}
+    for key, val in data.items():
+        if not isinstance(key, str) or not key.isidentifier() or keyword.iskeyword(key):
+            errors[key] = "isn't a valid Python name"
+            continue
+        if key in reserved_names:
+            errors[key] = "is reserved by the compiled module"
+            continue
+        try:
+            val, stars = get_value(val)
+            assignments.append(f"{key} = {to_source(val)}")
+        except ValueError as e:
+            errors[key] = str(e)
+            continue
+        if stars is not None:
+            sensitive[key] = stars
+    if errors:
+        raise CompileError(errors)
+    return MODULE_TEMPLATE.format(
+        package=package,
+        assignments="\n".join(assignments),
+        names=to_source(tuple(key for key in data)),
+        sensitive=to_source(sensitive),
+    )
+
+
+def compile_package(loader, package, path):
+    """Loads the settings of package once with loader, and writes them to path as a Python module (see
+    compile_settings). The file is replaced atomically, and only readable by its owner. Returns the settings.
+
+    Arguments:
+        loader {Loader} -- loader to load the settings with
+        package {str} -- settings package name
+        path {str} -- file to write the module to, e.g. "my_app/compiled_settings.py"
+    """
+    settings = loader.load_settings(package)
+    source = compile_settings(settings, package)
+    write_atomic(os.path.abspath(path), source.encode("utf-8"))
+    return settings
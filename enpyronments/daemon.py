@@ -0,0 +1,450 @@
+"""
+Local settings daemon, and a caching client for it
+"""
+
+import itertools
+import logging
+import os
+import pickle
+import socket
+import struct
+import threading
+from collections.abc import Mapping
+
+from enpyronments.settings import SettingNotFound
+from enpyronments.utils import Lazy, Sensitive
+
+logger = logging.getLogger(__name__)
+
+# every message is a pickle, preceded by its length
+frame_header = struct.Struct(">I")
+
+_missing = object()
+_uncached = object()
+
+
+def send_frame(sock, message):
+    """ Sends message to sock, pickled and preceded by its length """
+    payload = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    sock.sendall(frame_header.pack(len(payload)) + payload)
+
+
+def recv_exactly(sock, size):
+    """ Reads size bytes from sock, or returns None if it's closed first """
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """ Reads one message from sock, or returns None if it's closed """
+    head = recv_exactly(sock, frame_header.size)
+    if head is None:
+        return None
+    payload = recv_exactly(sock, frame_header.unpack(head)[0])
+    if payload is None:
+        return None
+    return pickle.loads(payload)
+
+
+def resolve_value(val):
+    """ Returns val with Lazy values computed (inside Sensitive too), so it can be sent to clients """
+    if isinstance(val, Sensitive):
+        if isinstance(val.obj, Lazy):
+            return Sensitive(val.obj.resolve(), stars=val.stars)
+        return val
+    if isinstance(val, Lazy):
+        return val.resolve()
+    return val
+
+
+class Connection:
+    """ A client connected to a SettingsDaemon. Replies and invalidations are sent from different threads, so
+    sending takes a lock. """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.send_lock = threading.Lock()
+
+    def send(self, message):
+        with self.send_lock:
+            send_frame(self.sock, message)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class SettingsDaemon:
+    """Owns a Loader and serves the settings of one package to the processes on this host, over a Unix domain
+    socket. The settings files are watched (see :class:`Watcher`), and when they change, every client is sent the
+    names of the settings that changed, so clients' caches never drift.
+
+    The socket is only accessible to the daemon's user (mode 0600): settings, Sensitive ones included, are sent as
+    pickles, so only processes trusted with the settings should connect.
+
+    Arguments:
+        loader {Loader} -- loader to load and watch the settings with
+        package {str} -- settings package name
+        path {str} -- path of the socket
+
+    Keyword Arguments:
+        interval {float} -- seconds between checks for changed settings files (default: {1.0})
+        backend {str} -- "poll" or "inotify", see Watcher (default: {"poll"})
+    """
+
+    def __init__(self, loader, package, path, interval=1.0, backend="poll"):
+        self.path = path
+        self.watcher = loader.watch(package, interval=interval, backend=backend)
+        self.settings = self.watcher.settings
+        self.version = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+        self.listener = None
+        self.thread = None
+        self.stopping = threading.Event()
+        self.watcher.subscribe(self.invalidate)
+
+    def listen(self):
+        """ Binds the socket: to a temporary path first, so it's only ever reachable with its final permissions """
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listener.bind(temp_path)
+            os.chmod(temp_path, 0o600)
+            listener.listen(64)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            listener.close()
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        # accept() wakes up regularly to notice stop()
+        listener.settimeout(0.1)
+        self.listener = listener
+
+    def start(self):
+        """ Starts serving, and watching the settings files, in background threads """
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.listen()
+        self.thread = threading.Thread(target=self.serve, name=f"SettingsDaemon({self.path})", daemon=True)
+        self.thread.start()
+        self.watcher.start()
+
+    def stop(self):
+        """ Stops serving, disconnects every client and removes the socket """
+        if self.thread is None:
+            return
+        self.watcher.stop()
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+        self.listener.close()
+        with self.lock:
+            connections, self.connections = self.connections, set()
+        for connection in connections:
+            connection.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def serve(self):
+        """ Accepts clients until stopped, handling each one in its own thread """
+        while not self.stopping.is_set():
+            try:
+                sock, _ = self.listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                if self.stopping.is_set():
+                    break
+                raise
+            sock.settimeout(None)
+            connection = Connection(sock)
+            with self.lock:
+                self.connections.add(connection)
+                connection.send(("hello", self.version))
+            threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+    def handle(self, connection):
+        """ Answers a client's requests until it disconnects """
+        try:
+            while True:
+                message = recv_frame(connection.sock)
+                if message is None:
+                    break
+                request_id, op, args = message
+                # the version is read before the settings, so a reply is never older than the version it claims
+                version = self.version
+                try:
+                    result = getattr(self, f"op_{op}")(*args)
+                except Exception as e:  # pylint: disable=broad-except
+                    connection.send(("error", request_id, version, e))
+                else:
+                    connection.send(("result", request_id, version, result))
+        except OSError:
+            pass
+        finally:
+            with self.lock:
+                self.connections.discard(connection)
+            connection.close()
+
+    def op_get(self, key):
+        data = self.settings.data
+        if key in data:
+            return True, resolve_value(data[key])
+        return False, None
+
+    def op_keys(self):
+        return list(self.settings.data)
+
+    def op_items(self):
+        return {key: resolve_value(val) for key, val in self.settings.data.items()}
+
+    def op_masked(self):
+        return self.settings.masked()
+
+    def invalidate(self, changed_keys):
+        """ Sends every client the names of the settings that changed (called by the watcher after each reload) """
+        with self.lock:
+            self.version += 1
+            message = ("invalidate", self.version, sorted(changed_keys))
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.send(message)
+            except OSError:
+                logger.debug("Couldn't send an invalidation to a client of %s", self.path)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class SettingsClient(Mapping):
+    """A read-only, Settings-compatible view of the settings served by a :class:`SettingsDaemon`. Each setting is
+    fetched from the daemon the first time it's read, and cached until the daemon says it changed, so repeated reads
+    are local dict lookups. A background thread receives the daemon's invalidations. If the connection is lost, the
+    cache is dropped, and reads raise ConnectionError.
+
+    Arguments:
+        path {str} -- path of the daemon's socket
+
+    Keyword Arguments:
+        timeout {float} -- seconds to wait for each reply from the daemon (default: {5.0})
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self.cache = {}
+        self.key_list = None
+        self.subscribers = []
+        self.pending = {}
+        self.request_ids = itertools.count()
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.closed = False
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        hello = recv_frame(self.sock)
+        if hello is None or hello[0] != "hello":
+            self.sock.close()
+            raise ConnectionError(f"{path} isn't a settings daemon")
+        self.version = hello[1]
+        self.thread = threading.Thread(target=self.read, name=f"SettingsClient({path})", daemon=True)
+        self.thread.start()
+
+    def read(self):
+        """ Receives replies and invalidations until the connection closes """
+        try:
+            while True:
+                message = recv_frame(self.sock)
+                if message is None:
+                    break
+                if message[0] == "invalidate":
+                    self.invalidate(message[1], message[2])
+                else:
+                    kind, request_id, version, result = message
+                    with self.lock:
+                        waiter = self.pending.pop(request_id, None)
+                    if waiter is not None:
+                        waiter[1:] = [kind, version, result]
+                        waiter[0].set()
+        except OSError:
+            pass
+        finally:
+            # without invalidations the cache could drift from the daemon, so stop serving from it
+            self.closed = True
+            with self.lock:
+                self.cache.clear()
+                self.key_list = None
+                waiters, self.pending = list(self.pending.values()), {}
+            for waiter in waiters:
+                waiter[0].set()
+
+    def invalidate(self, version, keys):
+        """ Drops keys from the cache, and calls the subscribers with them """
+        with self.lock:
+            self.version = version
+            for key in keys:
+                self.cache.pop(key, None)
+            self.key_list = None
+        for callback in list(self.subscribers):
+            callback(set(keys))
+
+    def subscribe(self, callback):
+        """Registers callback to be called with the set of changed keys whenever the daemon reloads the settings,
+        and returns it (so this can be used as a decorator). It's called from the client's background thread.
+
+        Arguments:
+            callback {callable} -- function taking a set of keys
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def request(self, op, *args):
+        """ Sends a request to the daemon and returns (version, result), raising the daemon's error if it failed """
+        if self.closed:
+            raise ConnectionError(f"The connection to {self.path} is closed")
+        waiter = [threading.Event()]
+        with self.lock:
+            request_id = next(self.request_ids)
+            self.pending[request_id] = waiter
+        with self.send_lock:
+            send_frame(self.sock, (request_id, op, args))
+        if not waiter[0].wait(self.timeout):
+            with self.lock:
+                self.pending.pop(request_id, None)
+            raise TimeoutError(f"{self.path} didn't reply to {op} in {self.timeout} seconds")
+        if len(waiter) == 1:
+            raise ConnectionError(f"The connection to {self.path} was closed")
+        _, kind, version, result = waiter
+        if kind == "error":
+            raise result
+        return version, result
+
+    def fetch(self, key):
+        """ Returns the raw value of key (Sensitive kept), from the cache or else the daemon, or _missing if there's
+        no such setting """
+        val = self.cache.get(key, _uncached)
+        if val is not _uncached:
+            return val
+        version, (found, val) = self.request("get", key)
+        if not found:
+            val = _missing
+        with self.lock:
+            # a reply older than the latest invalidation may be stale, so it's used once but not cached
+            if version == self.version:
+                self.cache[key] = val
+        return val
+
+    def __getitem__(self, key, extract_from_sensitive: bool = True):
+        """ Same as Settings.__getitem__ """
+        val = self.fetch(key)
+        if val is _missing:
+            raise KeyError(key)
+        if extract_from_sensitive and isinstance(val, Sensitive):
+            return val.obj
+        return val
+
+    def __getattr__(self, key):
+        """ Same as Settings.__getattr__ """
+        if key.startswith("__") or "cache" not in self.__dict__:
+            raise AttributeError(key)
+        if key not in self:
+            key = str(key).upper()
+        try:
+            return self[key]
+        except KeyError:
+            raise SettingNotFound(
+                f'"{key}" was not found in specified settings and is not an attribute of {repr(self)}.'
+            )
+
+    def __contains__(self, key):
+        return self.fetch(key) is not _missing
+
+    def get(self, key, default=None, extract_from_sensitive: bool = True):
+        """ Same as Settings.get """
+        try:
+            return self.__getitem__(key, extract_from_sensitive)
+        except KeyError:
+            return default
+
+    def keys_list(self):
+        """ Returns the list of setting names, cached until the next invalidation """
+        key_list = self.key_list
+        if key_list is None:
+            version, key_list = self.request("keys")
+            with self.lock:
+                if version == self.version:
+                    self.key_list = key_list
+        return key_list
+
+    def __iter__(self):
+        return iter(self.keys_list())
+
+    def __len__(self):
+        return len(self.keys_list())
+
+    @property
+    def data(self):
+        """ Every setting, fetched at once, with Sensitive markers, like Settings.data """
+        version, data = self.request("items")
+        with self.lock:
+            if version == self.version:
+                self.cache.update(data)
+                self.key_list = list(data)
+        return data
+
+    def items(self, extract_from_sensitive: bool = True):
+        """ Same as Settings.items, all from the same version of the settings """
+        for key, val in self.data.items():
+            if extract_from_sensitive and isinstance(val, Sensitive):
+                val = val.obj
+            yield key, val
+
+    def values(self, extract_from_sensitive: bool = True):
+        """ Same as Settings.values """
+        for _, val in self.items(extract_from_sensitive):
+            yield val
+
+    def masked(self):
+        """ Same as Settings.masked, masked by the daemon """
+        return self.request("masked")[1]
+
+    def close(self):
+        """ Disconnects from the daemon """
+        self.closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r})"
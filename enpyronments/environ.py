@@ -0,0 +1,241 @@
+"""
+Exporting settings to environment variables, and overlaying settings from them
+"""
+
+import json
+import os
+
+from enpyronments.schema import SchemaError, coercers, to_list
+from enpyronments.utils import Lazy, Sensitive
+
+sensitive_policies = ("unwrap", "exclude", "mask")
+
+# Values of these types can't change without being replaced, so an unchanged identity means an unchanged export
+immutable_types = frozenset((str, bytes, int, float, bool, type(None)))
+
+
+def to_environ_value(val):
+    """Returns the str val is exported to the environment as, or None if it shouldn't be exported at all.
+
+    Strings are exported as-is, bytes are decoded with the filesystem encoding, numbers and booleans via str(), lists,
+    tuples and dicts as JSON, and None isn't exported. Anything else is exported via str(). Lazy values are computed.
+    """
+    if isinstance(val, Lazy):
+        val = val.resolve()
+    if isinstance(val, str):
+        return val
+    if val is None:
+        return None
+    if isinstance(val, bytes):
+        return os.fsdecode(val)
+    if isinstance(val, (list, tuple, dict)):
+        return json.dumps(val, default=str)
+    return str(val)
+
+
+def get_prefixed_environ(prefix, environ=None):
+    """Returns a dict of each variable in environ whose name starts with prefix, by its name without the prefix. The
+    environment is scanned once.
+
+    Arguments:
+        prefix {str} -- prefix of the variables to return (e.g. "APP_")
+
+    Keyword Arguments:
+        environ {Mapping} -- the environment to read (default: {os.environ})
+    """
+    environ = os.environ if environ is None else environ
+    size = len(prefix)
+    return {name[size:]: val for name, val in environ.items() if len(name) > size and name.startswith(prefix)}
+
+
+def coerce_environ_value(raw, existing):
+    """Returns raw, a str read from the environment, converted to the type of existing, the value it overrides.
+    Booleans, numbers, lists and dicts are parsed like :mod:`schema` fields (lists and dicts as JSON, the format
+    they're exported in, or lists as comma separated values), and tuples and sets like lists. If existing is
+    Sensitive, the result is wrapped in Sensitive with the same number of stars. Otherwise (None, Lazy values, or a
+    new setting), raw is returned as-is.
+
+    Arguments:
+        raw {str} -- value of the environment variable
+        existing -- value of the setting it overrides, or None
+    """
+    if isinstance(existing, Sensitive):
+        return Sensitive(coerce_environ_value(raw, existing.obj), stars=existing.stars)
+    existing_type = type(existing)
+    coerce = coercers.get(existing_type)
+    if coerce is not None:
+        return coerce(raw)
+    if existing_type in (tuple, set, frozenset):
+        return existing_type(to_list(raw))
+    if existing_type is bytes:
+        return os.fsencode(raw)
+    return raw
+
+
+def find_namespace_key(namespace, name):
+    """ Returns the key of namespace (a dict) name refers to: name itself, or else the only str key equal to it
+    ignoring case (environment variables are usually upper case, nested keys often aren't), or else name """
+    if name in namespace:
+        return name
+    matches = [key for key in namespace if isinstance(key, str) and key.lower() == name.lower()]
+    return matches[0] if len(matches) == 1 else name
+
+
+def set_namespace_value(namespace, path, raw):
+    """Returns a copy of namespace with raw set at path, coerced to the type of the value it overrides. The dicts
+    along path are copied, never modified, as they may be shared with other settings.
+
+    Arguments:
+        namespace {dict} -- the namespace to set the value in, None to start a new one, or a Sensitive dict
+        path {list} -- names of the nested namespaces, then of the value
+        raw {str} -- value of the environment variable
+    """
+    if isinstance(namespace, Sensitive):
+        return Sensitive(set_namespace_value(namespace.obj, path, raw), stars=namespace.stars)
+    if namespace is None:
+        namespace = {}
+    elif not isinstance(namespace, dict):
+        raise TypeError(f"{type(namespace).__name__} setting can't hold nested values")
+    key = find_namespace_key(namespace, path[0])
+    copied = dict(namespace)
+    if len(path) == 1:
+        copied[key] = coerce_environ_value(raw, namespace.get(key))
+    else:
+        copied[key] = set_namespace_value(namespace.get(key), path[1:], raw)
+    return copied
+
+
+def build_environ_layer(variables, layers, sep="__", key_filter=None):
+    """Returns a settings layer overriding layers with variables (see get_prefixed_environ), each converted to the
+    type of the setting it overrides (see coerce_environ_value). Names are split on sep to reach into nested
+    namespaces, so with the default sep, DATABASE__HOST overrides ``DATABASE["HOST"]`` (or ``DATABASE["host"]``),
+    setting it in a copy of the DATABASE dict. Raises a SchemaError listing every variable that can't be converted.
+
+    Arguments:
+        variables {dict} -- name to value of each variable, without their prefix
+        layers {list} -- (name, dict of settings) pairs to overlay, lowest priority first
+
+    Keyword Arguments:
+        sep {str} -- separator between the names of nested namespaces, or None to never split names
+        key_filter {callable} -- predicate taking a setting name, and returning True if it can be set
+    """
+    layer = {}
+    errors = {}
+    # sorted, so a whole namespace (DATABASE) is set before the values in it (DATABASE__HOST)
+    for name, raw in sorted(variables.items()):
+        path = name.split(sep) if sep else [name]
+        key = path[0]
+        if not all(path) or (key_filter is not None and not key_filter(key)):
+            continue
+        if key in layer:
+            existing = layer[key]
+        else:
+            existing = next((values[key] for _, values in reversed(layers) if key in values), None)
+        try:
+            if len(path) == 1:
+                layer[key] = coerce_environ_value(raw, existing)
+            else:
+                layer[key] = set_namespace_value(existing, path[1:], raw)
+        except (TypeError, ValueError) as e:
+            errors[name] = str(e)
+    if errors:
+        raise SchemaError(errors)
+    return layer
+
+
+class EnvironExporter:
+    """Exports a Settings object to the environment, remembering what it exported last time so that repeated exports
+    only write the keys that changed, and caching the environment built for child processes until the settings change.
+
+    Serialized values are reused while a setting holds the same immutable object. Settings changed in place (e.g. a
+    list that's appended to) aren't noticed until the setting is reassigned.
+    """
+
+    def __init__(self, settings):
+        """
+        Arguments:
+            settings {Settings} -- The settings to export
+        """
+        self.settings = settings
+        self.serialized = {}
+        self.target = None
+        self.exported = {}
+        self.exported_version = None
+        self.child_environ_key = None
+        self.child_environ_base = None
+        self.child_environ = None
+
+    def serialize(self, sensitive="unwrap"):
+        """Returns a dict of each exported setting's name to its serialized value.
+
+        Keyword Arguments:
+            sensitive {str} -- What to do with Sensitive values: "unwrap" exports the real value, "exclude" leaves
+                them out and "mask" exports their masked value (default: {"unwrap"})
+        """
+        if sensitive not in sensitive_policies:
+            raise ValueError(f"sensitive must be one of {sensitive_policies}, not {sensitive!r}.")
+        previous = self.serialized.get(sensitive, {})
+        current = {}
+        for key, val in self.settings.data.items():
+            cached = previous.get(key)
+            if cached is not None and cached[0] is val and type(val) in immutable_types:
+                current[key] = cached
+                continue
+            if isinstance(val, Sensitive):
+                if sensitive == "exclude":
+                    continue
+                exported = val.mask() if sensitive == "mask" else to_environ_value(val.obj)
+            else:
+                exported = to_environ_value(val)
+            if exported is not None:
+                current[key] = (val, exported)
+        self.serialized[sensitive] = current
+        return {key: exported for key, (_, exported) in current.items()}
+
+    def export(self, sensitive="unwrap", environ=None):
+        """Writes the settings to environ, touching only the keys that changed since the last export to it. Keys this
+        exporter set before that are no longer exported are removed. Returns the set of keys that were written or
+        removed.
+
+        Keyword Arguments:
+            sensitive {str} -- How to export Sensitive values, see serialize (default: {"unwrap"})
+            environ {MutableMapping} -- Where to export to (default: {os.environ})
+        """
+        environ = os.environ if environ is None else environ
+        version = (self.settings.write_count, sensitive)
+        if environ is not self.target:
+            self.target, self.exported, self.exported_version = environ, {}, None
+        elif version == self.exported_version:
+            return set()
+
+        values = self.serialize(sensitive)
+        changed = set()
+        for key, exported in values.items():
+            if self.exported.get(key) != exported:
+                environ[key] = exported
+                changed.add(key)
+        for key in self.exported.keys() - values.keys():
+            environ.pop(key, None)
+            changed.add(key)
+        self.exported = values
+        self.exported_version = version
+        return changed
+
+    def get_child_environ(self, sensitive="unwrap", base=None, refresh=False):
+        """Returns a dict of base with the settings exported over it, for use as the environment of a child process
+        (e.g. subprocess.Popen's env). The dict is cached until the settings change, so it must not be modified.
+
+        Changes to base aren't tracked: pass refresh=True to rebuild after changing it.
+
+        Keyword Arguments:
+            sensitive {str} -- How to export Sensitive values, see serialize (default: {"unwrap"})
+            base {Mapping} -- The environment to start from (default: {os.environ})
+            refresh {bool} -- Rebuild the environment even if the settings haven't changed (default: {False})
+        """
+        base = os.environ if base is None else base
+        key = (self.settings.write_count, sensitive)
+        if refresh or key != self.child_environ_key or base is not self.child_environ_base:
+            child_environ = dict(base)
+            child_environ.update(self.serialize(sensitive))
+            self.child_environ, self.child_environ_key, self.child_environ_base = child_environ, key, base
+        return self.child_environ
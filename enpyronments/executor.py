@@ -0,0 +1,122 @@
+"""
+FileExecutor class
+"""
+
+import builtins
+import os
+import threading
+from importlib.util import module_from_spec, spec_from_file_location
+from types import ModuleType
+
+
+class FileExecutor:
+    """Executes the settings files of a package directly from their source, each in a fresh module namespace. Nothing
+    is added to ``sys.path`` or ``sys.modules``, so several executors can run in parallel threads, even for packages
+    with the same name.
+
+    Imports of the settings package from within its files (``from settings.env import X``, ``from . import env``,
+    ``import settings.env``) are resolved privately by this executor, so each file is executed at most once. All
+    other imports go through the regular import system.
+
+    Arguments:
+        root {str} -- Path of the directory containing the package
+
+        package {str} -- Name of the settings package
+
+    Keyword Arguments:
+        ext {str} -- Extension of the files in the package
+
+        bytecode_cache {BytecodeCache} -- Cache for the compiled settings files
+    """
+
+    def __init__(self, root, package, ext=".py", bytecode_cache=None):
+        self.root = root
+        self.package = package
+        self.ext = ext
+        self.bytecode_cache = bytecode_cache
+        self.directory = os.path.join(root, package)
+        self.modules = {}
+        self.lock = threading.RLock()
+
+        self.package_module = ModuleType(package)
+        self.package_module.__path__ = [self.directory]
+        self.package_module.__package__ = package
+
+        self.builtins = dict(builtins.__dict__)
+        self.builtins["__import__"] = self.import_module
+
+    def get_path(self, module_name):
+        """ Returns the path of the file for module_name within the package """
+        return os.path.join(self.directory, f"{module_name}{self.ext}")
+
+    def get_code(self, path):
+        """Returns the compiled code object for the source file at path, from the bytecode cache if there is one
+
+        Arguments:
+            path {str} -- path of the source file
+        """
+        with open(path, "rb") as f:
+            source = f.read()
+        if self.bytecode_cache is not None:
+            return self.bytecode_cache.get_code(path, source)
+        return compile(source, path, "exec", dont_inherit=True)
+
+    def execute(self, module_name):
+        """Executes the file for module_name (if it hasn't been executed by this executor yet), and returns the
+        resulting module. The module is never added to sys.modules.
+
+        Arguments:
+            module_name {str} -- name of the module within the package
+        """
+        with self.lock:
+            if module_name in self.modules:
+                return self.modules[module_name]
+
+            path = self.get_path(module_name)
+            if not os.path.isfile(path):
+                raise ModuleNotFoundError(
+                    f"No module named '{self.package}.{module_name}'",
+                    name=f"{self.package}.{module_name}",
+                )
+            spec = spec_from_file_location(f"{self.package}.{module_name}", path)
+            module = module_from_spec(spec)
+            module.__builtins__ = self.builtins
+
+            # registered before executing, like sys.modules, so circular imports see the partial module
+            self.modules[module_name] = module
+            try:
+                exec(self.get_code(path), module.__dict__)  # pylint: disable=exec-used
+            except BaseException:
+                del self.modules[module_name]
+                raise
+            setattr(self.package_module, module_name, module)
+            return module
+
+    def import_module(self, name, globals=None, locals=None, fromlist=(), level=0):
+        """ Replacement for ``__import__`` within settings files, resolving imports of the settings package """
+        # pylint: disable=redefined-builtin
+        absolute_name = name
+        if level:
+            importer_package = (globals or {}).get("__package__")
+            if level != 1 or importer_package != self.package:
+                return builtins.__import__(name, globals, locals, fromlist, level)
+            absolute_name = f"{self.package}.{name}" if name else self.package
+
+        if absolute_name == self.package:
+            for item in fromlist or ():
+                if item != "*" and not hasattr(self.package_module, item):
+                    self.execute(item)
+            return self.package_module
+
+        package, _, module_name = absolute_name.partition(".")
+        if package != self.package:
+            return builtins.__import__(name, globals, locals, fromlist, level)
+        if "." in module_name:
+            raise ModuleNotFoundError(
+                f"No module named '{absolute_name}' (nested packages can't be imported from settings files)",
+                name=absolute_name,
+            )
+
+        module = self.execute(module_name)
+        # "import package.module" binds the package, "from package.module import x" needs the module
+        return module if fromlist else self.package_module
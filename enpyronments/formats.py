@@ -0,0 +1,110 @@
+"""
+Declarative settings formats
+"""
+
+import json
+
+
+def parse_json(path):
+    """Parses a JSON settings file, which must hold an object of settings
+
+    Arguments:
+        path {str} -- path of the file
+    """
+    with open(path, "rb") as f:
+        settings = json.load(f)
+    if not isinstance(settings, dict):
+        raise ValueError(f"{path} must contain a JSON object of settings")
+    return settings
+
+
+def get_toml_loader():
+    """ Returns a function parsing TOML from a binary file, from tomllib (Python 3.11+), tomli or toml """
+    try:
+        import tomllib  # pylint: disable=import-outside-toplevel
+
+        return tomllib.load
+    except ImportError:
+        pass
+    try:
+        import tomli  # pylint: disable=import-outside-toplevel
+
+        return tomli.load
+    except ImportError:
+        pass
+    try:
+        import toml  # pylint: disable=import-outside-toplevel
+
+        return lambda f: toml.loads(f.read().decode("utf-8"))
+    except ImportError:
+        raise ImportError(
+            "TOML settings files require Python 3.11+, or the tomli package (pip install tomli)"
+        )
+
+
+def parse_toml(path):
+    """Parses a TOML settings file
+
+    Arguments:
+        path {str} -- path of the file
+    """
+    load = get_toml_loader()
+    with open(path, "rb") as f:
+        return load(f)
+
+
+def find_closing_quote(value):
+    """ Returns the index of the quote closing the one value starts with, or -1. Double quotes can be escaped with a
+    backslash. """
+    quote = value[0]
+    index = 1
+    while index < len(value):
+        char = value[index]
+        if char == quote:
+            return index
+        index += 2 if char == "\\" and quote == '"' else 1
+    return -1
+
+
+def parse_dotenv_value(value):
+    """ Parses the value of a .env line, handling quotes and inline comments (after the closing quote of a quoted
+    value) """
+    if value[:1] in ("'", '"'):
+        end = find_closing_quote(value)
+        rest = value[end + 1 :].strip()
+        if end == -1 or (rest and not rest.startswith("#")):
+            # quoted as a whole, if at all
+            end = len(value) - 1 if len(value) >= 2 and value[-1] == value[0] else -1
+        if end != -1:
+            if value[0] == "'":
+                return value[1:end]
+            return value[1:end].encode("latin-1", "backslashreplace").decode("unicode_escape")
+    comment = value.find(" #")
+    if comment != -1:
+        value = value[:comment]
+    return value.strip()
+
+
+def parse_dotenv(path):
+    """Parses a .env settings file of ``KEY=value`` lines. Blank lines and ``#`` comments are ignored, an
+    ``export`` prefix is allowed, and values are strings (quoted with '' or "", or unquoted).
+
+    Arguments:
+        path {str} -- path of the file
+    """
+    settings = {}
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("export "):
+                line = line[len("export ") :].lstrip()
+            key, sep, value = line.partition("=")
+            if not sep:
+                raise ValueError(f'{path}, line {number}: expected "KEY=value", got "{line}"')
+            settings[key.strip()] = parse_dotenv_value(value.strip())
+    return settings
+
+
+default_formats = {".toml": parse_toml, ".json": parse_json, ".env": parse_dotenv}
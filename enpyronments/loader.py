@@ -2,12 +2,19 @@
 Loader class
 """
 
+import copy
 import os
 import re
+import string
+import sys
 from glob import glob
 from importlib import import_module, reload
 
-from enpyronments.settings import Settings
+from enpyronments.environ import build_environ_layer, get_prefixed_environ
+from enpyronments.executor import FileExecutor
+from enpyronments.providers import batch_secret_refs
+from enpyronments.settings import LayeredSettings
+from enpyronments.trace import LoadTrace, null_trace
 from enpyronments.utils import UsePath
 
 default_prefix = "env"
@@ -17,6 +24,49 @@ default_builtin_pattern = r"^__(.+)__$"
 default_attribute_pattern = r"^[A-Z_0-9]+$"
 default_local_name = "local"
 default_mode_name = "MODE"
+default_environ_sep = "__"
+
+_attribute_chars = string.ascii_uppercase + string.digits + "_"
+
+
+def is_default_builtin(key):
+    """ Equivalent to matching default_builtin_pattern, without the regex """
+    return len(key) > 4 and key.startswith("__") and key.endswith("__")
+
+
+def is_default_attribute(key):
+    """ Equivalent to matching default_attribute_pattern and not default_builtin_pattern, without the regex """
+    # strip() only stops at a character outside the set, so anything left over means the key doesn't match
+    if not key or key.strip(_attribute_chars):
+        return False
+    return not (len(key) > 4 and key[:2] == "__" and key[-2:] == "__")
+
+
+class PatternFilter:
+    """Attribute filter for custom patterns, matching names that match attribute_pattern but not builtin_pattern
+
+    Arguments:
+        builtin_pattern {str} -- Regex pattern of builtin names
+
+        attribute_pattern {str} -- Regex pattern of settings names
+    """
+
+    def __init__(self, builtin_pattern, attribute_pattern):
+        self.builtin_match = re.compile(builtin_pattern).match
+        self.attribute_match = re.compile(attribute_pattern).match
+
+    def __call__(self, key):
+        """ Returns True if key should be loaded as a setting """
+        return self.builtin_match(key) is None and self.attribute_match(key) is not None
+
+
+class LoadResults(dict):
+    """The dict of package name to Settings returned by :meth:`Loader.load_many`. Packages that failed to load are
+    left out, and the exception each raised is stored in ``errors`` instead."""
+
+    def __init__(self):
+        super().__init__()
+        self.errors = {}
 
 
 class Loader:
@@ -35,11 +85,51 @@ class Loader:
 
         attribute_pattern {str} -- Regex pattern used to identify which attributes should be included
 
+        attribute_filter {callable} -- Predicate taking an attribute name, and returning True if it should be loaded
+        as a setting. Replaces the check against builtin_pattern and attribute_pattern when given.
+
         mode {str} -- Name of setting indicating mode
 
         local_name -- Suffix used to indicate local settings
+
+        lazy {bool} -- Only execute the settings files needed by the resolved mode. The mode is resolved from the
+        general and local settings files first, then only the files named by ``get_load_order(mode)`` are executed.
+
+        cache {SnapshotCache} -- Optional on-disk snapshot cache. When given, a fresh snapshot is loaded instead of
+        executing any settings modules.
+
+        settings_class {type} -- Settings class to load into, e.g. ConcurrentSettings for multi-threaded programs.
+        The default, LayeredSettings, keeps each settings file as a layer, so it knows which file every setting comes
+        from, and a layer can be replaced without merging the rest again.
+
+        isolated {bool} -- Execute settings files directly from their source with a :class:`FileExecutor`, instead
+        of importing them. Isolated loading never touches sys.path or sys.modules, so several loaders can load in
+        parallel threads.
+
+        bytecode_cache {BytecodeCache} -- Where to cache compiled settings files in isolated mode. Imported settings
+        files are cached by Python as usual, so giving a bytecode cache without isolated=True raises ValueError.
+
+        formats {dict} -- Declarative settings formats to load alongside Python files, as a dict of extension to a
+        parser taking a path and returning a dict of settings (e.g. ``formats.default_formats``, for .toml, .json and
+        .env files). Declarative files are parsed without executing any code. When a Python file and declarative files
+        share a name (env.py and env.toml), they're merged in the order of formats, with the Python file last.
+
+        schema {Schema} -- Schema to coerce and validate the loaded settings with, once, at the end of each load
+
+        pool {LayerPool} -- Pool to share the layers of settings with, across every loader given the same pool (see
+        :class:`LayerPool`), so many mostly identical settings objects (e.g. one per tenant) store only what differs
+
+        environ_prefix {str} -- Prefix of the environment variables to overlay the settings files with (e.g. "APP_").
+        When given, the variables are loaded as a final layer (see :meth:`get_environ_layer`), so APP_DEBUG=false
+        overrides DEBUG from every settings file, converted to the type of the value it overrides. APP_MODE (the
+        prefix and mode_setting_name) picks the mode.
+
+        environ_sep {str} -- Separator between the names of nested namespaces in environment variables, so
+        APP_DATABASE__HOST overrides ``DATABASE["HOST"]``
     """
 
+    environ_layer = "<environ>"
+
     def __init__(
         self,
         root,
@@ -48,60 +138,271 @@ class Loader:
         sep=default_sep,
         builtin_pattern=default_builtin_pattern,
         attribute_pattern=default_attribute_pattern,
+        attribute_filter=None,
         mode_setting_name=default_mode_name,
         local_name=default_local_name,
+        lazy=False,
+        cache=None,
+        settings_class=LayeredSettings,
+        isolated=False,
+        bytecode_cache=None,
+        formats=None,
+        schema=None,
+        pool=None,
+        environ_prefix=None,
+        environ_sep=default_environ_sep,
     ):
+        if bytecode_cache is not None and not isolated:
+            raise ValueError("bytecode_cache is only used in isolated mode, pass isolated=True too")
         self.root = root
         self.prefix = prefix
         self.ext = ext
         self.sep = sep
         self.builtin_pattern = builtin_pattern
         self.attribute_pattern = attribute_pattern
-        self.mode_setting_name = mode
+        self.is_builtin, self.attribute_filter = self.compile_patterns(attribute_filter)
+        self.mode_setting_name = mode_setting_name
         self.local_name = local_name
+        self.lazy = lazy
+        self.cache = cache
+        self.settings_class = settings_class
+        self.isolated = isolated
+        self.bytecode_cache = bytecode_cache
+        self.formats = dict(formats or {})
+        self.schema = schema
+        self.pool = pool
+        self.environ_prefix = environ_prefix
+        self.environ_sep = environ_sep
+
+    def compile_patterns(self, attribute_filter=None):
+        """Builds the predicates used to filter module attributes, compiling the patterns once. The default patterns
+        are checked with plain string operations instead of regexes.
+
+        Keyword Arguments:
+            attribute_filter {callable} -- predicate to use in place of the compiled patterns
+        """
+        if self.builtin_pattern == default_builtin_pattern:
+            is_builtin = is_default_builtin
+        else:
+            is_builtin = re.compile(self.builtin_pattern).match
+
+        if attribute_filter is not None:
+            return is_builtin, attribute_filter
+
+        if (
+            self.builtin_pattern == default_builtin_pattern
+            and self.attribute_pattern == default_attribute_pattern
+        ):
+            return is_builtin, is_default_attribute
+
+        return is_builtin, PatternFilter(self.builtin_pattern, self.attribute_pattern)
+
+    def get_config(self):
+        """ Returns the options that affect which settings are loaded, used to key cached settings """
+        return (
+            self.prefix,
+            self.ext,
+            self.sep,
+            self.builtin_pattern,
+            self.attribute_pattern,
+            getattr(
+                self.attribute_filter,
+                "__qualname__",
+                type(self.attribute_filter).__qualname__,
+            ),
+            self.mode_setting_name,
+            self.local_name,
+            tuple(self.get_load_order(None)),
+            tuple(self.formats),
+            self.environ_prefix,
+            self.environ_sep,
+            tuple(sorted(self.get_environ_variables().items())),
+        )
+
+    def get_module_paths(self, package):
+        """Searches package for settings files matching the glob pattern {prefix}*{ext} (or the extension of any
+        declarative format), and returns their paths
+
+        Arguments:
+            package {str} -- package to search for settings files
+        """
+        if not self.formats:
+            return glob(os.path.join(self.root, package, f"{self.prefix}*{self.ext}"))
+        return [
+            path
+            for path in glob(os.path.join(self.root, package, f"{self.prefix}*"))
+            if self.split_module_path(path)[1] is not None
+        ]
+
+    def split_module_path(self, path):
+        """Returns the module name and extension of a settings file's path, or (None, None) if its extension isn't
+        one the loader handles
+
+        Arguments:
+            path {str} -- path of a settings file
+        """
+        filename = os.path.basename(path)
+        for ext in (self.ext, *self.formats):
+            if filename.endswith(ext) and len(filename) > len(ext):
+                return filename[: -len(ext)], ext
+        return None, None
+
+    def get_module_names(self, package):
+        """Searches package for settings files matching the glob pattern {prefix}*{ext}, and returns their module
+        names, without importing them
+
+        Arguments:
+            package {str} -- package to search for settings files
+        """
+        names = {}
+        for module_path in self.get_module_paths(package):
+            names.setdefault(self.split_module_path(module_path)[0])
+        return list(names)
+
+    def get_executor(self, package):
+        """Returns a new :class:`FileExecutor` for package, used when loading in isolated mode. Modules loaded with
+        the same executor share the results of imports between settings files.
+
+        Arguments:
+            package {str} -- package name
+        """
+        return FileExecutor(
+            self.root, package, ext=self.ext, bytecode_cache=self.bytecode_cache
+        )
+
+    def load_module(self, package, module_name, executor=None, trace=null_trace):
+        """Imports a single settings module from package (parsing any declarative files of the same name), and returns
+        a dict of its settings
+
+        Arguments:
+            package {str} -- package from which to import the module
+            module_name {str} -- name of the module within package
+
+        Keyword Arguments:
+            executor {FileExecutor} -- executor to load with in isolated mode (a new one is created if not given)
+            trace {LoadTrace} -- trace to record timings on
+        """
+        if self.formats:
+            settings = self.load_declarative(package, module_name, trace)
+            if not os.path.isfile(os.path.join(self.root, package, f"{module_name}{self.ext}")):
+                return settings
+            settings.update(self.load_python_module(package, module_name, executor, trace))
+            return settings
+        return self.load_python_module(package, module_name, executor, trace)
+
+    def load_declarative(self, package, module_name, trace=null_trace):
+        """Parses the declarative settings files (see formats) named module_name in package, and returns a dict of
+        their settings
+
+        Arguments:
+            package {str} -- package containing the files
+            module_name {str} -- name of the files, without extension
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record timings on
+        """
+        attribute_filter = self.attribute_filter
+        settings = {}
+        for ext, parse in self.formats.items():
+            path = os.path.join(self.root, package, f"{module_name}{ext}")
+            if os.path.isfile(path):
+                with trace.phase("parse", module_name):
+                    settings.update(
+                        (key, val) for key, val in parse(path).items() if attribute_filter(key)
+                    )
+        return settings
+
+    def load_python_module(self, package, module_name, executor=None, trace=null_trace):
+        """Imports (or in isolated mode, executes) the Python settings module module_name from package, and returns
+        a dict of its settings
 
-    def find_modules(self, package):
+        Arguments:
+            package {str} -- package from which to import the module
+            module_name {str} -- name of the module within package
+
+        Keyword Arguments:
+            executor {FileExecutor} -- executor to load with in isolated mode (a new one is created if not given)
+            trace {LoadTrace} -- trace to record timings on
+        """
+        if self.isolated:
+            executor = executor or self.get_executor(package)
+            with trace.phase("import", module_name):
+                module = executor.execute(module_name)
+        else:
+            full_name = f"{package}.{module_name}"
+            with UsePath(self.root):
+                imported = full_name in sys.modules
+                with trace.phase("import", module_name):
+                    module = import_module(full_name)
+                # Reload previously imported modules, to ensure same-named packages don't interfere
+                if imported:
+                    with trace.phase("reload", module_name):
+                        self.refresh_module(module)
+
+        with trace.phase("extract", module_name):
+            return dict(self.get_module_attrs(module))
+
+    def find_modules(self, package, trace=null_trace):
         """Searches for modules in package that match the glob pattern 
         {prefix}*{ext}
         
         Arguments:
             package {str} -- package from which to import modules
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record timings on
+        """
+        executor = self.get_executor(package) if self.isolated else None
+        with trace.phase("glob"):
+            module_names = self.get_module_names(package)
+        for module_name in module_names:
+            yield module_name, self.load_module(package, module_name, executor, trace)
+
+    def find_mode_modules(self, package, trace=null_trace):
+        """Imports only the modules needed for the current mode. The modules in ``get_load_order(None)`` (by
+        default, the general and local settings) are imported first to resolve the mode, then the remaining modules in
+        ``get_load_order(mode)`` are imported. Settings files for other modes are never executed.
+
+        Arguments:
+            package {str} -- package from which to import modules
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record timings on
         """
-        pattern = os.path.join(self.root, package, f"{self.prefix}*{self.ext}")
-        with UsePath(self.root):
-            for module_path in glob(pattern):
-                module_name = module_path.split(os.path.sep)[-1].replace(self.ext, "")
-                module = import_module(f"{package}.{module_name}")
-                # Reload module, to ensure same-named packages don't interfere
-                self.refresh_module(module)
-                name = module.__name__.split(".")[-1]
-                module_dict = dict(self.get_module_attrs(module))
-                yield name, module_dict
+        with trace.phase("glob"):
+            available = set(self.get_module_names(package))
+        executor = self.get_executor(package) if self.isolated else None
+        settings_by_module = {}
+
+        def load(load_order):
+            for module_name in load_order:
+                if module_name in available and module_name not in settings_by_module:
+                    settings_by_module[module_name] = self.load_module(
+                        package, module_name, executor, trace
+                    )
+
+        load(self.get_load_order(None))
+        load(self.get_load_order(self.get_mode(settings_by_module)))
+        return settings_by_module
 
     def refresh_module(self, module):
         """ Imports current settings from a module name... by force """
-        keys = list(module.__dict__.keys())
-        for key in keys:
-            if not re.match(self.builtin_pattern, key):
-                delattr(module, key)
+        is_builtin = self.is_builtin
+        for key in [key for key in module.__dict__ if not is_builtin(key)]:
+            delattr(module, key)
         reload(module)
         return module
 
     def get_module_attrs(self, module):
         """Given a module object, extract the names of all attributes that match attribute_pattern,
-        excluding those that match bulitin_pattern.
+        excluding those that match bulitin_pattern (or that pass attribute_filter, if given). Iterates the module's
+        namespace directly, so don't modify the module while consuming the result.
         
         Arguments:
             module {module} -- The module to extract attributes of
         """
-        for key, val in module.__dict__.copy().items():
-            # skip over attributes that look like builtins
-            if re.match(self.builtin_pattern, key):
-                continue
-            # skip any attributes that don't look like our regex
-            if not re.match(self.attribute_pattern, key):
-                continue
-            yield key, val
+        attribute_filter = self.attribute_filter
+        return ((key, val) for key, val in module.__dict__.items() if attribute_filter(key))
 
     def get_mode(self, settings_by_module):
         """Given a dictionary of settings, determine what mode to extract settings from
@@ -116,6 +417,11 @@ class Loader:
                 return settings_by_module[name].get(self.mode_setting_name)
             return None
 
+        if self.environ_prefix:
+            environ_mode = os.environ.get(f"{self.environ_prefix}{self.mode_setting_name}")
+            if environ_mode:
+                return environ_mode
+
         local_settings_module = f"{self.prefix}{self.sep}{self.local_name}"
         local_mode = get_mode_setting(local_settings_module)
 
@@ -149,8 +455,9 @@ class Loader:
 
     def get_load_order(self, mode):
         """ Defines the order in which settings are loaded. If needed, you can override this method in a subclass to
-        define custom logic for your use case 
-        
+        define custom logic for your use case. With an environ_prefix, the environment variables are the final
+        layer, named by ``environ_layer``.
+
         Arguments:
             mode {str} -- name of mode to load
         """
@@ -161,30 +468,203 @@ class Loader:
         if mode:
             load_order.append(self.sep.join([self.prefix, mode]))
             load_order.append(self.sep.join([self.prefix, mode, self.local_name]))
+        if self.environ_prefix:
+            load_order.append(self.environ_layer)
 
         return load_order
 
-    def load_settings(self, package):
+    def load_settings(self, package, trace=None):
         """Load the settings files found in package, prioritizing local settings, then mode specific settings, then
-        general settings (i.e. env_dev_local beats env_dev beats env_local beats env)
+        general settings (i.e. env_dev_local beats env_dev beats env_local beats env). If a snapshot cache is
+        configured, a fresh snapshot is returned instead. If a schema is configured, it's applied to the result.
+        Secret references (see :meth:`Sensitive.ref`) in the result are batched, so reading any of them fetches them
+        all at once.
         
         Arguments:
             package {str} -- package name
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record timings of each phase of the load on
         """
+        trace = trace or null_trace
+        settings = self.load_raw_settings(package, trace)
+        batch_secret_refs(settings.data)
+        return self.apply_schema(settings, trace)
 
-        settings_by_module = {}
-        for module_name, module in self.find_modules(package):
-            settings_by_module[module_name] = module
+    async def aload_settings(self, package, concurrency=10, timeout=None, trace=None):
+        """Loads settings like load_settings, without blocking the event loop: settings files are found and executed
+        in the loop's default executor, then every :class:`aio.Deferred` (or other awaitable) setting is resolved
+        concurrently, and the schema (if any) is applied to the resolved settings.
+
+        Arguments:
+            package {str} -- package name
+
+        Keyword Arguments:
+            concurrency {int} -- maximum number of asynchronous settings resolved at once (default: {10})
+            timeout {float} -- seconds to wait for each asynchronous setting that doesn't set its own timeout
+            trace {LoadTrace} -- trace to record timings of each phase of the load on
+        """
+        # imported here, so programs that only load synchronously never import asyncio
+        import asyncio
+
+        from enpyronments.aio import resolve_settings
+
+        trace = trace or null_trace
+        # get_running_loop is new in Python 3.7; in a coroutine, get_event_loop returns the running loop on 3.6
+        get_loop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)
+        loop = get_loop()
+        settings = await loop.run_in_executor(None, self.load_raw_settings, package, trace)
+        with trace.phase("resolve"):
+            await resolve_settings(settings, concurrency, timeout)
+        batch_secret_refs(settings.data)
+        return self.apply_schema(settings, trace)
+
+    def load_raw_settings(self, package, trace=null_trace):
+        """ Loads the settings for package (from the snapshot cache, if one is configured), without applying the
+        schema """
+        if self.cache is not None:
+            return self.cache.load_settings(self, package, trace)
+        return self.build_settings(package, trace)
+
+    def apply_schema(self, settings, trace=null_trace):
+        """ Applies the schema, if one is configured, to settings, and returns them """
+        if self.schema is not None:
+            with trace.phase("schema"):
+                self.schema.apply(settings)
+        return settings
+
+    def trace_settings(self, package, callback=None):
+        """Loads the settings for package like load_settings, and returns a :class:`LoadTrace` report of the load.
+        The loaded settings are available as the report's ``settings``.
+
+        Arguments:
+            package {str} -- package name
 
-        mode = self.get_mode(settings_by_module)
-        mode_settings = self.get_mode_settings(mode, settings_by_module)
+        Keyword Arguments:
+            callback {callable} -- called with each trace event as it's recorded
+        """
+        trace = LoadTrace(callback)
+        trace.settings = self.load_settings(package, trace)
+        return trace
+
+    def build_settings(self, package, trace=null_trace):
+        """Executes the settings files found in package and merges them, bypassing any snapshot cache
+
+        Arguments:
+            package {str} -- package name
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record timings on
+        """
 
-        load_order = self.get_load_order(mode)
+        if self.lazy:
+            settings_by_module = self.find_mode_modules(package, trace)
+        else:
+            settings_by_module = dict(self.find_modules(package, trace))
 
-        settings = Settings()
+        return self.merge_settings(settings_by_module, trace)
+
+    def merge_settings(self, settings_by_module, trace=null_trace):
+        """Resolves the mode from already loaded settings, and merges the settings for that mode in load order
+
+        Arguments:
+            settings_by_module {dict} -- settings dictionary, keyed by module name
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record timings on
+        """
+        with trace.phase("mode") as phase:
+            mode = self.get_mode(settings_by_module)
+            mode_settings = self.get_mode_settings(mode, settings_by_module)
+            load_order = self.get_load_order(mode)
+            phase.set(mode=mode, load_order=load_order)
+
+        layers = []
         for key in load_order:
-            new_settings = mode_settings.get(key)
-            if new_settings:
-                settings.update(new_settings)
+            if key == self.environ_layer:
+                with trace.phase("environ"):
+                    layer = self.get_environ_layer(layers)
+            else:
+                layer = mode_settings.get(key)
+            if layer:
+                layers.append((key, layer))
+        if self.pool is not None:
+            layers = self.pool.share_layers(layers)
+        return self.settings_class.from_layers(layers, trace)
+
+    def get_environ_variables(self):
+        """ Returns a dict of each environment variable starting with environ_prefix, by its name without the prefix
+        (empty if there's no environ_prefix) """
+        if not self.environ_prefix:
+            return {}
+        return get_prefixed_environ(self.environ_prefix)
+
+    def get_environ_layer(self, layers):
+        """Returns the layer of settings overridden by environment variables, scanning the environment once for the
+        variables starting with environ_prefix. Each variable overrides the setting named by the rest of its name,
+        and is converted to the type of the value in layers it overrides: booleans, numbers, lists and dicts are
+        parsed, and Sensitive settings stay Sensitive. Names are split on environ_sep to override values in nested
+        namespaces (dict settings), which are copied rather than modified. Names that aren't settings names (see
+        attribute_filter) are ignored. The layer is rebuilt from the current environment by every load.
+
+        Raises a :class:`SchemaError` listing every variable that can't be converted.
 
-        return settings
+        Arguments:
+            layers {list} -- (name, dict of settings) pairs loaded from the settings files, lowest priority first
+        """
+        return build_environ_layer(self.get_environ_variables(), layers, self.environ_sep, self.attribute_filter)
+
+    def load_many(self, packages, max_workers=None, processes=False):
+        """Loads several independent settings packages concurrently, and returns a :class:`LoadResults` dict of
+        package name to Settings. An error loading one package doesn't stop the others; it's stored in the result's
+        ``errors`` dict instead.
+
+        Threads load in isolated mode (see :class:`FileExecutor`), so packages can't interfere with each other
+        through sys.path or sys.modules. Executing settings files is mostly CPU bound, so use processes=True to
+        load large batches in parallel (the loader and the settings have to be picklable).
+
+        Arguments:
+            packages {iterable} -- package names
+
+        Keyword Arguments:
+            max_workers {int} -- number of threads or processes to load with
+            processes {bool} -- load in a process pool instead of a thread pool
+        """
+        # imported here, as concurrent.futures.process imports multiprocessing, which most loads never need
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        loader = self
+        if not self.isolated:
+            loader = copy.copy(self)
+            loader.isolated = True
+
+        pool_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool_class(max_workers) as pool:
+            futures = {package: pool.submit(loader.load_settings, package) for package in packages}
+
+        results = LoadResults()
+        for package, future in futures.items():
+            try:
+                results[package] = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                results.errors[package] = e
+        return results
+
+    def watch(self, package, settings=None, interval=1.0, backend="poll"):
+        """Returns a :class:`Watcher` that keeps a live Settings object up to date with edits to the settings files
+        in package. Call ``start()`` on it (or use it as a context manager) to watch in a background thread, or
+        ``check()`` to poll manually.
+
+        Arguments:
+            package {str} -- package name
+
+        Keyword Arguments:
+            settings {Settings} -- live settings object to update (a new one is created if not given)
+            interval {float} -- seconds between checks for changes
+            backend {str} -- "poll" to stat the settings files every interval, or "inotify" to wait for filesystem
+            events (requires the inotify_simple package)
+        """
+        # imported here, as most programs load their settings without watching them
+        from enpyronments.watcher import Watcher
+
+        return Watcher(self, package, settings=settings, interval=interval, backend=backend)
@@ -0,0 +1,125 @@
+"""
+Structural sharing of settings layers across many Settings objects
+"""
+
+import sys
+import threading
+
+from enpyronments.utils import Sensitive
+
+scalar_types = frozenset((type(None), bool, int, str, bytes))
+
+
+def get_value_key(val):
+    """Returns a hashable key identifying val by type and value (so 1, 1.0 and True get different keys), or None if
+    val can't be compared by value: only None, bools, numbers, strings, bytes, and tuples, lists, sets, frozensets,
+    dicts and Sensitive wrappers of them can be.
+
+    Arguments:
+        val -- setting value
+    """
+    val_type = type(val)
+    if val_type in scalar_types:
+        return val_type, val
+    # 0.0 and -0.0 are equal, but aren't the same value
+    if val_type is float:
+        return float, val.hex()
+    if val_type is complex:
+        return complex, val.real.hex(), val.imag.hex()
+    if val_type is tuple or val_type is list:
+        keys = tuple(get_value_key(item) for item in val)
+        if None in keys:
+            return None
+        return val_type, keys
+    if val_type is frozenset or val_type is set:
+        keys = frozenset(get_value_key(item) for item in val)
+        if None in keys:
+            return None
+        return val_type, keys
+    if val_type is dict:
+        keys = tuple((get_value_key(key), get_value_key(item)) for key, item in val.items())
+        if any(None in pair for pair in keys):
+            return None
+        return dict, keys
+    if val_type is Sensitive:
+        key = get_value_key(val.obj)
+        if key is None:
+            return None
+        return Sensitive, val.stars, key
+    return None
+
+
+class LayerPool:
+    """Shares the layers of many Settings objects, e.g. one per tenant, loaded from settings files that are mostly
+    the same (the same env.py). Pass one pool to every Loader (``Loader(root, pool=pool)``), and each layer they
+    merge is shared before it's used:
+
+    - setting names are interned, so every layer and merged dict refers to the same key objects
+    - equal values (strings, numbers, lists, dicts...) are replaced by one shared object
+    - layers with the same contents are replaced by one shared layer
+
+    With LayeredSettings (the loader's default), a tenant then holds its own layers and the table of its merged
+    settings, while the common layers, keys and values are stored once. Layers are never modified in place by
+    LayeredSettings, so sharing them is safe. Shared values are read-only too: modifying a list setting in place
+    would modify it for every tenant, so assign a new list instead. Values that can't be compared by value (objects,
+    Lazy settings...) aren't shared, and neither are the layers holding them.
+
+    The pool keeps every value and layer it has seen; call ``clear()`` to forget them.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.layers = {}
+        self.lock = threading.Lock()
+
+    def share_value(self, val):
+        """ Returns the pool's object equal to val (storing val if there's none yet), or val if it can't be
+        compared by value """
+        key = get_value_key(val)
+        if key is None:
+            return val
+        return self.values.setdefault(key, val)
+
+    def share_layer(self, layer):
+        """Returns a layer with the same settings as layer (a dict), with interned names and shared values. If the
+        pool already holds a layer with the same contents, it's returned instead of a new one.
+
+        Arguments:
+            layer {dict} -- settings of one layer
+        """
+        with self.lock:
+            shared = {}
+            shareable = True
+            values = self.values
+            for key, val in layer.items():
+                if type(key) is str:
+                    key = sys.intern(key)
+                value_key = get_value_key(val)
+                if value_key is None:
+                    shareable = False
+                else:
+                    val = values.setdefault(value_key, val)
+                shared[key] = val
+            if not shareable:
+                return shared
+            # shared values are unique, so a layer's contents are identified by its keys and its values' ids
+            fingerprint = tuple((key, id(val)) for key, val in shared.items())
+            return self.layers.setdefault(fingerprint, shared)
+
+    def share_layers(self, layers):
+        """ Returns a list of (name, shared layer) for each (name, layer) in layers, see share_layer """
+        return [(name, self.share_layer(layer)) for name, layer in layers]
+
+    def clear(self):
+        """ Forgets every value and layer, so they're only kept alive by the settings using them """
+        with self.lock:
+            self.values.clear()
+            self.layers.clear()
+
+    def __len__(self):
+        """ Number of distinct layers in the pool """
+        return len(self.layers)
+
+    def __reduce__(self):
+        """ Pools are per process, so a pickled pool (e.g. sent with a Loader to another process) starts empty """
+        return self.__class__, ()
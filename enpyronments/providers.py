@@ -0,0 +1,311 @@
+"""
+Secret providers, for settings that reference secrets stored elsewhere
+"""
+
+import abc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from enpyronments.utils import Lazy, Sensitive
+
+_missing = object()
+
+
+class SecretNotFound(LookupError):
+    """ Raised when a provider has no secret for a reference """
+
+
+class SecretProvider(abc.ABC):
+    """ Base class for secret providers. Providers fetch the secrets for a scheme (``vault`` in
+    ``vault://db/primary``), by the path that follows it (``db/primary``). Subclasses implement fetch_many, so every
+    reference found in a load is fetched in one call. """
+
+    @abc.abstractmethod
+    def fetch_many(self, paths):
+        """Returns a dict of each path in paths to its secret. Paths without a secret are left out.
+
+        Arguments:
+            paths {list} -- paths of the secrets to fetch
+        """
+
+    def fetch(self, path):
+        """ Returns the secret at path, or raises SecretNotFound """
+        secrets = self.fetch_many([path])
+        if path not in secrets:
+            raise SecretNotFound(path)
+        return secrets[path]
+
+
+class FileSecretProvider(SecretProvider):
+    """ Reads secrets from files in a directory, one secret per file, like Docker and Kubernetes secrets mounted at
+    /run/secrets. A trailing newline is stripped. """
+
+    def __init__(self, directory):
+        """
+        Arguments:
+            directory {str} -- directory holding the secret files
+        """
+        self.directory = os.path.abspath(directory)
+
+    def get_path(self, path):
+        """ Returns the file path of the secret at path, which must be inside the directory """
+        full_path = os.path.normpath(os.path.join(self.directory, path.lstrip("/")))
+        if os.path.commonpath([self.directory, full_path]) != self.directory:
+            raise ValueError(f"Secret path {path!r} is outside of {self.directory}")
+        return full_path
+
+    def fetch_many(self, paths):
+        secrets = {}
+        for path in paths:
+            try:
+                with open(self.get_path(path), encoding="utf-8") as f:
+                    secret = f.read()
+            except FileNotFoundError:
+                continue
+            secrets[path] = secret[:-1] if secret.endswith("\n") else secret
+        return secrets
+
+
+class SecretCache():
+    """ Thread-safe cache of fetched secrets, by reference. Secrets expire ``ttl`` seconds after they're fetched,
+    and the least recently used are evicted once there are more than ``max_size``. """
+
+    def __init__(self, ttl=300.0, max_size=1024, clock=time.monotonic):
+        """
+        Keyword Arguments:
+            ttl {float} -- seconds to keep each secret, or None to keep them until evicted (default: {300.0})
+            max_size {int} -- most secrets to keep (default: {1024})
+            clock {callable} -- returns the current time in seconds (default: {time.monotonic})
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, uri, default=None):
+        """ Returns the cached secret for uri, or default if it isn't cached or has expired """
+        with self.lock:
+            entry = self.entries.get(uri)
+            if entry is None:
+                return default
+            if entry[1] is not None and entry[1] <= self.clock():
+                del self.entries[uri]
+                return default
+            self.entries.move_to_end(uri)
+            return entry[0]
+
+    def set(self, uri, secret):
+        """ Caches secret for uri """
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self.lock:
+            self.entries[uri] = (secret, expires)
+            self.entries.move_to_end(uri)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# named registries, so pickled references (e.g. in a snapshot cache) find their registry again when unpickled
+registries = {}
+
+
+def get_registry(name):
+    """ Returns the registry created with name, or raises SecretNotFound if there's none """
+    try:
+        return registries[name]
+    except KeyError:
+        raise SecretNotFound(f"No secret registry is named {name!r}")
+
+
+class SecretRegistry():
+    """ Maps reference schemes to the providers that fetch them, and caches what they fetch.
+
+    References to secrets in a registry are pickled by the registry's name, so give a registry a name (and create
+    it before loading pickled settings) to keep its references in a snapshot cache, or send them to other processes.
+    References to unnamed registries can't be pickled. """
+
+    def __init__(self, cache=None, name=None):
+        """
+        Keyword Arguments:
+            cache {SecretCache} -- cache of fetched secrets (default: {a SecretCache with default settings})
+            name {str} -- unique name to pickle references to the registry's secrets by. A registry created with
+            the name of an existing one replaces it.
+        """
+        self.providers = {}
+        self.cache = cache or SecretCache()
+        self.name = name
+        if name is not None:
+            registries[name] = self
+
+    def register(self, scheme, provider):
+        """Registers provider to fetch the secrets of references starting with ``{scheme}://``
+
+        Arguments:
+            scheme {str} -- reference scheme, e.g. "vault"
+            provider {SecretProvider} -- provider to fetch the secrets with
+        """
+        self.providers[scheme] = provider
+
+    def unregister(self, scheme):
+        """ Removes the provider for scheme """
+        self.providers.pop(scheme, None)
+
+    def get_provider(self, scheme):
+        try:
+            return self.providers[scheme]
+        except KeyError:
+            raise SecretNotFound(f"No secret provider is registered for {scheme}:// references")
+
+    def fetch_many(self, uris):
+        """Returns a dict of each reference in uris to its secret. Cached secrets are used, and the rest are fetched
+        with one call to each scheme's provider. References without a secret are left out.
+
+        Arguments:
+            uris {iterable} -- references, e.g. "vault://db/primary"
+        """
+        secrets = {}
+        missing = {}
+        for uri in uris:
+            secret = self.cache.get(uri, _missing)
+            if secret is _missing:
+                scheme, _, path = uri.partition("://")
+                missing.setdefault(scheme, {})[path] = uri
+            else:
+                secrets[uri] = secret
+        for scheme, uris_by_path in missing.items():
+            fetched = self.get_provider(scheme).fetch_many(list(uris_by_path))
+            for path, uri in uris_by_path.items():
+                if path in fetched:
+                    self.cache.set(uri, fetched[path])
+                    secrets[uri] = fetched[path]
+        return secrets
+
+
+# no provider is registered by default: a file provider rooted at / would let any settings file read any file
+default_registry = SecretRegistry(name="default")
+
+
+def register_provider(scheme, provider):
+    """ Registers provider for ``{scheme}://`` references in the default registry, see SecretRegistry.register """
+    default_registry.register(scheme, provider)
+
+
+class SecretBatch():
+    """ The secret references found in one load. The first one read fetches all of them (that aren't cached) at
+    once. """
+
+    def __init__(self, refs):
+        self.refs = refs
+        self.lock = threading.Lock()
+
+    def fetch(self):
+        """ Fetches every reference in the batch, grouped by registry, and returns a dict of reference to secret """
+        secrets = {}
+        with self.lock:
+            registries = {}
+            for ref in self.refs:
+                registries.setdefault(id(ref.registry), (ref.registry, set()))[1].add(ref.uri)
+            for registry, uris in registries.values():
+                secrets.update(registry.fetch_many(uris))
+        return secrets
+
+
+class SecretRef(Lazy):
+    """ A setting holding a reference to a secret (e.g. ``vault://db/primary``) instead of the secret itself. The
+    secret is fetched through the provider registered for the reference's scheme when the setting is first read,
+    and cached for the registry's TTL. Usually created by :meth:`Sensitive.ref`. """
+
+    def __init__(self, uri, registry=None):
+        """
+        Arguments:
+            uri {str} -- reference to the secret, "{scheme}://{path}"
+
+        Keyword Arguments:
+            registry {SecretRegistry} -- registry to fetch it through, or its name (default: {default_registry})
+        """
+        if "://" not in uri:
+            raise ValueError(f'Secret references look like "scheme://path", not {uri!r}')
+        super().__init__(self.fetch)
+        self.uri = uri
+        if isinstance(registry, str):
+            registry = get_registry(registry)
+        self.registry = registry or default_registry
+        self.batch = None
+
+    def fetch(self):
+        """ Fetches the secret, along with the rest of its batch if it has one """
+        if self.batch is not None:
+            secrets = self.batch.fetch()
+        else:
+            secrets = self.registry.fetch_many([self.uri])
+        if self.uri not in secrets:
+            raise SecretNotFound(f"No secret was found for {self.uri}")
+        return secrets[self.uri]
+
+    def resolve(self):
+        """ Returns the secret, from the cache if it hasn't expired, otherwise fetching it """
+        secret = self.registry.cache.get(self.uri, _missing)
+        if secret is _missing:
+            secret = self.fetch()
+        return secret
+
+    @property
+    def evaluated(self):
+        """ Whether the secret is cached """
+        return self.registry.cache.get(self.uri, _missing) is not _missing
+
+    def peek(self, default=None):
+        """ Returns the cached secret, or default (without fetching it) """
+        return self.registry.cache.get(self.uri, default)
+
+    def fulfill(self, value):
+        self.registry.cache.set(self.uri, value)
+        return value
+
+    def get_registry_name(self):
+        """ Returns the name of the reference's registry, to pickle it by. Raises TypeError, like other objects that
+        can't be pickled, if the registry is unnamed. """
+        name = self.registry.name
+        if name is None or registries.get(name) is not self.registry:
+            raise TypeError(f"{self.uri} can't be pickled, its secret registry isn't named")
+        return name
+
+    def __reduce__(self):
+        """ Only the reference and the name of its registry are pickled, never the secret """
+        return SecretRef, (self.uri, self.get_registry_name())
+
+    def __eq__(self, other):
+        return isinstance(other, SecretRef) and other.uri == self.uri and other.registry is self.registry
+
+    def __hash__(self):
+        return hash(self.uri)
+
+    def __repr__(self):
+        return f"SecretRef ({self.uri!r})"
+
+
+def batch_secret_refs(data):
+    """Groups the secret references among the values of data (a dict of settings) into one batch, so reading any of
+    them fetches them all in one call per provider. Returns the batch, or None if there are no references.
+
+    Arguments:
+        data {dict} -- settings, possibly holding Sensitive values
+    """
+    refs = []
+    for val in data.values():
+        if isinstance(val, Sensitive):
+            val = val.obj
+        if isinstance(val, SecretRef):
+            refs.append(val)
+    if not refs:
+        return None
+    batch = SecretBatch(refs)
+    for ref in refs:
+        ref.batch = batch
+    return batch
@@ -0,0 +1,94 @@
+"""
+Streaming redacted serialization of settings
+"""
+
+import json
+import re
+from json.encoder import encode_basestring_ascii as encode_string
+
+from enpyronments.environ import to_environ_value
+from enpyronments.settings import mask_value
+
+# dotenv values made of these characters are written unquoted
+safe_dotenv_value = re.compile(r"[\w.,:/@%+=*-]*").fullmatch
+
+# settings are written in chunks of this many lines, to keep writes few without holding the whole document
+chunk_size = 256
+
+
+def get_masked_items(settings):
+    """Returns an iterable of (name, masked value) pairs of settings, without building a masked dict. Settings'
+    cached masked view is used when there is one.
+
+    Arguments:
+        settings {Mapping} -- Settings (or FrozenSettings, SharedSettings or a plain dict of settings)
+    """
+    masked_view = getattr(settings, "masked_view", None)
+    if masked_view is not None:
+        return masked_view().items()
+    data = getattr(settings, "data", settings)
+    return ((key, mask_value(val)) for key, val in data.items())
+
+
+def dump_json(settings, fp, indent=None):
+    """Writes settings to fp as a JSON object, with Sensitive values masked. Settings are encoded and written a
+    chunk at a time, so no masked copy of the settings, or of the whole document, is built. Values JSON can't encode
+    are written as their str().
+
+    Arguments:
+        settings {Mapping} -- settings to write
+        fp {file} -- text file-like object to write to
+
+    Keyword Arguments:
+        indent {int} -- indent each setting on its own line by this many spaces (default: {None, all on one line})
+    """
+    encode = json.JSONEncoder(default=str, indent=indent).encode
+    write = fp.write
+    if indent is None:
+        separator, opening, closing = ", ", "{", "}"
+    else:
+        # nested values are indented one level deeper than the settings themselves
+        separator = ",\n" + " " * indent
+        opening, closing = "{\n" + " " * indent, "\n}"
+        encode_value = encode
+
+        def encode(val):
+            return encode_value(val).replace("\n", "\n" + " " * indent)
+
+    chunk = []
+    count = 0
+    for key, val in get_masked_items(settings):
+        chunk.append(
+            f"{separator if count else opening}{encode_string(str(key))}: "
+            f"{encode_string(val) if type(val) is str else encode(val)}"
+        )
+        count += 1
+        if len(chunk) == chunk_size:
+            write("".join(chunk))
+            chunk.clear()
+    chunk.append(closing if count else "{}")
+    write("".join(chunk))
+
+
+def dump_dotenv(settings, fp):
+    """Writes settings to fp as ``KEY=value`` lines, with Sensitive values masked. Values are converted to strings
+    the way they're exported to the environment (see :func:`environ.to_environ_value`), and quoted when needed so
+    :func:`formats.parse_dotenv` reads them back. Settings set to None are left out.
+
+    Arguments:
+        settings {Mapping} -- settings to write
+        fp {file} -- text file-like object to write to
+    """
+    write = fp.write
+    chunk = []
+    for key, val in get_masked_items(settings):
+        val = to_environ_value(val)
+        if val is None:
+            continue
+        if not safe_dotenv_value(val):
+            val = encode_string(val)
+        chunk.append(f"{key}={val}\n")
+        if len(chunk) == chunk_size:
+            write("".join(chunk))
+            chunk.clear()
+    write("".join(chunk))
@@ -0,0 +1,336 @@
+"""
+Typed settings schemas
+"""
+
+import json
+
+from enpyronments.providers import SecretRef
+from enpyronments.utils import Lazy, Sensitive
+
+true_strings = frozenset(("1", "true", "t", "yes", "y", "on"))
+false_strings = frozenset(("0", "false", "f", "no", "n", "off", ""))
+
+
+class Missing():
+    """ Default of fields without a default. Pickles by reference, so unpickled fields still recognize it """
+
+    def __repr__(self):
+        return "<missing>"
+
+    def __reduce__(self):
+        return "_missing"
+
+
+_missing = Missing()
+
+
+class SchemaError(ValueError):
+    """ Raised when settings don't match a schema. ``errors`` is a dict of each invalid setting's name to what's
+    wrong with it, covering every invalid setting, not just the first one found. """
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = "\n".join(f"    {key}: {message}" for key, message in errors.items())
+        super().__init__(f"{len(errors)} invalid setting(s):\n{lines}")
+
+
+def to_bool(val):
+    """ Coerces val to a bool, parsing strings such as "true", "False", "yes", "off" and "0" """
+    if isinstance(val, bool):
+        return val
+    if isinstance(val, str):
+        lowered = val.strip().lower()
+        if lowered in true_strings:
+            return True
+        if lowered in false_strings:
+            return False
+    elif isinstance(val, int) and val in (0, 1):
+        return bool(val)
+    raise ValueError(f"{val!r} isn't a boolean")
+
+
+def to_int(val):
+    """ Coerces val to an int, parsing strings and accepting floats without a fractional part """
+    if isinstance(val, int) and not isinstance(val, bool):
+        return val
+    if isinstance(val, float):
+        if not val.is_integer():
+            raise ValueError(f"{val!r} isn't a whole number")
+        return int(val)
+    if isinstance(val, (str, bytes)):
+        return int(val)
+    raise ValueError(f"{val!r} isn't an integer")
+
+
+def to_float(val):
+    """ Coerces val to a float, parsing strings """
+    if isinstance(val, bool):
+        raise ValueError(f"{val!r} isn't a number")
+    return float(val)
+
+
+def to_str(val):
+    """ Coerces val to a str, decoding bytes """
+    if isinstance(val, str):
+        return val
+    if isinstance(val, bytes):
+        return val.decode()
+    return str(val)
+
+
+def to_list(val):
+    """ Coerces val to a list, parsing strings as a JSON array, or as comma separated values """
+    if isinstance(val, list):
+        return val
+    if isinstance(val, str):
+        if val.lstrip().startswith("["):
+            val = json.loads(val)
+        else:
+            return [item.strip() for item in val.split(",") if item.strip()]
+    if isinstance(val, (list, tuple, set, frozenset)):
+        return list(val)
+    raise ValueError(f"{val!r} isn't a list")
+
+
+def to_dict(val):
+    """ Coerces val to a dict, parsing strings as a JSON object """
+    if isinstance(val, str):
+        val = json.loads(val)
+    if isinstance(val, dict):
+        return val
+    raise ValueError(f"{val!r} isn't a dict")
+
+
+coercers = {
+    bool: to_bool,
+    int: to_int,
+    float: to_float,
+    str: to_str,
+    list: to_list,
+    dict: to_dict,
+}
+
+
+class Field():
+    """ Declares the type and constraints of a single setting in a :class:`Schema` """
+
+    def __init__(
+        self,
+        type=str,
+        default=_missing,
+        required=None,
+        choices=None,
+        min=None,
+        max=None,
+        validator=None,
+    ):
+        """
+        Keyword Arguments:
+            type {type} -- Type to coerce the setting to. bool, int, float, str, list and dict parse strings (so
+                "false" becomes False), any other type is called with the value (default: {str})
+            default -- Value to use when the setting isn't set. It isn't coerced or validated.
+            required {bool} -- Whether the setting must be set (default: {True unless a default is given})
+            choices {iterable} -- Values the coerced setting must be one of
+            min -- Smallest value the coerced setting may have
+            max -- Largest value the coerced setting may have
+            validator {callable} -- Called with the coerced setting, raises ValueError (or returns False) if it's
+                invalid
+        """
+        self.type = type
+        self.default = default
+        self.required = default is _missing if required is None else required
+        self.choices = None if choices is None else tuple(choices)
+        self.min = min
+        self.max = max
+        self.validator = validator
+
+    def compile(self):
+        """ Returns a function that coerces and validates a raw value in one call, raising ValueError if it's
+        invalid. Only the checks this field uses are included. """
+        coerce = coercers.get(self.type)
+        if coerce is None:
+            field_type = self.type
+
+            def coerce(val):
+                return val if isinstance(val, field_type) else field_type(val)
+
+        checks = []
+        if self.choices is not None:
+            choices = self.choices
+
+            def check_choices(val):
+                if val not in choices:
+                    raise ValueError(f"{val!r} isn't one of {list(choices)}")
+
+            checks.append(check_choices)
+        if self.min is not None:
+            low = self.min
+
+            def check_min(val):
+                if val < low:
+                    raise ValueError(f"{val!r} is less than {low!r}")
+
+            checks.append(check_min)
+        if self.max is not None:
+            high = self.max
+
+            def check_max(val):
+                if val > high:
+                    raise ValueError(f"{val!r} is greater than {high!r}")
+
+            checks.append(check_max)
+        if self.validator is not None:
+            validator = self.validator
+
+            def check_validator(val):
+                if validator(val) is False:
+                    raise ValueError(f"{val!r} failed validation by {getattr(validator, '__name__', validator)}")
+
+            checks.append(check_validator)
+
+        if not checks:
+            return coerce
+
+        def coerce_and_check(val):
+            val = coerce(val)
+            for check in checks:
+                check(val)
+            return val
+
+        return coerce_and_check
+
+
+class CoercedSecretRef(SecretRef):
+    """ A secret reference coerced by a schema field. Unlike other Lazy settings, its value isn't kept: every read
+    goes through the registry's cache, like the reference it replaces, so a rotated secret is read once the cached
+    one expires. The coerced value is reused for as long as the registry returns the same secret. """
+
+    def __init__(self, uri, registry, key, field):
+        """
+        Arguments:
+            uri {str} -- reference to the secret
+            registry {SecretRegistry} -- registry to fetch it through, or its name, or None for the default registry
+            key {str} -- name of the setting, for errors
+            field {Field} -- field to coerce the secret with
+        """
+        super().__init__(uri, registry)
+        self.key = key
+        self.field = field
+        self.convert = field.compile()
+        self.coerced = (_missing, None)
+
+    def resolve(self):
+        """ Returns the coerced secret, raising SchemaError if it's invalid """
+        secret = super().resolve()
+        fetched, coerced = self.coerced
+        if fetched is not secret:
+            try:
+                coerced = self.convert(secret)
+            except (TypeError, ValueError) as e:
+                raise SchemaError({self.key: str(e)}) from e
+            self.coerced = (secret, coerced)
+        return coerced
+
+    def peek(self, default=None):
+        """ Returns the coerced secret if it's cached, or default (without fetching it) """
+        if not self.evaluated:
+            return default
+        return self.resolve()
+
+    def __reduce__(self):
+        """ Only the reference and the field are pickled, never the secret """
+        return CoercedSecretRef, (self.uri, self.get_registry_name(), self.key, self.field)
+
+    def __repr__(self):
+        return f"CoercedSecretRef ({self.uri!r})"
+
+
+def wrap_lazy(key, convert, lazy, field=None):
+    """ Returns a Lazy that coerces lazy's value when it's computed, raising SchemaError if it's invalid. Secret
+    references are replaced by a :class:`CoercedSecretRef` (when field is given), so they're still cached by their
+    registry rather than kept forever. """
+
+    if field is not None and isinstance(lazy, SecretRef):
+        coerced = CoercedSecretRef(lazy.uri, lazy.registry, key, field)
+        coerced.batch = lazy.batch
+        return coerced
+
+    def compute():
+        try:
+            return convert(lazy.resolve())
+        except (TypeError, ValueError) as e:
+            raise SchemaError({key: str(e)}) from e
+
+    wrapper = Lazy(compute)
+    # kept so the Lazy being coerced can still be recognized, e.g. by the compiler
+    wrapper.wrapped = lazy
+    return wrapper
+
+
+class Schema():
+    """ Declares the settings an application expects. Applying a schema coerces every declared setting to its type
+    in a single pass, so values read from the environment as strings (like ``DEBUG = "False"``) are stored as the
+    right type, and reading them never parses them again. Settings the schema doesn't declare are left alone.
+
+    Sensitive settings are coerced inside their wrapper, and Lazy settings are coerced when they're computed.
+    """
+
+    def __init__(self, fields):
+        """
+        Arguments:
+            fields {dict} -- Dict of setting name to its :class:`Field`, or just a type
+        """
+        self.fields = {
+            key: field if isinstance(field, Field) else Field(field) for key, field in fields.items()
+        }
+        self.compiled = tuple(
+            (key, field.compile(), field.default, field.required) for key, field in self.fields.items()
+        )
+
+    def __reduce__(self):
+        """ Compiled fields are closures, so pickle by the declared fields """
+        return self.__class__, (self.fields,)
+
+    def coerce(self, data):
+        """Returns a copy of data (a dict of settings) with every declared setting coerced and validated, and
+        defaults filled in. Raises SchemaError listing every invalid or missing setting.
+
+        Arguments:
+            data {dict} -- settings, possibly holding Sensitive and Lazy values
+        """
+        result = dict(data)
+        errors = {}
+        for key, convert, default, required in self.compiled:
+            val = data.get(key, _missing)
+            if val is _missing:
+                if default is not _missing:
+                    result[key] = default
+                elif required:
+                    errors[key] = "required setting is missing"
+                continue
+            try:
+                if isinstance(val, Sensitive):
+                    inner = val.obj
+                    if isinstance(inner, Lazy):
+                        inner = wrap_lazy(key, convert, inner, self.fields[key])
+                    else:
+                        inner = convert(inner)
+                    result[key] = Sensitive(inner, stars=val.stars)
+                elif isinstance(val, Lazy):
+                    result[key] = wrap_lazy(key, convert, val, self.fields[key])
+                else:
+                    result[key] = convert(val)
+            except (TypeError, ValueError) as e:
+                errors[key] = str(e)
+        if errors:
+            raise SchemaError(errors)
+        return result
+
+    def apply(self, settings):
+        """Coerces settings in place (see coerce), replacing their contents in a single swap, and returns them
+
+        Arguments:
+            settings {Settings} -- settings to coerce
+        """
+        settings.swap(self.coerce(settings.data))
+        return settings
@@ -2,10 +2,172 @@
 Settings class
 """
 
+import keyword
 import os
-from collections.abc import MutableMapping
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from fnmatch import fnmatchcase
+from itertools import islice
+from types import MappingProxyType
 
-from enpyronments.utils import Sensitive
+from enpyronments.environ import EnvironExporter
+from enpyronments.trace import null_trace
+from enpyronments.utils import Lazy, Sensitive
+
+_missing = object()
+
+# Shown by masked() for lazy settings that haven't been computed, so masking never computes them
+not_evaluated = "<not evaluated>"
+
+
+def mask_value(val):
+    """ Returns how val is shown by masked(): stars for Sensitive values, and a placeholder for lazy values that
+    haven't been computed yet """
+    if isinstance(val, Sensitive):
+        return val.mask()
+    if isinstance(val, Lazy):
+        return val.peek(not_evaluated)
+    return val
+
+
+def merge_layer(data, layer, sensitive):
+    """Merges layer into data in place, like ``data.update(layer)``, except that values overriding Sensitive values
+    are wrapped in Sensitive too (see Settings.keep_sensitive). The copying is done by dict.update, and only the
+    overridden Sensitive settings are handled one by one.
+
+    Arguments:
+        data {dict} -- merged settings so far
+        layer {dict} -- settings to merge over them
+        sensitive {set} -- names of the Sensitive settings in data, kept up to date
+    """
+    kept = None
+    if sensitive:
+        kept = [(key, layer[key]) for key in sensitive & layer.keys() if not isinstance(layer[key], Sensitive)]
+    data.update(layer)
+    if kept:
+        for key, val in kept:
+            data[key] = Sensitive(val)
+    sensitive.update([key for key, val in layer.items() if isinstance(val, Sensitive)])
+
+
+def merge_layers(layers, trace=null_trace):
+    """Returns a dict of layers merged in order, later layers overriding earlier ones (see merge_layer)
+
+    Arguments:
+        layers {iterable} -- (name, dict of settings) pairs, lowest priority first
+
+    Keyword Arguments:
+        trace {LoadTrace} -- trace to record a "merge" phase for each layer on
+    """
+    data = {}
+    sensitive = set()
+    for name, layer in layers:
+        with trace.phase("merge", name) as phase:
+            if trace.enabled:
+                phase.set(keys=len(layer), overridden=len(data.keys() & layer.keys()))
+            merge_layer(data, layer, sensitive)
+    return data
+
+
+def get_changed_layer_keys(old, new):
+    """ Returns the set of keys whose values differ (by identity) between two versions of a layer """
+    if old is new:
+        return set()
+    return {key for key in old.keys() | new.keys() if old.get(key, _missing) is not new.get(key, _missing)}
+
+
+class SettingNotFound(KeyError, AttributeError):
+    """Raised when a setting that doesn't exist is accessed as an attribute. It's a KeyError, as it always has been,
+    and also an AttributeError, so ``hasattr`` and ``getattr`` with a default work as expected."""
+
+
+class KeyIndex:
+    """Sorted index of the (str) keys of a settings dict, so the keys starting with a prefix are found with a binary
+    search and a scan of just the matches, instead of a scan of every key.
+
+    Arguments:
+        source {dict} -- the settings dict to index
+    """
+
+    wildcards = "*?["
+
+    def __init__(self, source):
+        self.source = source
+        self.keys = sorted(key for key in source if isinstance(key, str))
+
+    def add(self, key):
+        """ Adds a new key to the index """
+        if isinstance(key, str):
+            insort(self.keys, key)
+
+    def remove(self, key):
+        """ Removes a key from the index """
+        if isinstance(key, str):
+            index = bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+
+    def prefixed(self, prefix):
+        """ Yields the keys starting with prefix, in sorted order """
+        keys = self.keys
+        for key in islice(keys, bisect_left(keys, prefix), None):
+            if not key.startswith(prefix):
+                break
+            yield key
+
+    def matching(self, pattern):
+        """ Yields the keys matching the glob pattern, in sorted order. Only keys starting with the pattern's literal
+        prefix (the part before the first wildcard) are compared with the whole pattern. """
+        prefix = pattern
+        for index, char in enumerate(pattern):
+            if char in self.wildcards:
+                prefix = pattern[:index]
+                break
+        if prefix == pattern:
+            if pattern in self.source:
+                yield pattern
+            return
+        for key in self.prefixed(prefix):
+            if fnmatchcase(key, pattern):
+                yield key
+
+
+class MaskedCache:
+    """The masked values of a settings dict, kept up to date one setting at a time as settings are written, instead
+    of being rebuilt by every call to masked(). Lazy settings that haven't been computed are tracked, and their
+    placeholders replaced once they are.
+
+    Arguments:
+        source {dict} -- the settings dict to mask
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.masked = {key: mask_value(val) for key, val in source.items()}
+        self.pending = {key for key, val in source.items() if isinstance(val, Lazy) and not val.evaluated}
+
+    def set(self, key, val):
+        """ Updates the masked value of a setting that was written """
+        self.masked[key] = mask_value(val)
+        if isinstance(val, Lazy) and not val.evaluated:
+            self.pending.add(key)
+        else:
+            self.pending.discard(key)
+
+    def remove(self, key):
+        """ Removes a setting that was deleted """
+        self.masked.pop(key, None)
+        self.pending.discard(key)
+
+    def get(self):
+        """ Returns the dict of masked values, after filling in any lazy settings computed since the last call """
+        if self.pending:
+            for key in [key for key in self.pending if self.source[key].evaluated]:
+                self.masked[key] = self.source[key].peek()
+                self.pending.discard(key)
+        return self.masked
 
 
 class Settings(MutableMapping):
@@ -20,21 +182,68 @@ class Settings(MutableMapping):
             self.data = dict(iterable)
         else:
             self.data = dict()
+        # Bumped on every write, so derived state (like exports to the environment) knows when to rebuild
+        self.write_count = 0
+        self.environ_exporter = None
+        self.key_index = None
+        self.masked_cache = None
+
+    def __reduce__(self):
+        """ Pickle (and copy) settings by their contents, so unpickling never reaches __getattr__ before self.data
+        is set """
+        return self.__class__, (dict(self.data),)
+
+    @classmethod
+    def from_layers(cls, layers, trace=null_trace):
+        """Returns settings merged from layers, the way a Loader merges settings files: later layers override earlier
+        ones, and values overriding Sensitive values stay Sensitive.
+
+        Arguments:
+            layers {iterable} -- (name, dict of settings) pairs, lowest priority first
+
+        Keyword Arguments:
+            trace {LoadTrace} -- trace to record a "merge" phase for each layer on
+        """
+        settings = cls()
+        settings.swap(merge_layers(layers, trace))
+        return settings
+
+    def swap(self, data):
+        """Atomically replaces the contents of these settings with data (a dict), and returns the previous contents.
+        Readers see either the old or the new settings, never a mix of both."""
+        old, self.data = self.data, data
+        self.write_count += 1
+        return old
+
+    def freeze(self):
+        """ Returns an immutable :class:`FrozenSettings` copy of these settings, optimized for attribute access """
+        return FrozenSettings.create(self.data)
 
     def masked(self):
-        return dict(
-            zip(
-                self.data.keys(),
-                (
-                    v.mask() if isinstance(v, Sensitive) else v
-                    for v in self.values(extract_from_sensitive=False)
-                ),
-            )
-        )
+        """ Returns a copy of the settings as a dict, with Sensitive values replaced by asterisks (see mask_value).
+        The masked values are cached, and only recomputed for the settings that are written. """
+        return dict(self.masked_view())
+
+    def masked_view(self):
+        """ Returns a read-only view of the cached masked settings, which can be read without copying them. It's
+        only valid until the settings are next written. """
+        return MappingProxyType(self.get_masked_cache().get())
+
+    def get_masked_cache(self):
+        """ Returns the cache of masked settings, building it on first use, or when the contents were replaced """
+        cache = self.masked_cache
+        data = self.data
+        if cache is None or cache.source is not data:
+            cache = self.masked_cache = MaskedCache(data)
+        return cache
 
     def extract_from_sensitive(self, val, extract=True):
-        if extract and isinstance(val, Sensitive):
-            return val.obj
+        """ Returns the value of a setting: unwrapped if it's Sensitive, and computed if it's Lazy """
+        if extract:
+            if isinstance(val, Sensitive):
+                val = val.obj
+            if isinstance(val, Lazy):
+                return val.resolve()
         return val
 
     def __getitem__(self, key, extract_from_sensitive: bool = True):
@@ -50,30 +259,41 @@ class Settings(MutableMapping):
         try:
             return self.extract_from_sensitive(self.data[key])
         except KeyError:
-            raise KeyError(
+            raise SettingNotFound(
                 f'"{key}" was not found in specified settings and is not an attribute of {repr(self)}.'
             )
 
-    def __setitem__(self, key, val):
-        """ Same as dict.__setitem__, but sets the value of Sensitive type elements if the current value is already
-        Sensitive """
+    @staticmethod
+    def keep_sensitive(data, key, val):
+        """ Returns val, wrapped in Sensitive if the current value of key in data is Sensitive """
         # Don't want to set a Sensitive value to a nonsensitive value, so if:
         # 1- The key we're setting is already set
         # 2- The value we already have is sensitive
         # 3- The value we're setting isn't already sensitive
         # Then we need to wrap val in Sensitive().
+        if isinstance(data.get(key), Sensitive) and not isinstance(val, Sensitive):
+            return Sensitive(val)
+        return val
 
-        if (
-            key in self.data
-            and isinstance(self.get(key, extract_from_sensitive=False), Sensitive)
-            and not isinstance(val, Sensitive)
-        ):
-            return self.data.__setitem__(key, Sensitive(val))
-        return self.data.__setitem__(key, val)
+    def __setitem__(self, key, val):
+        """ Same as dict.__setitem__, but sets the value of Sensitive type elements if the current value is already
+        Sensitive """
+        if self.key_index is not None and key not in self.data:
+            self.key_index.add(key)
+        val = self.keep_sensitive(self.data, key, val)
+        self.data.__setitem__(key, val)
+        if self.masked_cache is not None:
+            self.masked_cache.set(key, val)
+        self.write_count += 1
 
     def __delitem__(self, key):
         """ Same as dict.__delitem__ """
-        return self.data.__delitem__(key)
+        self.data.__delitem__(key)
+        if self.key_index is not None:
+            self.key_index.remove(key)
+        if self.masked_cache is not None:
+            self.masked_cache.remove(key)
+        self.write_count += 1
 
     def __iter__(self):
         """ Same as dict.__iter__ """
@@ -90,22 +310,606 @@ class Settings(MutableMapping):
 
     def items(self, extract_from_sensitive: bool = True) -> tuple:
         """ Same as dict.items, but extracts the value of Sensitive type elements """
+        extract = self.extract_from_sensitive
         for key, val in self.data.items():
-            if extract_from_sensitive and isinstance(val, Sensitive):
-                yield key, val.obj
-            yield key, val
+            yield key, extract(val, extract_from_sensitive)
 
     def values(self, extract_from_sensitive: bool = True) -> tuple:
         """ Same as dict.values, but extracts the value of Sensitive type elements """
+        extract = self.extract_from_sensitive
         for val in self.data.values():
-            if extract_from_sensitive and isinstance(val, Sensitive):
-                yield val.obj
-            yield val
+            yield extract(val, extract_from_sensitive)
 
     def keys(self):
         """ Returns the keys in self.data """
         return self.data.keys()
 
+    def get_key_index(self):
+        """ Returns the sorted index of setting names, building it on first use, or when the contents were replaced """
+        index = self.key_index
+        data = self.data
+        if index is None or index.source is not data:
+            index = self.key_index = KeyIndex(data)
+        return index
+
+    def namespace(self, name, sep="_"):
+        """Returns a live, read-only view of the settings named ``{name}{sep}...``, with that prefix stripped: with
+        a DATABASE_PRIMARY_HOST setting, ``settings.namespace("DATABASE").primary_host`` is its value.
+
+        Arguments:
+            name {str} -- prefix of the settings in the namespace, without the separator
+
+        Keyword Arguments:
+            sep {str} -- separator between the namespace and the rest of the setting name (default: {"_"})
+        """
+        return Namespace(self, f"{name}{sep}")
+
+    def select(self, pattern):
+        """Returns a dict of the settings whose names match the glob pattern (e.g. ``"CACHE_*_URL"``), with Sensitive
+        values extracted. Only settings starting with the pattern's literal prefix are compared with it.
+
+        Arguments:
+            pattern {str} -- glob pattern, as used by fnmatch
+        """
+        data = self.data
+        return {
+            key: self.extract_from_sensitive(data[key])
+            for key in self.get_key_index().matching(pattern)
+            if key in data
+        }
+
+    def get_many(self, keys, default=None):
+        """Returns a dict of each of keys to its setting, with Sensitive values extracted, or default for keys that
+        aren't set. All of the settings are read from the same version of the settings.
+
+        Arguments:
+            keys {iterable} -- names of the settings to get
+
+        Keyword Arguments:
+            default -- value for settings that aren't set (default: {None})
+        """
+        data = self.data
+        extract = self.extract_from_sensitive
+        return {key: extract(data[key]) if key in data else default for key in keys}
+
+    def get_exporter(self):
+        """ Returns the EnvironExporter that tracks what these settings last exported """
+        if self.environ_exporter is None:
+            self.environ_exporter = EnvironExporter(self)
+        return self.environ_exporter
+
+    def export_environ(self, sensitive="unwrap", environ=None):
+        """Exports settings to environ as strings, writing only the keys that changed since the last export and
+        removing keys that are no longer set. Returns the set of keys written or removed.
+
+        Keyword Arguments:
+            sensitive {str} -- "unwrap" exports the real value of Sensitive settings, "exclude" leaves them out and
+                "mask" exports their masked value (default: {"unwrap"})
+            environ {MutableMapping} -- Where to export to (default: {os.environ})
+        """
+        return self.get_exporter().export(sensitive, environ)
+
+    def child_environ(self, sensitive="unwrap", base=None, refresh=False):
+        """Returns a dict of base (os.environ by default) with these settings exported over it, for passing as the
+        env of a child process. It's cached until the settings change, so don't modify it.
+
+        Keyword Arguments:
+            sensitive {str} -- How to export Sensitive settings, see export_environ (default: {"unwrap"})
+            base {Mapping} -- The environment to start from (default: {os.environ})
+            refresh {bool} -- Rebuild even if the settings haven't changed, e.g. after base changed (default: {False})
+        """
+        return self.get_exporter().get_child_environ(sensitive, base, refresh)
+
     def save_to_environ(self):
         """Saves the current state of settings to the environment via os.environ"""
-        os.environ.update(self.data)
+        self.export_environ()
+
+
+class Namespace(Mapping):
+    """Live, read-only view of the settings whose names start with a prefix, with the prefix stripped. Built by
+    :meth:`Settings.namespace`. Settings added to or removed from the underlying settings show up immediately, and
+    iterating only visits the settings in the namespace.
+
+    Arguments:
+        settings {Settings} -- the settings to view
+        prefix {str} -- prefix of the settings in the view, including the separator
+    """
+
+    def __init__(self, settings, prefix):
+        self.settings = settings
+        self.prefix = prefix
+
+    def __getitem__(self, key):
+        return self.settings[self.prefix + key]
+
+    def __getattr__(self, key):
+        """ Looks up the key (or its uppercase version) as a setting in the namespace """
+        settings = self.__dict__.get("settings")
+        if settings is None:
+            raise AttributeError(key)
+        name = self.prefix + key
+        if name not in settings.data:
+            name = self.prefix + str(key).upper()
+        try:
+            return settings[name]
+        except KeyError:
+            raise SettingNotFound(f'"{key}" was not found in namespace {self.prefix!r} of {repr(settings)}.')
+
+    def __iter__(self):
+        start = len(self.prefix)
+        for key in self.settings.get_key_index().prefixed(self.prefix):
+            yield key[start:]
+
+    def __len__(self):
+        return sum(1 for _ in self.settings.get_key_index().prefixed(self.prefix))
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self.prefix + key in self.settings.data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.prefix!r}, {self.masked()!r})"
+
+    def namespace(self, name, sep="_"):
+        """ Returns a nested namespace, see :meth:`Settings.namespace` """
+        return Namespace(self.settings, f"{self.prefix}{name}{sep}")
+
+    def get_many(self, keys, default=None):
+        """ Same as Settings.get_many, with keys relative to the namespace """
+        prefix = self.prefix
+        values = self.settings.get_many([prefix + key for key in keys], default)
+        start = len(prefix)
+        return {key[start:]: val for key, val in values.items()}
+
+    def masked(self):
+        """ Same as Settings.masked, for the settings in the namespace """
+        data = self.settings.data
+        start = len(self.prefix)
+        return {
+            key[start:]: mask_value(data[key])
+            for key in self.settings.get_key_index().prefixed(self.prefix)
+            if key in data
+        }
+
+
+class ConcurrentSettings(Settings):
+    """Settings for multi-threaded programs where reads vastly outnumber writes. The contents are a snapshot that is
+    never modified in place: writes copy the current snapshot under a lock, apply the change, and publish the new
+    snapshot atomically. Readers never take a lock, and always see a consistent version.
+
+    Single reads are always consistent. To read several settings from the same version, take a ``snapshot()`` and
+    read from it.
+    """
+
+    def __init__(self, iterable=None, **kwargs):
+        """ Same as Settings.__init__ """
+        super().__init__(iterable, **kwargs)
+        self.write_lock = threading.RLock()
+
+    def snapshot(self):
+        """ Returns the current contents as a read-only mapping, which won't change even if these settings do """
+        return MappingProxyType(self.data)
+
+    def publish(self, data):
+        """ Atomically replaces the current snapshot with data, which must not be modified afterwards """
+        self.data = data
+        self.write_count += 1
+
+    def swap(self, data):
+        """ Atomically replaces the contents of these settings with a copy of data, and returns the previous
+        snapshot """
+        new = dict(data)
+        with self.write_lock:
+            old = self.data
+            self.publish(new)
+        return MappingProxyType(old)
+
+    def __setitem__(self, key, val):
+        """ Same as Settings.__setitem__, publishing a new snapshot """
+        with self.write_lock:
+            data = dict(self.data)
+            data[key] = self.keep_sensitive(data, key, val)
+            self.publish(data)
+
+    def __delitem__(self, key):
+        """ Same as Settings.__delitem__, publishing a new snapshot """
+        with self.write_lock:
+            data = dict(self.data)
+            del data[key]
+            self.publish(data)
+
+    def update(self, other=(), **kwargs):
+        """ Same as dict.update, but publishes all of the changes as a single new snapshot """
+        pairs = ((key, other[key]) for key in other.keys()) if hasattr(other, "keys") else other
+        with self.write_lock:
+            data = dict(self.data)
+            for key, val in pairs:
+                data[key] = self.keep_sensitive(data, key, val)
+            for key, val in kwargs.items():
+                data[key] = self.keep_sensitive(data, key, val)
+            self.publish(data)
+
+    def clear(self):
+        """ Removes every setting, publishing an empty snapshot """
+        with self.write_lock:
+            self.publish({})
+
+    def pop(self, *args, **kwargs):
+        """ Same as dict.pop, atomic with respect to other writes """
+        with self.write_lock:
+            return super().pop(*args, **kwargs)
+
+    def popitem(self):
+        """ Same as dict.popitem, atomic with respect to other writes """
+        with self.write_lock:
+            return super().popitem()
+
+    def setdefault(self, key, default=None):
+        """ Same as dict.setdefault, atomic with respect to other writes """
+        with self.write_lock:
+            return super().setdefault(key, default)
+
+
+class LayeredSettings(Settings):
+    """Settings that keep the layers they were merged from: one per settings file, in load order, as a Loader loads
+    them. Reads go through the merged dict (``data``), so they're as fast as plain Settings, but replacing one layer
+    (say a new env_local, or a per-request override) only recomputes the settings that layer sets, instead of
+    merging every layer again. The layer each setting comes from is known without storing anything per setting: it's
+    the topmost layer that sets it (see source_of).
+
+    Writes go to a topmost layer, named by ``override_layer``, that belongs to these settings. Other layers are
+    never modified in place (deleting a setting replaces the layers holding it with copies), so the dicts given as
+    layers can be shared, e.g. with a Watcher's cache of loaded modules.
+    """
+
+    override_layer = "<overrides>"
+
+    def __init__(self, iterable=None, **kwargs):
+        """ Same as Settings.__init__, the settings given are the override layer """
+        super().__init__(iterable, **kwargs)
+        self.layers = OrderedDict()
+        self.owned_layer = None
+        if self.data:
+            self.owned_layer = self.layers[self.override_layer] = dict(self.data)
+
+    @classmethod
+    def from_layers(cls, layers, trace=null_trace):
+        """ Same as Settings.from_layers, keeping the layers """
+        layers = OrderedDict(layers)
+        settings = cls()
+        settings.data = merge_layers(layers.items(), trace)
+        settings.layers = layers
+        return settings
+
+    def __reduce__(self):
+        """ Pickle by layers, so they survive copying and pickling """
+        return self.__class__.from_layers, (list(self.layers.items()),)
+
+    def source_of(self, key):
+        """ Returns the name of the layer the setting key comes from, or None if it isn't set """
+        if key in self.data:
+            for name, layer in reversed(self.layers.items()):
+                if key in layer:
+                    return name
+        return None
+
+    def explain(self, key):
+        """ Returns a list of (layer name, value) of each layer that sets key, lowest priority first. The last one
+        is in effect. """
+        return [(name, layer[key]) for name, layer in self.layers.items() if key in layer]
+
+    def recompute(self, keys, atomic=False):
+        """Merges the settings in keys again from every layer, and returns keys
+
+        Arguments:
+            keys {iterable} -- names of the settings to recompute
+
+        Keyword Arguments:
+            atomic {bool} -- update a copy of the merged dict and swap it in once, so readers on other threads never
+                see some of the changes without the rest (default: {False})
+        """
+        data = dict(self.data) if atomic else self.data
+        key_index = None if atomic else self.key_index
+        masked_cache = None if atomic else self.masked_cache
+        layers = list(self.layers.values())
+        for key in keys:
+            val = _missing
+            for layer in layers:
+                if key in layer:
+                    new = layer[key]
+                    if isinstance(val, Sensitive) and not isinstance(new, Sensitive):
+                        new = Sensitive(new)
+                    val = new
+            if val is _missing:
+                if key in data:
+                    del data[key]
+                    if key_index is not None:
+                        key_index.remove(key)
+                    if masked_cache is not None:
+                        masked_cache.remove(key)
+                continue
+            if key_index is not None and key not in data:
+                key_index.add(key)
+            data[key] = val
+            if masked_cache is not None:
+                masked_cache.set(key, val)
+        if atomic:
+            self.data = data
+        self.write_count += 1
+        return keys
+
+    def set_layers(self, layers, atomic=False):
+        """Replaces the layers, recomputing only the settings of layers that aren't the same dicts as before, and
+        returns the set of recomputed setting names. The override layer is dropped unless it's one of layers.
+
+        Arguments:
+            layers {iterable} -- (name, dict of settings) pairs, lowest priority first
+
+        Keyword Arguments:
+            atomic {bool} -- swap the changes in at once, see recompute (default: {False})
+        """
+        new = OrderedDict(layers)
+        old = self.layers
+        changed = set()
+        if [name for name in old if name in new] != [name for name in new if name in old]:
+            # layers were reordered, so any setting could change
+            changed.update(self.data)
+            for layer in new.values():
+                changed.update(layer)
+        else:
+            for name in old.keys() | new.keys():
+                changed.update(get_changed_layer_keys(old.get(name, {}), new.get(name, {})))
+        self.layers = new
+        return self.recompute(changed, atomic)
+
+    def replace_layer(self, name, layer):
+        """Replaces the layer called name with layer (a dict of settings, which mustn't be modified afterwards), and
+        returns the set of recomputed setting names. A new layer goes on top of the others, below the override
+        layer. Only the settings either version of the layer sets are recomputed.
+
+        Arguments:
+            name {str} -- layer name, e.g. a settings module name like "env_local"
+            layer {dict} -- the layer's settings
+        """
+        layers = self.layers
+        old = layers.get(name, {})
+        layers[name] = layer
+        if self.override_layer in layers and name != self.override_layer:
+            layers.move_to_end(self.override_layer)
+        if name == self.override_layer:
+            self.owned_layer = None
+        return self.recompute(get_changed_layer_keys(old, layer))
+
+    def remove_layer(self, name):
+        """ Removes the layer called name, and returns the set of recomputed setting names """
+        return self.recompute(set(self.layers.pop(name)))
+
+    def get_override_layer(self):
+        """ Returns the override layer, creating it, or copying it if it wasn't created by these settings """
+        layers = self.layers
+        layer = layers.get(self.override_layer)
+        if layer is None or layer is not self.owned_layer:
+            layer = self.owned_layer = dict(layer or ())
+            layers[self.override_layer] = layer
+            layers.move_to_end(self.override_layer)
+        return layer
+
+    def without_key(self, key):
+        """ Removes key from every layer, replacing each layer holding it (other than the override layer) with a
+        copy """
+        layers = self.layers
+        for name, layer in list(layers.items()):
+            if key in layer:
+                if layer is not self.owned_layer:
+                    layer = layers[name] = dict(layer)
+                del layer[key]
+
+    def __setitem__(self, key, val):
+        """ Sets key in the override layer. The value is Sensitive if a lower layer's value is Sensitive """
+        self.get_override_layer()[key] = val
+        self.recompute((key,))
+
+    def __delitem__(self, key):
+        """ Removes key from every layer """
+        if key not in self.data:
+            raise KeyError(key)
+        self.without_key(key)
+        self.recompute((key,))
+
+    def swap(self, data):
+        """Replaces the merged settings with data (a dict), and returns the previous contents. Readers see either
+        the old or the new settings. To keep the layers consistent with data, changed settings are written to the
+        layer they come from (new settings to the override layer), and removed settings are removed from every layer.
+        Layers that change are replaced with copies. Like every other write, values overriding a Sensitive value in a
+        lower layer are wrapped in Sensitive (in a copy of data)."""
+        old = self.data
+        layers = self.layers
+        copied = set()
+        wrapped = None
+        for key, val in data.items():
+            if old.get(key, _missing) is val:
+                continue
+            name = self.source_of(key)
+            if name is None:
+                layer = self.get_override_layer()
+            else:
+                layer = layers[name]
+                if name not in copied and layer is not self.owned_layer:
+                    layer = layers[name] = dict(layer)
+                copied.add(name)
+            layer[key] = val
+            if not isinstance(val, Sensitive) and any(
+                isinstance(lower.get(key), Sensitive) for lower in layers.values() if lower is not layer
+            ):
+                if wrapped is None:
+                    wrapped = {}
+                wrapped[key] = Sensitive(val)
+        for key in old.keys() - data.keys():
+            self.without_key(key)
+        if wrapped:
+            data = dict(data)
+            data.update(wrapped)
+        self.data = data
+        self.write_count += 1
+        return old
+
+
+class FrozenSettings(Mapping):
+    """Immutable settings, built by :meth:`Settings.freeze`, for hot paths that read settings as attributes. Each
+    setting (and its lowercase alias) is stored in a slot, so ``settings.debug`` is a plain attribute lookup with
+    no ``__getattr__`` call, and Sensitive values are unwrapped ahead of time. The Sensitive markers are kept, so
+    ``masked()`` still works. Lazy settings get their slot filled the first time they're read.
+
+    Settings whose names aren't valid identifiers, or clash with a method name, can still be read as items.
+    """
+
+    __slots__ = ("_data", "_values")
+
+    classes = {}
+
+    @classmethod
+    def get_class(cls, data):
+        """ Returns a FrozenSettings subclass with a slot for each setting in data (and its lowercase alias) """
+        names = []
+        for key in data:
+            if not isinstance(key, str):
+                continue
+            # lowercase aliases only for keys __getattr__ would find by uppercasing the alias
+            aliases = (key, key.lower()) if key.lower().upper() == key else (key,)
+            for name in aliases:
+                if (
+                    name.isidentifier()
+                    and not keyword.iskeyword(name)
+                    and not name.startswith("__")
+                    and not hasattr(cls, name)
+                    and name not in names
+                    and (name == key or name not in data)
+                ):
+                    names.append(name)
+
+        slots = tuple(names)
+        frozen_class = cls.classes.get(slots)
+        if frozen_class is None:
+            frozen_class = type(cls.__name__, (cls,), {"__slots__": slots, "__module__": cls.__module__})
+            cls.classes[slots] = frozen_class
+        return frozen_class
+
+    @classmethod
+    def create(cls, data):
+        """Builds frozen settings from a dict of settings (as stored in Settings.data)
+
+        Arguments:
+            data {dict} -- settings, possibly holding Sensitive values
+        """
+        frozen_class = cls.get_class(data)
+        frozen = object.__new__(frozen_class)
+        values = {
+            key: val.obj if isinstance(val, Sensitive) else val for key, val in data.items()
+        }
+        set_attr = object.__setattr__
+        set_attr(frozen, "_data", dict(data))
+        set_attr(frozen, "_values", values)
+        for name in frozen_class.__slots__:
+            val = values[name] if name in values else values[name.upper()]
+            # leave lazy slots empty, so the first read goes through __getattr__ and computes them
+            if not isinstance(val, Lazy):
+                set_attr(frozen, name, val)
+        return frozen
+
+    def resolve_lazy(self, key):
+        """ Computes the lazy setting key, and stores its value in place of the Lazy marker (and in its slots) """
+        val = self._values[key].resolve()
+        self._values[key] = val
+        slots = type(self).__slots__
+        for name in (key, key.lower()):
+            if name in slots:
+                object.__setattr__(self, name, val)
+        return val
+
+    def resolve_all(self):
+        """ Computes every lazy setting that hasn't been read yet """
+        for key, val in list(self._values.items()):
+            if isinstance(val, Lazy):
+                self.resolve_lazy(key)
+
+    def __reduce__(self):
+        """ Frozen settings classes are generated, so pickle by contents """
+        return FrozenSettings.create, (self._data,)
+
+    def __setattr__(self, key, val):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getattr__(self, key):
+        """ Only called for settings without a slot, looks up the key (or its uppercase version) as an item """
+        if key not in self._values:
+            key = str(key).upper()
+        try:
+            val = self._values[key]
+        except KeyError:
+            raise SettingNotFound(
+                f'"{key}" was not found in specified settings and is not an attribute of {repr(self)}.'
+            )
+        if isinstance(val, Lazy):
+            return self.resolve_lazy(key)
+        return val
+
+    def __getitem__(self, key, extract_from_sensitive: bool = True):
+        """ Same as Settings.__getitem__ """
+        if extract_from_sensitive:
+            val = self._values[key]
+            if isinstance(val, Lazy):
+                return self.resolve_lazy(key)
+            return val
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.masked()!r})"
+
+    @property
+    def data(self):
+        """ A read-only view of the settings, including Sensitive markers """
+        return MappingProxyType(self._data)
+
+    def get(self, key, default=None, extract_from_sensitive: bool = True):
+        """ Same as Settings.get """
+        if extract_from_sensitive:
+            val = self._values.get(key, default)
+            if isinstance(val, Lazy) and key in self._values:
+                return self.resolve_lazy(key)
+            return val
+        return self._data.get(key, default)
+
+    def keys(self):
+        """ Same as Settings.keys """
+        return self._data.keys()
+
+    def items(self, extract_from_sensitive: bool = True):
+        """ Same as Settings.items """
+        if extract_from_sensitive:
+            self.resolve_all()
+        return (self._values if extract_from_sensitive else self._data).items()
+
+    def values(self, extract_from_sensitive: bool = True):
+        """ Same as Settings.values """
+        if extract_from_sensitive:
+            self.resolve_all()
+        return (self._values if extract_from_sensitive else self._data).values()
+
+    def masked(self):
+        """ Same as Settings.masked """
+        return {key: mask_value(val) for key, val in self._data.items()}
+
+    def thaw(self):
+        """ Returns a mutable Settings copy of these settings """
+        return Settings(self._data)
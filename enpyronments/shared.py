@@ -0,0 +1,283 @@
+"""
+Shared-memory settings snapshots
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from collections.abc import Mapping
+from zlib import crc32
+
+from enpyronments.settings import SettingNotFound
+from enpyronments.utils import Lazy, Sensitive
+
+magic = b"ENPYSHM2"
+# magic, generation, count, slot count, table offset, order offset
+header = struct.Struct("<8sQQQQQ")
+# key hash, key offset, key length, value offset, value length, stars
+slot = struct.Struct("<IQIQII")
+order_entry = struct.Struct("<I")
+generation_counter = struct.Struct("<Q")
+
+
+def get_generation_path(path):
+    """ Returns the path of the generation counter file for the snapshot at path """
+    return f"{path}.generation"
+
+
+def open_generation(path):
+    """ Maps the generation counter file for the snapshot at path (creating it if needed) and returns the mmap """
+    fd = os.open(get_generation_path(path), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if os.fstat(fd).st_size < generation_counter.size:
+            os.ftruncate(fd, generation_counter.size)
+        return mmap.mmap(fd, generation_counter.size)
+    finally:
+        os.close(fd)
+
+
+def build_snapshot(data, generation):
+    """Serializes a dict of settings into the snapshot layout, and returns it as a list of byte strings. The
+    snapshot holds a header, an open-addressing hash table of keys, the keys' insertion order, then the encoded keys
+    and pickled values, so it can be read in place without building any per-process index.
+
+    Arguments:
+        data {dict} -- settings, possibly holding Sensitive values
+        generation {int} -- generation number of the snapshot
+    """
+    slot_count = 8
+    while slot_count < len(data) * 2:
+        slot_count *= 2
+
+    table_offset = header.size
+    order_offset = table_offset + slot_count * slot.size
+    offset = order_offset + len(data) * order_entry.size
+
+    table = bytearray(slot_count * slot.size)
+    order = bytearray()
+    chunks = []
+    for key, val in data.items():
+        if not isinstance(key, str):
+            raise TypeError(f"Shared settings keys must be strings, got {key!r}")
+        stars = 0
+        if isinstance(val, Sensitive):
+            val, stars = val.obj, val.stars
+        if isinstance(val, Lazy):
+            val = val.resolve()
+        key_bytes = key.encode("utf-8")
+        value_bytes = pickle.dumps(val, pickle.HIGHEST_PROTOCOL)
+        key_hash = crc32(key_bytes)
+
+        index = key_hash % slot_count
+        while slot.unpack_from(table, index * slot.size)[1]:
+            index = (index + 1) % slot_count
+        slot.pack_into(
+            table,
+            index * slot.size,
+            key_hash,
+            offset,
+            len(key_bytes),
+            offset + len(key_bytes),
+            len(value_bytes),
+            stars,
+        )
+        order += order_entry.pack(index)
+        chunks += [key_bytes, value_bytes]
+        offset += len(key_bytes) + len(value_bytes)
+
+    head = header.pack(magic, generation, len(data), slot_count, table_offset, order_offset)
+    return [head, bytes(table), bytes(order)] + chunks
+
+
+def publish(settings, path):
+    """Serializes settings once into a read-only snapshot file at path (put it on a tmpfs such as /dev/shm), for
+    worker processes to map with :class:`SharedSettings`. Replaces any previous snapshot atomically, and bumps the
+    generation counter so attached workers remap on their next read. Returns the new generation.
+
+    Each value is pickled separately, so workers only decode the settings they read. Sensitive values are stored
+    unwrapped, with their mask kept alongside, so ``masked()`` never decodes them. Lazy values are computed here,
+    once, so workers share the result.
+
+    Arguments:
+        settings {Settings} -- settings to publish
+        path {str} -- path of the snapshot file
+    """
+    counter = open_generation(path)
+    try:
+        generation = generation_counter.unpack_from(counter)[0] + 1
+        chunks = build_snapshot(settings.data, generation)
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.writelines(chunks)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        generation_counter.pack_into(counter, 0, generation)
+        return generation
+    finally:
+        counter.close()
+
+
+class Snapshot:
+    """ One mapped snapshot file, read in place """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        (
+            snapshot_magic,
+            self.generation,
+            self.count,
+            self.slot_count,
+            self.table_offset,
+            self.order_offset,
+        ) = header.unpack_from(self.buffer)
+        if snapshot_magic != magic:
+            raise ValueError(f"{path} isn't a settings snapshot")
+
+    def find(self, key):
+        """ Returns the (key hash, key offset, key length, value offset, value length, stars) slot for key """
+        if not isinstance(key, str):
+            raise KeyError(key)
+        key_bytes = key.encode("utf-8")
+        key_hash = crc32(key_bytes)
+        buffer = self.buffer
+        index = key_hash % self.slot_count
+        while True:
+            entry = slot.unpack_from(buffer, self.table_offset + index * slot.size)
+            if not entry[1]:
+                raise KeyError(key)
+            if entry[0] == key_hash and buffer[entry[1] : entry[1] + entry[2]] == key_bytes:
+                return entry
+            index = (index + 1) % self.slot_count
+
+    def entries(self):
+        """ Yields (key, slot) for every setting, in insertion order """
+        buffer = self.buffer
+        for i in range(self.count):
+            (index,) = order_entry.unpack_from(buffer, self.order_offset + i * order_entry.size)
+            entry = slot.unpack_from(buffer, self.table_offset + index * slot.size)
+            yield str(buffer[entry[1] : entry[1] + entry[2]], "utf-8"), entry
+
+    def decode(self, entry, extract_from_sensitive=True):
+        """ Unpickles the value for a slot, wrapping it in Sensitive if requested """
+        _, _, _, value_offset, value_length, stars = entry
+        val = pickle.loads(self.buffer[value_offset : value_offset + value_length])
+        if stars and not extract_from_sensitive:
+            return Sensitive(val, stars=stars)
+        return val
+
+
+class SharedSettings(Mapping):
+    """A read-only, Settings-compatible view of a snapshot written by :func:`publish`. The snapshot is memory-mapped
+    and read in place (keys are looked up in a hash table stored in the snapshot), so every worker attached to it
+    shares the same physical pages, and values are only decoded when read.
+
+    Before each read, the view checks the snapshot's generation counter (a read from shared memory, no system call),
+    and remaps if a newer snapshot was published. Pass auto_refresh=False to only remap when ``refresh()`` is
+    called.
+
+    Arguments:
+        path {str} -- path of the snapshot file
+
+    Keyword Arguments:
+        auto_refresh {bool} -- check for a newer snapshot on every read
+    """
+
+    def __init__(self, path, auto_refresh=True):
+        self.path = path
+        self.auto_refresh = auto_refresh
+        self.counter = open_generation(path)
+        self.snapshot = None
+        self.refresh()
+
+    @property
+    def generation(self):
+        """ Generation of the currently mapped snapshot """
+        return self.snapshot.generation
+
+    def refresh(self):
+        """ Remaps the snapshot if a newer one was published, and returns True if it did """
+        current = self.snapshot
+        if current is not None and generation_counter.unpack_from(self.counter)[0] == current.generation:
+            return False
+        # readers of the previous snapshot keep using it, it's unmapped once they're done with it
+        self.snapshot = Snapshot(self.path)
+        return True
+
+    def get_snapshot(self):
+        """ Returns the current snapshot, remapping first if needed """
+        if self.auto_refresh:
+            self.refresh()
+        return self.snapshot
+
+    def __getitem__(self, key, extract_from_sensitive: bool = True):
+        """ Same as Settings.__getitem__, decoding the value from the snapshot """
+        snapshot = self.get_snapshot()
+        return snapshot.decode(snapshot.find(key), extract_from_sensitive)
+
+    def __getattr__(self, key):
+        """ Same as Settings.__getattr__ """
+        if key.startswith("__") or "snapshot" not in self.__dict__:
+            raise AttributeError(key)
+        if key not in self:
+            key = str(key).upper()
+        try:
+            return self[key]
+        except KeyError:
+            raise SettingNotFound(
+                f'"{key}" was not found in specified settings and is not an attribute of {repr(self)}.'
+            )
+
+    def __iter__(self):
+        return (key for key, _ in self.get_snapshot().entries())
+
+    def __len__(self):
+        return self.get_snapshot().count
+
+    def __contains__(self, key):
+        try:
+            self.get_snapshot().find(key)
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None, extract_from_sensitive: bool = True):
+        """ Same as Settings.get """
+        try:
+            return self.__getitem__(key, extract_from_sensitive)
+        except KeyError:
+            return default
+
+    def items(self, extract_from_sensitive: bool = True):
+        """ Same as Settings.items, all from the same snapshot """
+        snapshot = self.get_snapshot()
+        for key, entry in snapshot.entries():
+            yield key, snapshot.decode(entry, extract_from_sensitive)
+
+    def values(self, extract_from_sensitive: bool = True):
+        """ Same as Settings.values """
+        for _, val in self.items(extract_from_sensitive):
+            yield val
+
+    @property
+    def data(self):
+        """ The snapshot decoded into a dict, with Sensitive markers, like Settings.data """
+        return dict(self.items(extract_from_sensitive=False))
+
+    def masked(self):
+        """ Same as Settings.masked, without decoding Sensitive values """
+        snapshot = self.get_snapshot()
+        return {
+            key: "*" * entry[5] if entry[5] else snapshot.decode(entry)
+            for key, entry in snapshot.entries()
+        }
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.path!r}, generation={self.generation})"
@@ -0,0 +1,161 @@
+"""
+Load tracing
+"""
+
+import json
+import time
+
+
+class Phase:
+    """ Times one phase of a load, as a context manager, and records it on a LoadTrace when it exits """
+
+    def __init__(self, trace, phase, module=None):
+        self.trace = trace
+        self.phase = phase
+        self.module = module
+        self.details = {}
+        self.start = None
+
+    def set(self, **details):
+        """ Adds details (e.g. the number of keys a module contributed) to the recorded event """
+        self.details.update(details)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        end = time.perf_counter()
+        self.trace.record(
+            self.phase, end - self.start, module=self.module, start=self.start, **self.details
+        )
+
+
+class NullPhase:
+    """ Phase used when tracing is disabled, which does nothing """
+
+    def set(self, **details):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class NullTrace:
+    """ Trace used when tracing is disabled. Every call is a no-op, so untraced loads pay next to nothing """
+
+    enabled = False
+    null_phase = NullPhase()
+
+    def phase(self, phase, module=None):
+        return self.null_phase
+
+    def record(self, phase, duration, module=None, start=None, **details):
+        pass
+
+
+null_trace = NullTrace()
+
+
+class LoadTrace:
+    """Structured timings of a settings load. Pass one to :meth:`Loader.load_settings` (or use
+    :meth:`Loader.trace_settings`), and it records an event for each phase: ``glob``, ``import``, ``reload``,
+    ``extract``, ``mode`` and ``merge`` (or ``snapshot`` when a snapshot cache is used), then ``resolve`` for
+    asynchronous loads, and ``schema`` when a schema is applied. Per-file phases include the module name, and
+    ``merge`` events include the number of keys each module contributed and overrode.
+
+    Keyword Arguments:
+        callback {callable} -- called with each event (a dict) as soon as it's recorded
+    """
+
+    enabled = True
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.events = []
+        self.origin = time.perf_counter()
+        self.settings = None
+
+    def phase(self, phase, module=None):
+        """Returns a context manager timing a phase
+
+        Arguments:
+            phase {str} -- name of the phase
+
+        Keyword Arguments:
+            module {str} -- name of the settings module the phase applies to
+        """
+        return Phase(self, phase, module)
+
+    def record(self, phase, duration, module=None, start=None, **details):
+        """Records an event, and passes it to the callback
+
+        Arguments:
+            phase {str} -- name of the phase
+            duration {float} -- seconds the phase took
+
+        Keyword Arguments:
+            module {str} -- name of the settings module the phase applies to
+            start {float} -- time.perf_counter() value the phase started at
+        """
+        event = {"phase": phase, "module": module, "duration": duration}
+        if start is not None:
+            event["start"] = start - self.origin
+        event.update(details)
+        self.events.append(event)
+        if self.callback is not None:
+            self.callback(event)
+
+    @property
+    def total(self):
+        """ Seconds spent in all recorded phases """
+        return sum(event["duration"] for event in self.events)
+
+    def by_phase(self):
+        """ Returns a dict of phase name to the total seconds spent in it """
+        totals = {}
+        for event in self.events:
+            totals[event["phase"]] = totals.get(event["phase"], 0) + event["duration"]
+        return totals
+
+    def by_module(self):
+        """ Returns a dict of module name to a dict of the seconds each phase took for it, and the keys it
+        contributed and overrode """
+        modules = {}
+        for event in self.events:
+            if event["module"] is None:
+                continue
+            module = modules.setdefault(event["module"], {})
+            module[event["phase"]] = module.get(event["phase"], 0) + event["duration"]
+            for detail in ("keys", "overridden"):
+                if detail in event:
+                    module[detail] = event[detail]
+        return modules
+
+    def slowest(self, count=5):
+        """ Returns the count modules that took the longest to load, with their total time, slowest first """
+        totals = {
+            module: sum(val for key, val in phases.items() if key not in ("keys", "overridden"))
+            for module, phases in self.by_module().items()
+        }
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def to_dict(self):
+        """ Returns the trace as a JSON-serializable dict """
+        return {
+            "total": self.total,
+            "phases": self.by_phase(),
+            "modules": self.by_module(),
+            "events": self.events,
+        }
+
+    def to_json(self, **kwargs):
+        """ Returns the trace as a JSON string, kwargs are passed to json.dumps """
+        return json.dumps(self.to_dict(), default=str, **kwargs)
+
+    def dump(self, fp, **kwargs):
+        """ Writes the trace as JSON to the file-like object fp, kwargs are passed to json.dump """
+        json.dump(self.to_dict(), fp, default=str, **kwargs)
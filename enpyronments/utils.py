@@ -4,6 +4,7 @@ Helper classes
 
 
 import sys
+import threading
 
 
 class UsePath():
@@ -53,3 +54,84 @@ class Sensitive():
         """ Returns the masked value of the object (a str of asterisks with 
         length equal to ``self.stars``)"""
         return "*" * self.stars
+
+    @classmethod
+    def ref(cls, uri, stars: int = 10, registry=None):
+        """ Returns a Sensitive setting referencing a secret stored elsewhere
+        (e.g. ``Sensitive.ref("vault://db/primary")``), which is fetched
+        through the provider registered for its scheme when it's first read.
+        See ``providers.SecretRef``. """
+        # imported here, as providers depends on this module
+        from enpyronments.providers import SecretRef
+
+        return cls(SecretRef(uri, registry), stars=stars)
+
+
+_unset = object()
+
+
+class Lazy():
+    """ Flags a setting as lazy: ``func`` is only called the first time the
+    setting is read, and its result is kept for every read after that. Use it
+    for settings that are expensive to build and not always needed. Concurrent
+    first reads call ``func`` once.
+
+    Wrap it in ``Sensitive`` to hide the value in ``Settings.masked``, which
+    never evaluates lazy settings. """
+
+    def __init__(self, func):
+        """ Create a new ``Lazy`` instance, computed by calling ``func`` with
+        no arguments. """
+
+        self.func = func
+        self.value = _unset
+        self.lock = threading.Lock()
+
+    @property
+    def evaluated(self):
+        """ Whether ``func`` has been called yet """
+        return self.value is not _unset
+
+    def resolve(self):
+        """ Returns the value, calling ``func`` if this is the first time """
+        value = self.value
+        if value is _unset:
+            with self.lock:
+                if self.value is _unset:
+                    self.value = self.func()
+                    self.func = None
+                value = self.value
+        return value
+
+    def fulfill(self, value):
+        """ Stores ``value`` as the result, computed somewhere other than
+        ``func`` (e.g. fetched in a batch), unless it's already computed.
+        Returns the stored result. """
+        with self.lock:
+            if self.value is _unset:
+                self.value = value
+                self.func = None
+            return self.value
+
+    def peek(self, default=None):
+        """ Returns the value if it's been computed, otherwise ``default``
+        (without computing it) """
+        value = self.value
+        return default if value is _unset else value
+
+    def __getstate__(self):
+        """ Pickles the value once it's computed, or ``func`` until then """
+        if self.evaluated:
+            return {"value": self.value}
+        return {"func": self.func}
+
+    def __setstate__(self, state):
+        self.func = state.get("func")
+        self.value = state.get("value", _unset)
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        """ Returns "Lazy " and the repr() of the value, if it's been computed """
+        if self.evaluated:
+            return f"Lazy ({repr(self.value)})"
+        return "Lazy (not evaluated)"
@@ -0,0 +1,233 @@
+"""
+Watcher class
+"""
+
+import os
+import threading
+
+from enpyronments.providers import batch_secret_refs
+from enpyronments.settings import LayeredSettings
+from enpyronments.utils import Sensitive
+
+
+backends = ("poll", "inotify")
+
+
+def get_changed_keys(old, new):
+    """Returns the set of keys whose values differ between two settings dicts (added and removed keys included).
+    Sensitive values are compared by their underlying value.
+
+    Arguments:
+        old {dict} -- settings before the change
+        new {dict} -- settings after the change
+    """
+
+    def unwrap(val):
+        return val.obj if isinstance(val, Sensitive) else val
+
+    changed = set(old.keys() ^ new.keys())
+    for key in old.keys() & new.keys():
+        old_val, new_val = old[key], new[key]
+        if old_val is new_val:
+            continue
+        try:
+            if unwrap(old_val) == unwrap(new_val):
+                continue
+        except Exception:  # pylint: disable=broad-except
+            # values that can't be compared are treated as changed
+            pass
+        changed.add(key)
+    return changed
+
+
+class Watcher:
+    """Keeps a live :class:`Settings` object up to date with the settings files of a package. Only the files that
+    changed are executed again; the merge is recomputed from the cached settings of every other module, and swapped
+    into the live settings in one step. Subscribers are called with the set of keys whose values changed.
+
+    Settings a module imports from another settings file (e.g. ``from settings.env import APP_NAME``) are only
+    refreshed when the importing file itself changes.
+
+    Arguments:
+        loader {Loader} -- loader used to execute and merge settings files
+
+        package {str} -- package to watch
+
+    Keyword Arguments:
+        settings {Settings} -- live settings object to update (a new one is created if not given)
+
+        interval {float} -- seconds between checks for changes
+
+        backend {str} -- "poll" or "inotify"
+    """
+
+    def __init__(self, loader, package, settings=None, interval=1.0, backend="poll"):
+        if backend not in backends:
+            raise ValueError(f'Unknown backend "{backend}", expected one of {backends}')
+        if backend == "inotify":
+            try:
+                import inotify_simple  # pylint: disable=import-outside-toplevel,unused-import
+            except ImportError:
+                raise ImportError(
+                    'The "inotify" backend requires the inotify_simple package (pip install inotify_simple)'
+                )
+
+        self.loader = loader
+        self.package = package
+        self.settings = settings if settings is not None else loader.settings_class()
+        self.interval = interval
+        self.backend = backend
+        self.subscribers = []
+        self.settings_by_module = {}
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+        self.check()
+
+    def subscribe(self, callback):
+        """Registers callback to be called with the set of changed keys after each reload, and returns it (so this
+        can be used as a decorator)
+
+        Arguments:
+            callback {callable} -- function taking a set of keys
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        """ Removes a callback registered with subscribe """
+        self.subscribers.remove(callback)
+
+    def get_stats(self):
+        """ Returns a dict of module name to the (extension, mtime, size, inode) of each settings file with that
+        name in the package """
+        stats = {}
+        for path in sorted(self.loader.get_module_paths(self.package)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            module_name, ext = self.loader.split_module_path(path)
+            stats[module_name] = stats.get(module_name, ()) + (
+                (ext, stat.st_mtime_ns, stat.st_size, stat.st_ino),
+            )
+        return stats
+
+    def check(self):
+        """Executes the settings files that changed since the last check, re-merges, and updates the live settings.
+        Returns the set of keys whose values changed. If a settings file fails to execute, the error is raised and
+        the live settings are left untouched.
+        """
+        with self.lock:
+            stats = self.get_stats()
+            changed_files = {
+                name
+                for name in stats.keys() | self.stats.keys()
+                if stats.get(name) != self.stats.get(name)
+            }
+            if not changed_files:
+                return set()
+
+            settings_by_module = {
+                name: module_settings
+                for name, module_settings in self.settings_by_module.items()
+                if name in stats and name not in changed_files
+            }
+
+            if self.loader.lazy:
+                needed = set(self.loader.get_load_order(None))
+                self.load(settings_by_module, stats, needed & changed_files)
+                mode = self.loader.get_mode(settings_by_module)
+                needed.update(self.loader.get_load_order(mode))
+                self.load(settings_by_module, stats, needed - settings_by_module.keys())
+            else:
+                self.load(settings_by_module, stats, changed_files)
+
+            new_settings = self.loader.merge_settings(settings_by_module)
+            batch_secret_refs(new_settings.data)
+            if self.loader.schema is not None:
+                self.loader.schema.apply(new_settings)
+            changed_keys = get_changed_keys(self.settings.data, new_settings.data)
+
+            self.stats = stats
+            self.settings_by_module = settings_by_module
+            if isinstance(self.settings, LayeredSettings) and isinstance(new_settings, LayeredSettings):
+                # only the layers of the modules that were executed again are merged into the live settings
+                self.settings.set_layers(new_settings.layers.items(), atomic=True)
+            else:
+                self.settings.swap(new_settings.data)
+
+        if changed_keys:
+            for callback in list(self.subscribers):
+                callback(changed_keys)
+        return changed_keys
+
+    def load(self, settings_by_module, stats, module_names):
+        """ Executes each module in module_names that exists, storing its settings in settings_by_module """
+        for module_name in module_names:
+            if module_name in stats:
+                settings_by_module[module_name] = self.loader.load_module(
+                    self.package, module_name
+                )
+
+    def start(self):
+        """ Starts watching for changes in a background thread """
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        target = self.run_inotify if self.backend == "inotify" else self.run_poll
+        self.thread = threading.Thread(target=target, name=f"Watcher({self.package})", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ Stops the background thread started by start, and waits for it to finish """
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def safe_check(self):
+        """ check(), logging errors instead of raising them, for use in the background thread """
+        try:
+            self.check()
+        except Exception:  # pylint: disable=broad-except
+            # imported here, so only programs that watch their settings import logging
+            import logging
+
+            logging.getLogger(__name__).exception("Failed to reload settings package %s", self.package)
+
+    def run_poll(self):
+        """ Background loop for the poll backend """
+        while not self.stopping.wait(self.interval):
+            self.safe_check()
+
+    def run_inotify(self):
+        """ Background loop for the inotify backend """
+        from inotify_simple import INotify, flags  # pylint: disable=import-outside-toplevel
+
+        directory = os.path.join(self.loader.root, self.package)
+        with INotify() as inotify:
+            inotify.add_watch(
+                directory,
+                flags.CLOSE_WRITE | flags.CREATE | flags.DELETE | flags.MOVED_TO | flags.MOVED_FROM,
+            )
+            while not self.stopping.is_set():
+                events = inotify.read(timeout=int(self.interval * 1000))
+                if any(
+                    event.name.startswith(self.loader.prefix)
+                    and self.loader.split_module_path(event.name)[0] is not None
+                    for event in events
+                ):
+                    self.safe_check()
+
+    def __enter__(self):
+        """ Starts watching in the background """
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """ Stops watching """
+        self.stop()
@@ -3,6 +3,7 @@
 
 import pytest
 
+from enpyronments.providers import FileSecretProvider, default_registry
 from enpyronments.settings import Sensitive, Settings
 
 
@@ -25,6 +26,17 @@ test_values = [
 test_values.extend([Sensitive(x) for x in test_values])
 
 
+@pytest.fixture
+def secrets_dir(tmp_path):
+    """ Directory of secret files, read by file:// references in the default registry """
+    directory = tmp_path / "secrets"
+    directory.mkdir()
+    default_registry.register("file", FileSecretProvider(str(directory)))
+    yield directory
+    default_registry.unregister("file")
+    default_registry.cache.clear()
+
+
 @pytest.fixture(params=test_values, scope="module")
 def test_value(request):
     return request.param
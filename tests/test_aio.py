@@ -0,0 +1,180 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from enpyronments.aio import Deferred, ResolveError, resolve_settings
+from enpyronments.loader import Loader
+from enpyronments.schema import Schema
+from enpyronments.settings import Settings
+from enpyronments.trace import LoadTrace
+from enpyronments.utils import Sensitive
+
+settings_source = '''
+import asyncio
+import os
+
+from enpyronments.aio import Deferred
+from enpyronments.utils import Sensitive
+
+
+async def fetch(key, delay=0.0):
+    reader, writer = await asyncio.open_unix_connection(os.environ["ENPY_TEST_SOCKET"])
+    writer.write(f"{key} {delay}\\n".encode())
+    line = await reader.readline()
+    writer.close()
+    return line.decode().strip()
+
+
+MODE = "dev"
+PLAIN = "plain"
+'''
+
+
+class StubServer:
+    """ A local secrets agent on a Unix socket: answers "key delay" lines with "value-of-key" after delay seconds,
+    keeping track of how many requests it handles at once """
+
+    def __init__(self, path):
+        self.path = path
+        self.active = 0
+        self.max_active = 0
+        self.requests = []
+
+    async def handle(self, reader, writer):
+        key, delay = (await reader.readline()).decode().split()
+        self.requests.append(key)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(float(delay))
+        self.active -= 1
+        writer.write(f"value-of-{key}\n".encode())
+        await writer.drain()
+        writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_unix_server(self.handle, self.path)
+        return self
+
+    async def __aexit__(self, *args):
+        while self.active:
+            await asyncio.sleep(0.01)
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@pytest.fixture
+def socket_path(tmp_path, monkeypatch):
+    path = os.path.join(str(tmp_path), 'agent.sock')
+    monkeypatch.setenv('ENPY_TEST_SOCKET', path)
+    return path
+
+
+def write_package(tmp_path, name, settings):
+    directory = os.path.join(str(tmp_path), name)
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'env.py'), 'w') as f:
+        f.write(settings_source + settings)
+    return str(tmp_path)
+
+
+def test_aload_settings(tmp_path, socket_path):
+    root = write_package(tmp_path, 'async_settings', '''
+DB_PASSWORD = Sensitive(Deferred(fetch, "db_password"), stars=3)
+SLOW_1 = Deferred(fetch, "slow_1", 0.1)
+SLOW_2 = Deferred(fetch, "slow_2", 0.1)
+SLOW_3 = Deferred(fetch, "slow_3", 0.1)
+SLOW_4 = Deferred(fetch, "slow_4", 0.1)
+''')
+    loader = Loader(root, isolated=True)
+    trace = LoadTrace()
+
+    async def main():
+        async with StubServer(socket_path) as server:
+            start = time.perf_counter()
+            settings = await loader.aload_settings('async_settings', concurrency=2, trace=trace)
+            return settings, server, time.perf_counter() - start
+
+    settings, server, elapsed = run(main())
+    assert settings.db_password == 'value-of-db_password'
+    assert settings.masked()['DB_PASSWORD'] == '***'
+    assert isinstance(settings.data['DB_PASSWORD'], Sensitive)
+    assert settings.slow_4 == 'value-of-slow_4'
+    assert settings.plain == 'plain'
+    assert sorted(server.requests) == ['db_password', 'slow_1', 'slow_2', 'slow_3', 'slow_4']
+    assert server.max_active == 2
+    assert elapsed < 0.4
+    assert 'resolve' in trace.by_phase()
+
+
+def test_aload_settings_timeout(tmp_path, socket_path):
+    root = write_package(tmp_path, 'timeout_settings', '''
+FAST = Deferred(fetch, "fast")
+HANG = Deferred(fetch, "hang", 0.3, timeout=0.05)
+ALSO_HANG = Deferred(fetch, "also_hang", 0.3)
+''')
+
+    async def main():
+        async with StubServer(socket_path):
+            return await Loader(root, isolated=True).aload_settings('timeout_settings', timeout=0.1)
+
+    with pytest.raises(ResolveError) as raised:
+        run(main())
+    assert set(raised.value.errors) == {'HANG', 'ALSO_HANG'}
+    assert all(isinstance(error, asyncio.TimeoutError) for error in raised.value.errors.values())
+
+
+def test_aload_settings_schema(tmp_path, socket_path):
+    root = write_package(tmp_path, 'schema_settings', '''
+async def count():
+    return "3"
+
+COUNT = Deferred(count)
+''')
+    loader = Loader(root, isolated=True, schema=Schema({'COUNT': int}))
+    assert run(loader.aload_settings('schema_settings')).count == 3
+
+
+def test_deferred_sync(tmp_path, socket_path):
+    root = write_package(tmp_path, 'sync_settings', '''
+DB_PASSWORD = Sensitive(Deferred(fetch, "db_password"))
+''')
+
+    async def serve():
+        async with StubServer(socket_path):
+            await asyncio.sleep(0.5)
+
+    settings = Loader(root, isolated=True).load_settings('sync_settings')
+    assert settings.masked()['DB_PASSWORD'] == '*' * 10
+
+    # serve from another thread, and read the setting synchronously in this one
+    thread = threading.Thread(target=run, args=(serve(),))
+    thread.start()
+    time.sleep(0.1)
+    assert settings.db_password == 'value-of-db_password'
+    thread.join()
+
+
+def test_resolve_shared_awaitable():
+    calls = []
+
+    async def source():
+        calls.append(1)
+        return 'value'
+
+    coroutine = source()
+    deferred = Deferred(source)
+    settings = Settings(A=coroutine, B=coroutine, C=deferred, D=Sensitive(deferred))
+    run(resolve_settings(settings))
+    assert settings.get_many(['A', 'B', 'C', 'D']) == dict.fromkeys('ABCD', 'value')
+    assert len(calls) == 2
@@ -0,0 +1,224 @@
+"""Tests for the SnapshotCache class"""
+import os
+
+import pytest
+
+from enpyronments.__main__ import main
+from enpyronments.cache import BytecodeCache, SnapshotCache
+from enpyronments.loader import Loader
+from enpyronments.pool import LayerPool
+from enpyronments.settings import ConcurrentSettings
+from enpyronments.utils import Sensitive
+
+ENV = '''
+import os
+from enpyronments.utils import Sensitive
+
+with open(os.path.join(os.path.dirname(__file__), "executed.log"), "a") as f:
+    f.write("x")
+
+APP_NAME = "cached"
+SECRET_KEY = Sensitive("hunter2", stars=4)
+'''
+
+
+@pytest.fixture
+def package(tmp_path):
+    package_dir = tmp_path / 'cached_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.py').write_text(ENV)
+    (package_dir / 'env_local.py').write_text('MODE = "dev"\n')
+    return package_dir
+
+
+@pytest.fixture
+def loader(tmp_path):
+    cache = SnapshotCache(str(tmp_path / 'cache'), environ_keys=['ENPYRONMENTS_TEST_VAR'])
+    return Loader(str(tmp_path), cache=cache)
+
+
+def executions(package):
+    return len((package / 'executed.log').read_text())
+
+
+def test_warm_start_skips_execution(loader, package):
+    cold = loader.load_settings('cached_settings')
+    cold_executions = executions(package)
+    warm = loader.load_settings('cached_settings')
+
+    assert executions(package) == cold_executions
+    assert {key: warm[key] for key in warm} == {key: cold[key] for key in cold}
+    assert isinstance(warm.data['SECRET_KEY'], Sensitive)
+    assert warm.masked()['SECRET_KEY'] == '****'
+
+
+def test_warm_start_keeps_layers(loader, package):
+    (package / 'env_dev.py').write_text('DEBUG = True\n')
+    cold = loader.load_settings('cached_settings')
+    warm = loader.load_settings('cached_settings')
+
+    assert list(warm.layers) == list(cold.layers) == ['env', 'env_local', 'env_dev']
+    assert warm.source_of('DEBUG') == 'env_dev'
+    assert warm.source_of('APP_NAME') == 'env'
+    warm.replace_layer('env_dev_local', {'DEBUG': False})
+    assert warm['DEBUG'] is False
+
+
+def test_warm_start_shares_layers(tmp_path, package):
+    pool = LayerPool()
+    loader = Loader(str(tmp_path), cache=SnapshotCache(str(tmp_path / 'cache')), pool=pool)
+    loader.load_settings('cached_settings')
+    first = loader.load_settings('cached_settings')
+    second = loader.load_settings('cached_settings')
+    assert first.layers['env_local'] is second.layers['env_local']
+
+
+def test_warm_start_plain_settings(tmp_path, package):
+    cache = SnapshotCache(str(tmp_path / 'cache'))
+    loader = Loader(str(tmp_path), cache=cache, settings_class=ConcurrentSettings)
+    cold = loader.load_settings('cached_settings')
+    warm = loader.load_settings('cached_settings')
+    assert type(warm) is ConcurrentSettings
+    assert {key: warm[key] for key in warm} == {key: cold[key] for key in cold}
+    assert warm.masked() == cold.masked()
+
+
+def test_stale_snapshot_rebuilt(loader, package):
+    loader.load_settings('cached_settings')
+    (package / 'env_local.py').write_text('MODE = "prod"\n')
+
+    before = executions(package)
+    settings = loader.load_settings('cached_settings')
+    assert executions(package) > before
+    assert settings['MODE'] == 'prod'
+
+    before = executions(package)
+    loader.load_settings('cached_settings')
+    assert executions(package) == before
+
+
+def test_new_file_invalidates(loader, package):
+    loader.load_settings('cached_settings')
+    (package / 'env_dev.py').write_text('DEBUG = True\n')
+
+    settings = loader.load_settings('cached_settings')
+    assert settings['DEBUG'] is True
+
+
+def test_environ_invalidates(loader, package, monkeypatch):
+    loader.load_settings('cached_settings')
+    before = executions(package)
+    monkeypatch.setenv('ENPYRONMENTS_TEST_VAR', 'changed')
+    loader.load_settings('cached_settings')
+    assert executions(package) > before
+
+
+def test_corrupt_snapshot_rebuilt(loader, package):
+    loader.load_settings('cached_settings')
+    before = executions(package)
+    snapshot_path = loader.cache.get_snapshot_path(loader.root, 'cached_settings')
+    with open(snapshot_path, 'wb') as f:
+        f.write(b'garbage')
+
+    assert loader.load_settings('cached_settings')['APP_NAME'] == 'cached'
+    assert executions(package) > before
+
+
+def test_unpicklable_settings_warn(tmp_path):
+    package_dir = tmp_path / 'unpicklable_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.py').write_text('HANDLER = lambda: None\n')
+    loader = Loader(str(tmp_path), cache=SnapshotCache(str(tmp_path / 'cache')))
+
+    with pytest.warns(UserWarning):
+        settings = loader.load_settings('unpicklable_settings')
+    assert callable(settings['HANDLER'])
+    assert not (tmp_path / 'cache').exists()
+
+
+@pytest.mark.parametrize('setting', ['build', 'Lazy(build)', 'Sensitive(Lazy(build))'])
+def test_settings_package_objects_warn(tmp_path, setting):
+    package_dir = tmp_path / 'referencing_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.py').write_text(
+        f'from enpyronments.utils import Lazy, Sensitive\n\ndef build():\n    return 1\n\nBUILT = {setting}\n'
+    )
+    loader = Loader(str(tmp_path), cache=SnapshotCache(str(tmp_path / 'cache')))
+
+    with pytest.warns(UserWarning, match="couldn't be loaded back"):
+        loader.load_settings('referencing_settings')
+    assert not (tmp_path / 'cache').exists()
+
+
+def test_snapshot_not_loadable_warns(loader, package):
+    loader.load_settings('cached_settings')
+    snapshot_path = loader.cache.get_snapshot_path(loader.root, 'cached_settings')
+    with open(snapshot_path, 'wb') as f:
+        # a reference to a module that isn't importable
+        f.write(b'cmissing_settings_module\nbuild\n.')
+
+    with pytest.warns(UserWarning, match="can't be loaded"):
+        assert loader.load_settings('cached_settings')['APP_NAME'] == 'cached'
+
+
+def test_bytecode_cache(tmp_path, package):
+    cache = BytecodeCache(str(tmp_path / 'bytecode'))
+    source_path = str(package / 'env_local.py')
+    cache_path = cache.get_cache_path(source_path)
+
+    code = cache.get_code(source_path, b'MODE = "dev"\n')
+    cached = cache.get_code(source_path, b'MODE = "dev"\n')
+    assert os.path.isfile(cache_path)
+    assert cached.co_filename == source_path
+    namespace = {}
+    exec(cached, namespace)
+    assert namespace['MODE'] == 'dev'
+    assert cached is not code  # loaded back from disk
+
+    changed = cache.get_code(source_path, b'MODE = "prod"\n')
+    namespace = {}
+    exec(changed, namespace)
+    assert namespace['MODE'] == 'prod'
+
+
+def test_bytecode_cache_corrupt(tmp_path, package):
+    cache = BytecodeCache(str(tmp_path / 'bytecode'))
+    source_path = str(package / 'env_local.py')
+    cache.get_code(source_path, b'MODE = "dev"\n')
+    with open(cache.get_cache_path(source_path), 'r+b') as f:
+        f.seek(-4, os.SEEK_END)
+        f.write(b'\xff\xff\xff\xff')
+
+    namespace = {}
+    exec(cache.get_code(source_path, b'MODE = "dev"\n'), namespace)
+    assert namespace['MODE'] == 'dev'
+
+
+def test_bytecode_cache_unwritable(tmp_path, package):
+    blocker = tmp_path / 'not_a_directory'
+    blocker.write_text('')
+    cache = BytecodeCache(str(blocker))
+    code = cache.get_code(str(package / 'env_local.py'), b'MODE = "dev"\n')
+    assert code.co_filename == str(package / 'env_local.py')
+
+
+def test_isolated_loader_uses_bytecode_cache(tmp_path, package):
+    cache = BytecodeCache(str(tmp_path / 'bytecode'))
+    loader = Loader(str(tmp_path), isolated=True, bytecode_cache=cache)
+    assert loader.load_settings('cached_settings')['APP_NAME'] == 'cached'
+    assert os.path.isfile(cache.get_cache_path(str(package / 'env.py')))
+
+
+def test_bytecode_cache_requires_isolated(tmp_path):
+    with pytest.raises(ValueError):
+        Loader(str(tmp_path), bytecode_cache=BytecodeCache(str(tmp_path / 'bytecode')))
+
+
+def test_prewarm_cli(tmp_path, package, capsys):
+    cache_dir = str(tmp_path / 'bytecode')
+    main(['prewarm', str(tmp_path), 'cached_settings', '--cache-dir', cache_dir])
+
+    cache = BytecodeCache(cache_dir)
+    for name in ('env.py', 'env_local.py'):
+        assert os.path.isfile(cache.get_cache_path(str(package / name)))
+    assert 'env_local.py' in capsys.readouterr().out
@@ -0,0 +1,135 @@
+"""Tests for the compiler module"""
+import importlib.util
+import os
+import stat
+
+import pytest
+
+from enpyronments.__main__ import main
+from enpyronments.compiler import CompileError, compile_package, compile_settings, to_source
+from enpyronments.loader import Loader
+from enpyronments.providers import SecretRef
+from enpyronments.schema import Schema
+from enpyronments.settings import Settings
+from enpyronments.utils import Lazy, Sensitive
+
+ENV = '''
+from enpyronments.utils import Lazy, Sensitive
+
+APP_NAME = "compiled"
+DEBUG = False
+SECRET_KEY = Sensitive("hunter2", stars=4)
+HOSTS = ["a", "b"]
+LIMITS = {"rate": 1.5, "burst": (1, 2)}
+COMPUTED = Lazy(lambda: 6 * 7)
+'''
+
+
+def import_path(path, name='compiled_module'):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def package(tmp_path):
+    package_dir = tmp_path / 'compiled_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.py').write_text(ENV)
+    (package_dir / 'env_local.py').write_text('DEBUG = True\n')
+    return package_dir
+
+
+@pytest.mark.parametrize('val', [
+    None, True, 0, -3, 1.5, float('inf'), float('-inf'), 1 + 2j, 'text', b'bytes',
+    [], [1, [2]], (), (1,), (1, 'a'), set(), {3, 1, 2}, frozenset(), frozenset({'x'}), {'a': {'b': (1, None)}},
+])
+def test_to_source(val):
+    assert eval(to_source(val)) == val
+    assert type(eval(to_source(val))) is type(val)
+
+
+def test_to_source_nan():
+    nan = eval(to_source(float('nan')))
+    assert nan != nan
+
+
+@pytest.mark.parametrize('val', [object(), Settings, [1, object()], {'key': lambda: 1}])
+def test_to_source_invalid(val):
+    with pytest.raises(ValueError):
+        to_source(val)
+
+
+def test_compile_settings():
+    settings = Settings(
+        APP_NAME='app', SECRET=Sensitive('hunter2', stars=3), LAZY=Lazy(lambda: [1, 2]),
+        LAZY_SECRET=Sensitive(Lazy(lambda: 'lazy')),
+    )
+    namespace = {}
+    exec(compile_settings(settings), namespace)
+    assert namespace['APP_NAME'] == 'app'
+    assert namespace['SECRET'] == 'hunter2'
+    assert namespace['LAZY'] == [1, 2]
+    assert namespace['LAZY_SECRET'] == 'lazy'
+    assert namespace['__settings__'] == ('APP_NAME', 'SECRET', 'LAZY', 'LAZY_SECRET')
+    assert namespace['masked']() == settings.masked() == {
+        'APP_NAME': 'app', 'SECRET': '***', 'LAZY': [1, 2], 'LAZY_SECRET': '*' * 10,
+    }
+
+
+def test_compile_errors():
+    settings = {
+        'OK': 1,
+        'OBJECT': object(),
+        'NOT A NAME': 1,
+        'class': 1,
+        'masked': 1,
+        'REF': Sensitive(SecretRef('vault://db')),
+    }
+    with pytest.raises(CompileError) as error:
+        compile_settings(settings)
+    assert set(error.value.errors) == {'OBJECT', 'NOT A NAME', 'class', 'masked', 'REF'}
+
+
+def test_compile_schema_secret_ref(tmp_path, secrets_dir):
+    secret = secrets_dir / 'port'
+    secret.write_text('6000\n')
+    package_dir = tmp_path / 'ref_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.py').write_text(
+        'from enpyronments.utils import Sensitive\nPORT = Sensitive.ref("file://port")\n'
+    )
+    settings = Loader(str(tmp_path), isolated=True, schema=Schema({'PORT': int})).load_settings('ref_settings')
+    with pytest.raises(CompileError) as error:
+        compile_settings(settings)
+    assert set(error.value.errors) == {'PORT'}
+    assert not settings.get('PORT', extract_from_sensitive=False).obj.evaluated
+
+    # a ref wrapped by a schema's Lazy, however it got there, is still refused
+    coerced = Schema({'PORT': int}).coerce({'PORT': Lazy(lambda: 1)})['PORT']
+    coerced.wrapped = SecretRef('vault://port')
+    with pytest.raises(CompileError):
+        compile_settings({'PORT': coerced})
+
+
+def test_compile_package(tmp_path, package):
+    path = str(tmp_path / 'settings_module.py')
+    settings = compile_package(Loader(str(tmp_path)), 'compiled_settings', path)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    module = import_path(path)
+    for key in settings:
+        assert getattr(module, key) == settings[key]
+    assert module.DEBUG is True
+    assert module.COMPUTED == 42
+    assert module.__sensitive__ == {'SECRET_KEY': 4}
+    assert module.masked() == settings.masked()
+    assert 'enpyronments' not in open(path).read().split('"""')[-1]
+
+
+def test_compile_cli(tmp_path, package, capsys):
+    path = str(tmp_path / 'cli_module.py')
+    main(['compile', str(tmp_path), 'compiled_settings', '--output', path])
+    assert import_path(path).APP_NAME == 'compiled'
+    assert 'compiled 6 settings' in capsys.readouterr().out
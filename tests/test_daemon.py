@@ -0,0 +1,152 @@
+"""Tests for the daemon module"""
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from enpyronments.daemon import SettingsClient, SettingsDaemon
+from enpyronments.loader import Loader
+from enpyronments.settings import SettingNotFound
+from enpyronments.utils import Sensitive
+
+ENV = '''
+from enpyronments.utils import Lazy, Sensitive
+
+APP_NAME = "served"
+DEBUG = False
+SECRET_KEY = Sensitive("hunter2", stars=4)
+COMPUTED = Lazy(lambda: 6 * 7)
+'''
+
+
+def write(path, text):
+    """ Write text to path, making sure the mtime moves forward """
+    mtime = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(text)
+    os.utime(str(path), ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def package(tmp_path):
+    package_dir = tmp_path / 'served_settings'
+    package_dir.mkdir()
+    write(package_dir / 'env.py', ENV)
+    write(package_dir / 'env_local.py', 'MODE = "dev"\n')
+    return package_dir
+
+
+@pytest.fixture
+def daemon(tmp_path, package):
+    daemon = SettingsDaemon(
+        Loader(str(tmp_path), isolated=True), 'served_settings', str(tmp_path / 'settings.sock'), interval=0.02
+    )
+    with daemon:
+        yield daemon
+
+
+def test_socket(daemon):
+    assert stat.S_ISSOCK(os.stat(daemon.path).st_mode)
+    assert stat.S_IMODE(os.stat(daemon.path).st_mode) == 0o600
+    daemon.stop()
+    assert not os.path.exists(daemon.path)
+
+
+def test_client_reads(daemon):
+    with SettingsClient(daemon.path) as client:
+        assert client['APP_NAME'] == 'served'
+        assert client.debug is False
+        assert client['SECRET_KEY'] == 'hunter2'
+        assert isinstance(client.get('SECRET_KEY', extract_from_sensitive=False), Sensitive)
+        assert client['COMPUTED'] == 42
+        assert 'NOPE' not in client
+        assert client.get('NOPE', 'default') == 'default'
+        with pytest.raises(KeyError):
+            client['NOPE']
+        with pytest.raises(SettingNotFound):
+            client.nope
+        assert list(client) == list(daemon.settings)
+        assert len(client) == 5
+        assert dict(client.items()) == dict(daemon.settings.items())
+        assert client.masked() == {
+            'APP_NAME': 'served', 'DEBUG': False, 'SECRET_KEY': '****', 'COMPUTED': 42, 'MODE': 'dev',
+        }
+
+
+def test_client_cache(daemon):
+    requests = []
+    with SettingsClient(daemon.path) as client:
+        request = client.request
+
+        def counting_request(op, *args):
+            requests.append(op)
+            return request(op, *args)
+
+        client.request = counting_request
+        for _ in range(3):
+            assert client['APP_NAME'] == 'served'
+            assert 'NOPE' not in client
+        assert requests == ['get', 'get']
+
+
+def test_invalidation(daemon, package):
+    with SettingsClient(daemon.path) as client, SettingsClient(daemon.path) as other:
+        assert client['APP_NAME'] == 'served'
+        assert client['DEBUG'] is False
+        assert 'WORKERS' not in client
+        changes = []
+        client.subscribe(changes.append)
+
+        write(package / 'env_local.py', 'MODE = "dev"\nAPP_NAME = "reloaded"\nWORKERS = 4\n')
+        wait_for(lambda: changes)
+        assert changes == [{'APP_NAME', 'WORKERS'}]
+        assert client['APP_NAME'] == 'reloaded'
+        assert client['WORKERS'] == 4
+        assert client['DEBUG'] is False
+        assert other['APP_NAME'] == 'reloaded'
+
+
+def test_stale_reply_not_cached(daemon):
+    with SettingsClient(daemon.path) as client:
+        # a reply to a request sent before an invalidation is used, but not cached
+        client.version -= 1
+        assert client['APP_NAME'] == 'served'
+        assert 'APP_NAME' not in client.cache
+
+
+def test_daemon_stopped(daemon):
+    client = SettingsClient(daemon.path)
+    assert client['APP_NAME'] == 'served'
+    daemon.stop()
+    client.thread.join(5)
+    with pytest.raises(ConnectionError):
+        client['APP_NAME']
+    client.close()
+
+
+def test_concurrent_clients(daemon):
+    errors = []
+
+    def read():
+        try:
+            with SettingsClient(daemon.path) as client:
+                for _ in range(50):
+                    assert client['APP_NAME'] == 'served'
+                    client.cache.clear()
+        except Exception as e:  # pylint: disable=broad-except
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
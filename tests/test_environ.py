@@ -0,0 +1,146 @@
+"""Tests for exporting settings to the environment"""
+import os
+
+import pytest
+
+from enpyronments.environ import (
+    EnvironExporter,
+    build_environ_layer,
+    coerce_environ_value,
+    get_prefixed_environ,
+    to_environ_value,
+)
+from enpyronments.settings import ConcurrentSettings, Settings
+from enpyronments.utils import Sensitive
+
+
+class RecordingEnviron(dict):
+    """ A dict that records every key written to it """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writes = []
+
+    def __setitem__(self, key, val):
+        self.writes.append(key)
+        super().__setitem__(key, val)
+
+
+@pytest.mark.parametrize(
+    "val, expected",
+    [
+        ("text", "text"),
+        (b"bytes", "bytes"),
+        (True, "True"),
+        (3, "3"),
+        (1.5, "1.5"),
+        ([1, "two"], '[1, "two"]'),
+        ({"a": 1}, '{"a": 1}'),
+        (None, None),
+    ],
+)
+def test_to_environ_value(val, expected):
+    assert to_environ_value(val) == expected
+
+
+@pytest.mark.parametrize(
+    "sensitive, expected", [("unwrap", "hunter2"), ("mask", "*" * 10), ("exclude", None)],
+)
+def test_export_sensitive(sensitive, expected):
+    environ = {}
+    Settings(SECRET=Sensitive("hunter2"), DEBUG=True).export_environ(sensitive, environ)
+    assert environ.get("SECRET") == expected
+    assert environ["DEBUG"] == "True"
+
+
+def test_export_bad_policy():
+    with pytest.raises(ValueError):
+        Settings(A=1).export_environ("reveal", {})
+
+
+def test_export_only_changes():
+    environ = RecordingEnviron(UNRELATED="1")
+    settings = Settings(A=1, B="b", C=None)
+    assert settings.export_environ(environ=environ) == {"A", "B"}
+    assert settings.export_environ(environ=environ) == set()
+
+    settings["B"] = "b"
+    settings["A"] = 2
+    environ.writes.clear()
+    assert settings.export_environ(environ=environ) == {"A"}
+    assert environ.writes == ["A"]
+
+    del settings["B"]
+    assert settings.export_environ(environ=environ) == {"B"}
+    assert environ == {"UNRELATED": "1", "A": "2"}
+
+
+def test_export_after_swap():
+    environ = {}
+    settings = ConcurrentSettings(A=1)
+    settings.export_environ(environ=environ)
+    settings.swap({"A": 1, "B": 2})
+    assert settings.export_environ(environ=environ) == {"B"}
+    settings.update(A=3)
+    assert settings.export_environ(environ=environ) == {"A"}
+    assert environ == {"A": "3", "B": "2"}
+
+
+def test_child_environ_cached():
+    base = {"PATH": "/bin"}
+    settings = Settings(A=1, SECRET=Sensitive("hunter2"))
+    child_environ = settings.child_environ(base=base)
+    assert child_environ == {"PATH": "/bin", "A": "1", "SECRET": "hunter2"}
+    assert settings.child_environ(base=base) is child_environ
+    assert "SECRET" not in settings.child_environ("exclude", base=base)
+
+    settings["A"] = 2
+    assert settings.child_environ(base=base)["A"] == "2"
+
+    base["HOME"] = "/root"
+    assert "HOME" not in settings.child_environ(base=base)
+    assert settings.child_environ(base=base, refresh=True)["HOME"] == "/root"
+
+
+def test_save_to_environ_uses_os_environ(monkeypatch):
+    monkeypatch.delenv("ENPY_TEST_EXPORT", raising=False)
+    settings = Settings(ENPY_TEST_EXPORT=[1, 2])
+    settings.save_to_environ()
+    assert os.environ["ENPY_TEST_EXPORT"] == "[1, 2]"
+    del settings["ENPY_TEST_EXPORT"]
+    settings.save_to_environ()
+    assert "ENPY_TEST_EXPORT" not in os.environ
+
+
+def test_get_prefixed_environ():
+    environ = {"APP_DEBUG": "1", "APP_": "empty", "APPLE": "no", "DEBUG": "no"}
+    assert get_prefixed_environ("APP_", environ) == {"DEBUG": "1"}
+
+
+@pytest.mark.parametrize(
+    "raw, existing, expected",
+    [
+        ("off", True, False),
+        ("8", 1, 8),
+        ("2.5", 1.0, 2.5),
+        ("a, b", ["x"], ["a", "b"]),
+        ('["a", 1]', ["x"], ["a", 1]),
+        ("a,b", ("x",), ("a", "b")),
+        ('{"a": 1}', {}, {"a": 1}),
+        ("text", None, "text"),
+        ("text", b"", b"text"),
+    ],
+)
+def test_coerce_environ_value(raw, existing, expected):
+    coerced = coerce_environ_value(raw, existing)
+    assert coerced == expected and type(coerced) is type(expected)
+
+
+def test_environ_round_trip():
+    settings = Settings({"DEBUG": False, "HOSTS": ["a", "b"], "LIMITS": {"rate": 2}, "KEY": Sensitive(12, stars=2)})
+    variables = EnvironExporter(settings).serialize()
+    layer = build_environ_layer(variables, [("env", dict(settings.data))])
+    assert {key: layer[key] for key in ("DEBUG", "HOSTS", "LIMITS")} == {
+        "DEBUG": False, "HOSTS": ["a", "b"], "LIMITS": {"rate": 2}
+    }
+    assert layer["KEY"].obj == 12 and layer["KEY"].stars == 2
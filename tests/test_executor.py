@@ -0,0 +1,99 @@
+"""Tests for the FileExecutor class and isolated loading"""
+import os
+import sys
+import threading
+
+import pytest
+
+from enpyronments.executor import FileExecutor
+from enpyronments.loader import Loader
+from enpyronments.utils import Sensitive
+
+sample_apps_root = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_apps'
+)
+
+
+@pytest.fixture
+def package(tmp_path):
+    package_dir = tmp_path / 'isolated_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.py').write_text(
+        'from enpyronments.utils import Sensitive\n'
+        'APP_NAME = "isolated"\n'
+        'SECRET = Sensitive("hunter2")\n'
+    )
+    (package_dir / 'env_local.py').write_text('MODE = "dev"\n')
+    (package_dir / 'helpers.py').write_text('def shout(text):\n    return text.upper()\n')
+    (package_dir / 'env_dev.py').write_text(
+        'import isolated_settings.env\n'
+        'from . import helpers\n'
+        'from .env import APP_NAME\n'
+        'from isolated_settings.env import SECRET\n'
+        'APP_NAME = helpers.shout(APP_NAME)\n'
+        'SAME_ENV = isolated_settings.env.SECRET is SECRET\n'
+    )
+    return package_dir
+
+
+@pytest.mark.parametrize('app', ['environment_variables', 'local_settings', 'mode_dev', 'mode_prod'])
+def test_isolated_matches_import(app):
+    root = os.path.join(sample_apps_root, app)
+    imported = Loader(root).load_settings('settings')
+    isolated = Loader(root, isolated=True).load_settings('settings')
+    assert {key: isolated[key] for key in isolated} == {key: imported[key] for key in imported}
+
+
+def test_isolated_leaves_import_state(tmp_path, package):
+    path_before = list(sys.path)
+    modules_before = set(sys.modules)
+
+    settings = Loader(str(tmp_path), isolated=True).load_settings('isolated_settings')
+
+    assert settings['APP_NAME'] == 'ISOLATED'
+    assert settings['SAME_ENV'] is True
+    assert isinstance(settings.data['SECRET'], Sensitive)
+    assert sys.path == path_before
+    assert not {name for name in set(sys.modules) - modules_before if 'isolated_settings' in name}
+
+
+def test_execute_once(tmp_path, package):
+    executor = FileExecutor(str(tmp_path), 'isolated_settings')
+    env = executor.execute('env')
+    executor.execute('env_dev')
+    assert executor.execute('env') is env
+
+
+def test_missing_module(tmp_path, package):
+    (package / 'env_prod.py').write_text('from isolated_settings.nope import X\n')
+    executor = FileExecutor(str(tmp_path), 'isolated_settings')
+    with pytest.raises(ModuleNotFoundError):
+        executor.execute('env_prod')
+    assert 'env_prod' not in executor.modules
+
+
+def test_parallel_same_package_name(tmp_path):
+    roots = []
+    for i in range(8):
+        package_dir = tmp_path / str(i) / 'settings'
+        package_dir.mkdir(parents=True)
+        (package_dir / 'env.py').write_text(f'TENANT = {i}\n')
+        (package_dir / 'env_local.py').write_text('from settings.env import TENANT\nDOUBLE = TENANT * 2\n')
+        roots.append(str(tmp_path / str(i)))
+
+    results = {}
+
+    def load(root):
+        for _ in range(20):
+            results.setdefault(root, []).append(
+                dict(Loader(root, isolated=True).load_settings('settings').data)
+            )
+
+    threads = [threading.Thread(target=load, args=(root,)) for root in roots]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for i, root in enumerate(roots):
+        assert all(result == {'TENANT': i, 'DOUBLE': i * 2} for result in results[root])
@@ -0,0 +1,102 @@
+"""Tests for declarative settings formats"""
+import json
+
+import pytest
+
+from enpyronments.formats import (
+    default_formats,
+    get_toml_loader,
+    parse_dotenv,
+    parse_dotenv_value,
+    parse_json,
+    parse_toml,
+)
+from enpyronments.loader import Loader
+
+
+@pytest.fixture
+def toml():
+    """ Skips the test unless a TOML parser is available (tomllib is only included with Python 3.11+) """
+    try:
+        return get_toml_loader()
+    except ImportError as e:
+        pytest.skip(str(e))
+
+
+@pytest.fixture
+def package(tmp_path):
+    package_dir = tmp_path / 'mixed_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.toml').write_text(
+        'APP_NAME = "from toml"\nLINES_TO_PRINT = 10\nDEBUG = false\nlowercase = "ignored"\n'
+        '[DATABASE]\nHOST = "localhost"\nPORT = 5432\n'
+    )
+    (package_dir / 'env.py').write_text('LINES_TO_PRINT = 20\n')
+    (package_dir / 'env_local.env').write_text(
+        '# local overrides\nexport MODE=prod\nGREETING="hello\\nworld"\nRAW=\'$HOME\'\nNOTE=plain # comment\n'
+    )
+    (package_dir / 'env_prod.json').write_text(json.dumps({'DEBUG': False, 'WORKERS': 8}))
+    (package_dir / 'env_dev.json').write_text('{"DEBUG": true}')
+    (package_dir / 'env_notes.txt').write_text('not settings')
+    return package_dir
+
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True}, {'isolated': True}])
+def test_mixed_formats(tmp_path, package, toml, options):
+    settings = Loader(str(tmp_path), formats=default_formats, **options).load_settings('mixed_settings')
+
+    assert settings['APP_NAME'] == 'from toml'
+    # env.py is merged after env.toml
+    assert settings['LINES_TO_PRINT'] == 20
+    assert settings['MODE'] == 'prod'
+    assert settings['WORKERS'] == 8
+    assert settings['DEBUG'] is False
+    assert settings['DATABASE'] == {'HOST': 'localhost', 'PORT': 5432}
+    assert settings['GREETING'] == 'hello\nworld'
+    assert settings['RAW'] == '$HOME'
+    assert settings['NOTE'] == 'plain'
+    assert 'lowercase' not in settings
+
+
+def test_formats_opt_in(tmp_path, package):
+    settings = Loader(str(tmp_path)).load_settings('mixed_settings')
+    assert dict(settings.data) == {'LINES_TO_PRINT': 20}
+
+
+def test_module_names(tmp_path, package):
+    loader = Loader(str(tmp_path), formats=default_formats)
+    assert sorted(loader.get_module_names('mixed_settings')) == ['env', 'env_dev', 'env_local', 'env_prod']
+
+
+def test_parse_json_requires_object(tmp_path):
+    path = tmp_path / 'env.json'
+    path.write_text('[1, 2]')
+    with pytest.raises(ValueError):
+        parse_json(str(path))
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('"quoted" # comment', 'quoted'),
+    ("'single' #comment", 'single'),
+    ('"a # b"', 'a # b'),
+    ('"say \\"hi\\"" # comment', 'say "hi"'),
+    ('"a"b"', 'a"b'),
+    ('plain # comment', 'plain'),
+    ('"unclosed', '"unclosed'),
+    ('""', ''),
+])
+def test_parse_dotenv_value(value, expected):
+    assert parse_dotenv_value(value) == expected
+
+
+def test_parse_dotenv_invalid_line(tmp_path):
+    path = tmp_path / 'env.env'
+    path.write_text('JUST_A_KEY\n')
+    with pytest.raises(ValueError):
+        parse_dotenv(str(path))
+
+
+def test_parse_toml(tmp_path, toml):
+    path = tmp_path / 'env.toml'
+    path.write_text('KEY = [1, 2]\n')
+    assert parse_toml(str(path)) == {'KEY': [1, 2]}
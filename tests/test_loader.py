@@ -1,7 +1,22 @@
+import os
+import pickle
+import re
+import subprocess
+import sys
+import types
 from importlib import import_module
 
 import pytest
 
+from enpyronments.loader import Loader, default_attribute_pattern, default_builtin_pattern
+from enpyronments.schema import SchemaError
+from enpyronments.settings import ConcurrentSettings
+from enpyronments.utils import Sensitive
+
+sample_apps_root = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_apps'
+)
+
 sample_apps = [
     'environment_variables',
     'local_settings',
@@ -33,3 +48,168 @@ def test_sample_app(sample_app):
     actual, expected = get_settings(sample_app)
     for key, val in expected.items():
         assert actual[key] == val
+
+@pytest.mark.parametrize('app', ['mode_dev', 'mode_prod'])
+def test_lazy_matches_eager(app):
+    root = os.path.join(sample_apps_root, app)
+    eager = Loader(root).load_settings('settings')
+    lazy = Loader(root, lazy=True).load_settings('settings')
+    assert {key: lazy[key] for key in lazy} == {key: eager[key] for key in eager}
+
+def test_lazy_skips_other_modes(tmp_path):
+    package = tmp_path / 'lazy_settings'
+    package.mkdir()
+    (package / 'env.py').write_text('APP_NAME = "lazy"\n')
+    (package / 'env_local.py').write_text('MODE = "dev"\n')
+    (package / 'env_dev.py').write_text('DEBUG = True\n')
+    (package / 'env_prod.py').write_text('raise RuntimeError("prod settings executed")\n')
+    (package / 'env_prod_local.py').write_text('raise RuntimeError("prod settings executed")\n')
+
+    settings = Loader(str(tmp_path), lazy=True).load_settings('lazy_settings')
+    assert settings['APP_NAME'] == 'lazy'
+    assert settings['DEBUG'] is True
+
+    with pytest.raises(RuntimeError):
+        Loader(str(tmp_path)).load_settings('lazy_settings')
+
+attribute_names = [
+    'DEBUG', 'APP_NAME', 'KEY_10', '_PRIVATE', '____', '__ALL__', '__init__', '__a__', 'lower', 'Mixed',
+    'UNICODÉ', 'A-B', '', '_', '0',
+]
+
+@pytest.mark.parametrize('key', attribute_names)
+def test_default_attribute_filter_matches_patterns(key):
+    loader = Loader('.')
+    expected = (
+        not re.match(default_builtin_pattern, key)
+        and bool(re.match(default_attribute_pattern, key))
+    )
+    assert loader.attribute_filter(key) == expected
+
+def test_custom_patterns():
+    module = types.ModuleType('custom')
+    module.__dict__.update({'setting_one': 1, 'SETTING_TWO': 2, '_private': 3})
+
+    loader = Loader('.', attribute_pattern=re.compile(r'^[a-z][a-z_]*$'))
+    assert dict(loader.get_module_attrs(module)) == {'setting_one': 1}
+
+def test_attribute_filter():
+    module = types.ModuleType('custom')
+    module.__dict__.update({'setting_one': 1, 'SETTING_TWO': 2})
+
+    loader = Loader('.', attribute_filter=lambda key: key.endswith('one'))
+    assert dict(loader.get_module_attrs(module)) == {'setting_one': 1}
+
+def test_settings_class():
+    root = os.path.join(sample_apps_root, 'mode_dev')
+    settings = Loader(root, settings_class=ConcurrentSettings).load_settings('settings')
+    assert isinstance(settings, ConcurrentSettings)
+    assert settings.app_name == 'enpyronments <dev>'
+
+def test_provenance():
+    root = os.path.join(sample_apps_root, 'mode_dev')
+    settings = Loader(root).load_settings('settings')
+    for key in settings:
+        assert settings.source_of(key) in ('env', 'env_local', 'env_dev', 'env_dev_local')
+        assert settings.explain(key)[-1][0] == settings.source_of(key)
+
+@pytest.fixture
+def tenants(tmp_path):
+    for i in range(6):
+        package_dir = tmp_path / f'tenant_{i}'
+        package_dir.mkdir()
+        (package_dir / 'env.py').write_text(f'TENANT = {i}\n')
+        (package_dir / 'env_local.py').write_text(f'from tenant_{i}.env import TENANT\nDOUBLE = TENANT * 2\n')
+    (tmp_path / 'tenant_3' / 'env_local.py').write_text('raise ValueError("broken tenant")\n')
+    return str(tmp_path), [f'tenant_{i}' for i in range(6)]
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_load_many(tenants, processes):
+    root, packages = tenants
+    results = Loader(root, attribute_pattern=r'^[A-Z]+$').load_many(packages, max_workers=3, processes=processes)
+
+    assert set(results) == set(packages) - {'tenant_3'}
+    assert isinstance(results.errors['tenant_3'], ValueError)
+    for i in (0, 1, 2, 4, 5):
+        assert dict(results[f'tenant_{i}'].data) == {'TENANT': i, 'DOUBLE': i * 2}
+
+def test_loader_pickle():
+    loader = Loader('.', attribute_pattern=r'^[a-z]+$')
+    clone = pickle.loads(pickle.dumps(loader))
+    assert clone.attribute_filter('debug') and not clone.attribute_filter('DEBUG')
+    assert clone.get_config() == loader.get_config()
+
+ENVIRON_ENV = '''
+from enpyronments.utils import Sensitive
+
+DEBUG = True
+WORKERS = 2
+RATIO = 0.5
+HOSTS = ["a.example.com"]
+DATABASE = {"host": "localhost", "port": 5432, "password": Sensitive("dev", stars=3)}
+SECRET_KEY = Sensitive("hunter2", stars=4)
+'''
+
+@pytest.fixture
+def environ_package(tmp_path):
+    package_dir = tmp_path / 'environ_settings'
+    package_dir.mkdir()
+    (package_dir / 'env.py').write_text(ENVIRON_ENV)
+    (package_dir / 'env_prod.py').write_text('WORKERS = 8\n')
+    return str(tmp_path)
+
+def test_environ_layer(environ_package, monkeypatch):
+    for name, val in {
+        'APP_DEBUG': 'false', 'APP_WORKERS': '4', 'APP_RATIO': '0.75', 'APP_HOSTS': 'b.example.com, c.example.com',
+        'APP_DATABASE__HOST': 'db.example.com', 'APP_DATABASE__PORT': '6543', 'APP_DATABASE__PASSWORD': 'prod',
+        'APP_SECRET_KEY': 'swordfish', 'APP_NEW_SETTING': 'new', 'APP_lowercase': 'ignored', 'OTHER_DEBUG': 'false',
+    }.items():
+        monkeypatch.setenv(name, val)
+    loader = Loader(environ_package, isolated=True, environ_prefix='APP_')
+    assert loader.get_load_order(None)[-1] == Loader.environ_layer
+    settings = loader.load_settings('environ_settings')
+
+    assert settings['DEBUG'] is False
+    assert settings['WORKERS'] == 4
+    assert settings['RATIO'] == 0.75
+    assert settings['HOSTS'] == ['b.example.com', 'c.example.com']
+    assert settings['NEW_SETTING'] == 'new'
+    assert 'lowercase' not in settings
+    database = settings['DATABASE']
+    assert (database['host'], database['port'], database['password'].obj) == ('db.example.com', 6543, 'prod')
+    assert database['password'].stars == 3
+    secret_key = settings.get('SECRET_KEY', extract_from_sensitive=False)
+    assert isinstance(secret_key, Sensitive) and secret_key.stars == 4
+    assert settings['SECRET_KEY'] == 'swordfish'
+    assert settings.source_of('DEBUG') == Loader.environ_layer
+    assert settings.source_of('DATABASE') == Loader.environ_layer
+    # the settings file's namespace isn't modified
+    assert settings.layers['env']['DATABASE']['host'] == 'localhost'
+
+def test_environ_mode(environ_package, monkeypatch):
+    monkeypatch.setenv('APP_MODE', 'prod')
+    settings = Loader(environ_package, lazy=True, environ_prefix='APP_').load_settings('environ_settings')
+    assert settings['MODE'] == 'prod'
+    assert settings['WORKERS'] == 8
+    assert settings.source_of('WORKERS') == 'env_prod'
+
+def test_environ_errors(environ_package, monkeypatch):
+    monkeypatch.setenv('APP_WORKERS', 'many')
+    monkeypatch.setenv('APP_DEBUG', 'maybe')
+    monkeypatch.setenv('APP_WORKERS__MAX', '1')
+    with pytest.raises(SchemaError) as info:
+        Loader(environ_package, isolated=True, environ_prefix='APP_').load_settings('environ_settings')
+    assert set(info.value.errors) == {'WORKERS', 'DEBUG', 'WORKERS__MAX'}
+
+def test_environ_config(monkeypatch):
+    loader = Loader('.', environ_prefix='APP_')
+    config = loader.get_config()
+    monkeypatch.setenv('APP_DEBUG', 'false')
+    assert loader.get_config() != config
+
+def test_import_skips_heavy_modules():
+    heavy = {"asyncio", "logging", "multiprocessing", "pickle", "socket", "tempfile"}
+    code = f'import sys, enpyronments; print(" ".join(sorted({heavy!r} & set(sys.modules))))'
+    root = os.path.dirname(sample_apps_root)
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, stdout=subprocess.PIPE, check=True).stdout
+    assert output.decode().strip() == ''
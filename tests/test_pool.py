@@ -0,0 +1,88 @@
+"""Tests for the pool module"""
+import pickle
+
+import pytest
+
+from enpyronments.loader import Loader
+from enpyronments.pool import LayerPool, get_value_key
+from enpyronments.utils import Sensitive
+
+ENV = '''
+APP_NAME = "tenant"
+HOSTS = ["a.example.com", "b.example.com"]
+LIMITS = {"rate": 1.5, "burst": (1, 2)}
+'''
+
+
+def fresh(text):
+    """ An equal string that isn't the same object """
+    return ''.join(list(text))
+
+
+@pytest.mark.parametrize('first, second', [
+    (1, 1.0), (1, True), (0.0, -0.0), ((1,), (1.0,)), ([1], (1,)), ({1}, frozenset({1})),
+    (Sensitive('a', stars=3), Sensitive('a')), ({'a': 1}, {'a': True}),
+])
+def test_value_keys_differ(first, second):
+    assert get_value_key(first) != get_value_key(second)
+
+
+@pytest.mark.parametrize('val', [object(), [object()], {'key': lambda: 1}, Sensitive(object())])
+def test_value_key_none(val):
+    assert get_value_key(val) is None
+
+
+def test_share_layer():
+    pool = LayerPool()
+    first = pool.share_layer({fresh('APP_NAME'): fresh('app'), 'HOSTS': ['a', 'b']})
+    second = pool.share_layer({fresh('APP_NAME'): fresh('app'), 'HOSTS': ['a', 'b']})
+    assert first is second
+    assert first == {'APP_NAME': 'app', 'HOSTS': ['a', 'b']}
+    assert len(pool) == 1
+
+    other = pool.share_layer({fresh('APP_NAME'): fresh('app'), 'DEBUG': True})
+    assert other is not first
+    assert next(iter(other)) is next(iter(first))
+    assert other['APP_NAME'] is first['APP_NAME']
+    assert len(pool) == 2
+
+
+def test_share_layer_not_comparable():
+    pool = LayerPool()
+    obj = object()
+    first = pool.share_layer({'APP_NAME': fresh('app'), 'OBJECT': obj})
+    second = pool.share_layer({'APP_NAME': fresh('app'), 'OBJECT': obj})
+    assert first is not second
+    assert first['APP_NAME'] is second['APP_NAME']
+    assert len(pool) == 0
+
+
+def test_clear_and_pickle():
+    pool = LayerPool()
+    pool.share_layer({'A': 1})
+    assert len(pickle.loads(pickle.dumps(pool))) == 0
+    pool.clear()
+    assert len(pool) == 0
+    assert pool.values == {}
+
+
+def test_loader_pool(tmp_path):
+    for i in range(3):
+        package_dir = tmp_path / f'pooled_tenant_{i}'
+        package_dir.mkdir()
+        (package_dir / 'env.py').write_text(ENV)
+        (package_dir / 'env_local.py').write_text(f'TENANT = {i}\n')
+
+    pool = LayerPool()
+    loader = Loader(str(tmp_path), isolated=True, pool=pool)
+    tenants = [loader.load_settings(f'pooled_tenant_{i}') for i in range(3)]
+    assert [settings['TENANT'] for settings in tenants] == [0, 1, 2]
+    assert tenants[0].layers['env'] is tenants[1].layers['env'] is tenants[2].layers['env']
+    assert tenants[0]['HOSTS'] is tenants[2]['HOSTS']
+    assert len(pool) == 4
+
+    # writes don't reach the shared layers
+    tenants[0]['APP_NAME'] = 'changed'
+    del tenants[0]['HOSTS']
+    assert tenants[1]['APP_NAME'] == 'tenant'
+    assert tenants[1]['HOSTS'] == ['a.example.com', 'b.example.com']
@@ -0,0 +1,184 @@
+import os
+import pickle
+
+import pytest
+
+from enpyronments.cache import SnapshotCache
+from enpyronments.loader import Loader
+from enpyronments.providers import (
+    FileSecretProvider,
+    SecretCache,
+    SecretNotFound,
+    SecretProvider,
+    SecretRef,
+    SecretRegistry,
+    default_registry,
+)
+from enpyronments.settings import Settings
+from enpyronments.utils import Sensitive
+
+
+class CountingProvider(SecretProvider):
+    """ Returns "secret-{path}" for every path but "missing", recording each call """
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch_many(self, paths):
+        self.calls.append(sorted(paths))
+        return {path: f'secret-{path}' for path in paths if path != 'missing'}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def provider():
+    provider = CountingProvider()
+    default_registry.register('test', provider)
+    yield provider
+    default_registry.unregister('test')
+    default_registry.cache.clear()
+
+
+def test_file_provider(tmp_path):
+    directory = str(tmp_path)
+    os.makedirs(os.path.join(directory, 'db'))
+    with open(os.path.join(directory, 'db', 'primary'), 'w') as f:
+        f.write('hunter2\n')
+    provider = FileSecretProvider(directory)
+    assert provider.fetch_many(['db/primary', 'db/missing']) == {'db/primary': 'hunter2'}
+    assert provider.fetch('/db/primary') == 'hunter2'
+    with pytest.raises(SecretNotFound):
+        provider.fetch('db/missing')
+    with pytest.raises(ValueError):
+        provider.fetch('../outside')
+
+
+def test_cache_ttl_and_lru():
+    clock = Clock()
+    cache = SecretCache(ttl=10, max_size=2, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None  # least recently used
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    clock.now = 10
+    assert cache.get('a', 'expired') == 'expired'
+
+
+def test_ref_resolves_lazily(provider):
+    settings = Settings(DB_PASSWORD=Sensitive.ref('test://db/primary', stars=3), APP='app')
+    assert settings.masked() == {'DB_PASSWORD': '***', 'APP': 'app'}
+    assert provider.calls == []
+    assert settings.db_password == 'secret-db/primary'
+    assert settings['DB_PASSWORD'] == 'secret-db/primary'
+    assert provider.calls == [['db/primary']]
+    assert settings.masked()['DB_PASSWORD'] == '***'
+
+
+def test_provider_is_abstract():
+    with pytest.raises(TypeError):
+        SecretProvider()
+
+
+def test_no_default_file_provider():
+    with pytest.raises(SecretNotFound):
+        Settings(A=Sensitive.ref('file:///etc/hostname')).a
+
+
+def test_ref_ttl():
+    clock = Clock()
+    provider = CountingProvider()
+    registry = SecretRegistry(SecretCache(ttl=60, clock=clock))
+    registry.register('test', provider)
+    ref = SecretRef('test://key', registry)
+    assert not ref.evaluated and ref.peek('none') == 'none'
+    assert ref.resolve() == 'secret-key'
+    assert ref.resolve() == 'secret-key'
+    assert len(provider.calls) == 1
+    clock.now = 61
+    assert not ref.evaluated
+    assert ref.resolve() == 'secret-key'
+    assert len(provider.calls) == 2
+
+
+def test_ref_errors(provider):
+    with pytest.raises(ValueError):
+        SecretRef('no-scheme')
+    with pytest.raises(SecretNotFound):
+        Settings(A=Sensitive.ref('unknown://a')).a
+    settings = Settings(A=Sensitive.ref('test://missing'))
+    with pytest.raises(SecretNotFound):
+        settings.a
+
+
+def test_ref_pickle_keeps_reference_only(provider):
+    ref = SecretRef('test://key')
+    ref.resolve()
+    copied = pickle.loads(pickle.dumps(Sensitive(ref)))
+    assert b'secret-key' not in pickle.dumps(ref)
+    assert copied.obj == ref
+
+
+def test_ref_pickle_named_registry():
+    registry = SecretRegistry(name='pickle-test')
+    registry.register('test', CountingProvider())
+    ref = SecretRef('test://key', 'pickle-test')
+    assert ref.registry is registry
+    copied = pickle.loads(pickle.dumps(ref))
+    assert copied.registry is registry
+    assert copied.resolve() == 'secret-key'
+
+    with pytest.raises(TypeError):
+        pickle.dumps(SecretRef('test://key', SecretRegistry()))
+    with pytest.raises(SecretNotFound):
+        SecretRef('test://key', 'no-such-registry')
+
+
+def test_snapshot_keeps_registry(tmp_path):
+    registry = SecretRegistry(name='snapshot-test')
+    registry.register('custom', CountingProvider())
+    directory = tmp_path / 'registry_settings'
+    directory.mkdir()
+    (directory / 'env.py').write_text(
+        'from enpyronments.utils import Sensitive\nTOKEN = Sensitive.ref("custom://token", registry="snapshot-test")\n'
+    )
+    loader = Loader(str(tmp_path), cache=SnapshotCache(str(tmp_path / 'cache')))
+    assert loader.load_settings('registry_settings')['TOKEN'] == 'secret-token'
+    warm = loader.load_settings('registry_settings')
+    assert warm.get('TOKEN', extract_from_sensitive=False).obj.registry is registry
+    assert warm['TOKEN'] == 'secret-token'
+
+
+def test_snapshot_skips_unnamed_registry(tmp_path):
+    cache = SnapshotCache(str(tmp_path / 'cache'))
+    layers = [('env', {'TOKEN': Sensitive(SecretRef('custom://token', SecretRegistry()))})]
+    with pytest.warns(UserWarning):
+        cache.store(str(tmp_path / 'cache' / 'snapshot'), (), layers)
+    assert not (tmp_path / 'cache').exists()
+
+
+def test_loader_batches_refs(tmp_path, provider):
+    directory = os.path.join(str(tmp_path), 'secret_settings')
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'env.py'), 'w') as f:
+        f.write(
+            'from enpyronments.utils import Sensitive\n'
+            'DB_PASSWORD = Sensitive.ref("test://db")\n'
+            'API_KEY = Sensitive.ref("test://api")\n'
+            'OTHER = Sensitive.ref("test://other")\n'
+            'MODE = "dev"\n'
+        )
+    settings = Loader(str(tmp_path), isolated=True).load_settings('secret_settings')
+    assert provider.calls == []
+    assert settings.api_key == 'secret-api'
+    assert provider.calls == [['api', 'db', 'other']]
+    assert settings.db_password == 'secret-db' and settings.other == 'secret-other'
+    assert len(provider.calls) == 1
@@ -0,0 +1,59 @@
+import io
+import json
+import os
+
+import pytest
+
+from enpyronments.formats import parse_dotenv
+from enpyronments.redact import dump_dotenv, dump_json
+from enpyronments.settings import ConcurrentSettings, Settings
+from enpyronments.utils import Lazy, Sensitive
+
+
+def make_settings(settings_class=Settings):
+    return settings_class(
+        APP_NAME='app',
+        DEBUG=False,
+        HOSTS=['a', 'b'],
+        NESTED={'PORT': 1},
+        MESSAGE='hello world # "quoted"\n',
+        SECRET=Sensitive('hunter2'),
+        LAZY=Lazy(lambda: 'value'),
+        NOTHING=None,
+        FUNC=print,
+    )
+
+
+@pytest.mark.parametrize('settings_class', [Settings, ConcurrentSettings, dict])
+@pytest.mark.parametrize('indent', [None, 4])
+def test_dump_json(settings_class, indent):
+    settings = make_settings(settings_class)
+    fp = io.StringIO()
+    dump_json(settings, fp, indent=indent)
+    expected = json.loads(json.dumps(Settings(getattr(settings, 'data', settings)).masked(), default=str))
+    assert json.loads(fp.getvalue()) == expected
+    assert expected['SECRET'] == '*' * 10
+    assert expected['LAZY'] == '<not evaluated>'
+
+
+def test_dump_json_empty():
+    for indent in (None, 2):
+        fp = io.StringIO()
+        dump_json(Settings(), fp, indent=indent)
+        assert json.loads(fp.getvalue()) == {}
+
+
+def test_dump_dotenv(tmp_path):
+    path = os.path.join(str(tmp_path), 'env.env')
+    with open(path, 'w') as fp:
+        dump_dotenv(make_settings(), fp)
+    assert parse_dotenv(path) == {
+        'APP_NAME': 'app',
+        'DEBUG': 'False',
+        'HOSTS': '["a", "b"]',
+        'NESTED': '{"PORT": 1}',
+        'MESSAGE': 'hello world # "quoted"\n',
+        'SECRET': '*' * 10,
+        'LAZY': '<not evaluated>',
+        'FUNC': str(print),
+    }
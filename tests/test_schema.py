@@ -0,0 +1,136 @@
+import os
+import pickle
+
+import pytest
+
+from enpyronments.loader import Loader
+from enpyronments.providers import SecretRef, default_registry
+from enpyronments.schema import CoercedSecretRef, Field, Schema, SchemaError, to_bool, to_list
+from enpyronments.settings import Settings
+from enpyronments.trace import LoadTrace
+from enpyronments.utils import Lazy, Sensitive
+
+sample_apps_root = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_apps'
+)
+
+
+@pytest.mark.parametrize('val, expected', [
+    ('False', False), ('true', True), (' YES ', True), ('0', False), ('', False), (1, True), (False, False),
+])
+def test_to_bool(val, expected):
+    assert to_bool(val) is expected
+
+
+@pytest.mark.parametrize('val', ['maybe', 2, None])
+def test_to_bool_invalid(val):
+    with pytest.raises(ValueError):
+        to_bool(val)
+
+
+@pytest.mark.parametrize('val, expected', [
+    ('a, b,c', ['a', 'b', 'c']), ('[1, 2]', [1, 2]), (('a',), ['a']), ('', []),
+])
+def test_to_list(val, expected):
+    assert to_list(val) == expected
+
+
+def test_schema_coerces():
+    schema = Schema({
+        'DEBUG': bool,
+        'PORT': Field(int, min=1, max=65535),
+        'RATIO': float,
+        'HOSTS': list,
+        'LEVEL': Field(str, default='info', choices=['info', 'debug']),
+        'PASSWORD': int,
+    })
+    settings = schema.apply(Settings(
+        DEBUG='False', PORT='8080', RATIO='0.5', HOSTS='a,b', PASSWORD=Sensitive('1234', stars=4), OTHER='x',
+    ))
+    assert settings.data['DEBUG'] is False
+    assert settings.port == 8080
+    assert settings.ratio == 0.5
+    assert settings.hosts == ['a', 'b']
+    assert settings.level == 'info'
+    assert settings.password == 1234
+    assert settings.masked()['PASSWORD'] == '****'
+    assert settings.other == 'x'
+
+
+def test_schema_reports_every_error():
+    schema = Schema({
+        'DEBUG': bool,
+        'PORT': Field(int, max=100),
+        'NAME': str,
+        'MODE': Field(str, choices=['dev', 'prod']),
+        'EVEN': Field(int, validator=lambda val: val % 2 == 0),
+        'OPTIONAL': Field(int, required=False),
+    })
+    with pytest.raises(SchemaError) as raised:
+        schema.coerce({'DEBUG': 'maybe', 'PORT': '8080', 'MODE': 'test', 'EVEN': 3})
+    assert set(raised.value.errors) == {'DEBUG', 'PORT', 'NAME', 'MODE', 'EVEN'}
+    assert isinstance(raised.value, ValueError)
+
+
+def test_schema_lazy():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return '42'
+
+    settings = Schema({'ANSWER': int, 'BAD': int}).apply(Settings(ANSWER=Lazy(compute), BAD=Lazy(lambda: 'x')))
+    assert not calls
+    assert settings.answer == 42
+    with pytest.raises(SchemaError):
+        settings.bad
+
+
+def test_schema_secret_ref_rotation(tmp_path, secrets_dir):
+    secret = secrets_dir / 'port'
+    secret.write_text('6000\n')
+    package = tmp_path / 'ref_settings'
+    package.mkdir()
+    (package / 'env.py').write_text(
+        'from enpyronments.utils import Sensitive\nPORT = Sensitive.ref("file://port")\n'
+    )
+    loader = Loader(str(tmp_path), isolated=True, schema=Schema({'PORT': int}))
+    try:
+        settings = loader.load_settings('ref_settings')
+        ref = settings.get('PORT', extract_from_sensitive=False).obj
+        assert isinstance(ref, CoercedSecretRef) and isinstance(ref, SecretRef)
+        assert settings.port == 6000
+
+        # cached by the registry, not kept by the setting
+        secret.write_text('7000\n')
+        assert settings.port == 6000
+        default_registry.cache.clear()
+        assert settings.port == 7000
+
+        secret.write_text('many\n')
+        default_registry.cache.clear()
+        with pytest.raises(SchemaError):
+            settings.port
+
+        clone = pickle.loads(pickle.dumps(ref))
+        assert isinstance(clone, CoercedSecretRef) and (clone.uri, clone.key) == (ref.uri, 'PORT')
+    finally:
+        default_registry.cache.clear()
+
+
+def test_schema_pickle():
+    schema = pickle.loads(pickle.dumps(Schema({'PORT': Field(int, min=1), 'NAME': str})))
+    assert schema.coerce({'PORT': '2', 'NAME': 'x'}) == {'PORT': 2, 'NAME': 'x'}
+    with pytest.raises(SchemaError):
+        schema.coerce({'PORT': '2'})
+
+
+def test_loader_schema(monkeypatch):
+    monkeypatch.setenv('DEBUG', 'False')
+    schema = Schema({'DEBUG': Field(bool, default=True), 'LINES_TO_PRINT': Field(int, min=0)})
+    loader = Loader(os.path.join(sample_apps_root, 'environment_variables'), isolated=True, schema=schema)
+    trace = LoadTrace()
+    settings = loader.load_settings('settings', trace)
+    assert settings.debug is False
+    assert settings.lines_to_print == 10
+    assert 'schema' in trace.by_phase()
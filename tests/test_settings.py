@@ -1,10 +1,14 @@
 """Tests for the Settings class"""
 import os
+import pickle
+import random
 import re
+import threading
 
 import pytest
 
-from enpyronments.settings import Sensitive, Settings
+from enpyronments.settings import ConcurrentSettings, LayeredSettings, Sensitive, Settings
+from enpyronments.utils import Lazy
 
 
 def test_empty():
@@ -90,3 +94,334 @@ def test_values(test_setting, actual_value):
 def test_save_to_environ(test_setting, test_key, actual_value):
     test_setting.save_to_environ()
     # breaks if not serializable, but that's ok
+
+
+def test_concurrent_settings():
+    settings = ConcurrentSettings(APP_NAME='app', SECRET=Sensitive('hunter2'))
+    snapshot = settings.snapshot()
+
+    settings['SECRET'] = 'swordfish'
+    settings.update({'APP_NAME': 'new app'}, DEBUG=True)
+    del settings['DEBUG']
+
+    assert settings['SECRET'] == 'swordfish'
+    assert isinstance(settings.data['SECRET'], Sensitive)
+    assert settings.app_name == 'new app'
+    assert 'DEBUG' not in settings
+    # earlier snapshots are never modified
+    assert snapshot['APP_NAME'] == 'app'
+    with pytest.raises(TypeError):
+        snapshot['APP_NAME'] = 'changed'
+
+
+def test_concurrent_settings_consistent_reads():
+    settings = ConcurrentSettings(LEFT=0, RIGHT=0)
+    stop = threading.Event()
+    torn_reads = []
+
+    def read():
+        while not stop.is_set():
+            snapshot = settings.snapshot()
+            if snapshot['LEFT'] != snapshot['RIGHT']:
+                torn_reads.append(dict(snapshot))
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for i in range(2000):
+        settings.update(LEFT=i, RIGHT=i)
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert not torn_reads
+
+
+@pytest.mark.parametrize('settings_class', [Settings, ConcurrentSettings])
+def test_pickle(settings_class):
+    settings = settings_class(APP_NAME='app', SECRET=Sensitive('hunter2'))
+    clone = pickle.loads(pickle.dumps(settings))
+    assert isinstance(clone, settings_class)
+    assert clone.app_name == 'app'
+    assert clone.masked() == settings.masked()
+
+
+def test_freeze():
+    settings = Settings(DEBUG=True, SECRET=Sensitive('hunter2', stars=3), KEYS=1, Mixed=2, **{'not-an-identifier': 3})
+    frozen = settings.freeze()
+
+    assert frozen.debug is True and frozen.DEBUG is True
+    assert frozen.secret == 'hunter2'
+    assert frozen['SECRET'] == 'hunter2'
+    assert isinstance(frozen.get('SECRET', extract_from_sensitive=False), Sensitive)
+    assert frozen.masked() == settings.masked()
+    assert frozen['not-an-identifier'] == 3
+    assert frozen.Mixed == 2
+    # clashes with methods stay methods, but are available as items
+    assert callable(frozen.keys) and frozen['KEYS'] == 1
+    assert dict(frozen) == {key: settings[key] for key in settings}
+
+    with pytest.raises(AttributeError):
+        frozen.debug = False
+    with pytest.raises(TypeError):
+        frozen['DEBUG'] = False
+    with pytest.raises(KeyError):
+        frozen.missing
+    assert not hasattr(frozen, 'missing')
+
+    assert pickle.loads(pickle.dumps(frozen)).masked() == frozen.masked()
+    assert frozen.thaw().data == settings.data
+
+
+def test_getattr_missing_is_attribute_error():
+    settings = Settings(DEBUG=True)
+    assert getattr(settings, 'missing', None) is None
+    with pytest.raises(KeyError):
+        settings.missing
+
+
+def test_lazy():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'value'
+
+    settings = Settings(LAZY=Lazy(compute), SECRET=Sensitive(Lazy(lambda: 'hunter2')))
+    assert settings.masked() == {'LAZY': '<not evaluated>', 'SECRET': '*' * 10}
+    assert not calls
+
+    assert settings.lazy == 'value'
+    assert settings['LAZY'] == 'value'
+    assert settings.get('LAZY') == 'value'
+    assert settings.secret == 'hunter2'
+    assert len(calls) == 1
+    assert settings.masked() == {'LAZY': 'value', 'SECRET': '*' * 10}
+
+
+def test_frozen_lazy():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'value'
+
+    frozen = Settings(LAZY=Lazy(compute), OTHER=Lazy(lambda: 2), SECRET=Sensitive(Lazy(lambda: 'hunter2'))).freeze()
+    assert frozen.masked()['LAZY'] == '<not evaluated>'
+    assert not calls
+    assert frozen.lazy == 'value'
+    assert frozen.LAZY == 'value' and frozen['LAZY'] == 'value'
+    assert len(calls) == 1
+    assert frozen.get('OTHER') == 2
+    assert frozen.secret == 'hunter2'
+    assert frozen.masked()['SECRET'] == '*' * 10
+    assert dict(frozen.items()) == {'LAZY': 'value', 'OTHER': 2, 'SECRET': 'hunter2'}
+
+
+@pytest.mark.parametrize('settings_class', [Settings, ConcurrentSettings])
+def test_namespace(settings_class):
+    settings = settings_class(
+        DATABASE_PRIMARY_HOST='db1',
+        DATABASE_PRIMARY_PASSWORD=Sensitive('hunter2'),
+        DATABASE_REPLICA_HOST='db2',
+        DATABASEX='not in the namespace',
+        CACHE_URL='redis://',
+    )
+    database = settings.namespace('DATABASE')
+    assert dict(database) == {
+        'PRIMARY_HOST': 'db1', 'PRIMARY_PASSWORD': 'hunter2', 'REPLICA_HOST': 'db2',
+    }
+    assert database.primary_host == 'db1'
+    assert database['REPLICA_HOST'] == 'db2'
+    assert 'PRIMARY_HOST' in database and 'URL' not in database
+    assert database.masked()['PRIMARY_PASSWORD'] == '*' * 10
+    assert database.namespace('PRIMARY').get_many(['HOST', 'PORT'], 5432) == {'HOST': 'db1', 'PORT': 5432}
+    with pytest.raises(AttributeError):
+        database.missing
+
+    # the view is live
+    settings['DATABASE_REPLICA_PORT'] = 5433
+    del settings['DATABASE_PRIMARY_HOST']
+    assert list(database) == ['PRIMARY_PASSWORD', 'REPLICA_HOST', 'REPLICA_PORT']
+    assert len(database) == 3
+    settings.swap({'DATABASE_HOST': 'db3'})
+    assert dict(database) == {'HOST': 'db3'}
+
+
+def test_select():
+    settings = Settings(
+        CACHE_REDIS_URL='redis://', CACHE_MEMCACHED_URL='memcached://', CACHE_TIMEOUT=5, SECRET=Sensitive('x'),
+    )
+    assert settings.select('CACHE_*_URL') == {'CACHE_MEMCACHED_URL': 'memcached://', 'CACHE_REDIS_URL': 'redis://'}
+    assert settings.select('CACHE_*') == {
+        'CACHE_MEMCACHED_URL': 'memcached://', 'CACHE_REDIS_URL': 'redis://', 'CACHE_TIMEOUT': 5,
+    }
+    assert settings.select('*ECRE?') == {'SECRET': 'x'}
+    assert settings.select('SECRET') == {'SECRET': 'x'}
+    assert settings.select('NOPE*') == {}
+
+    settings['CACHE_LOCAL_URL'] = 'local://'
+    assert list(settings.select('CACHE_*_URL')) == ['CACHE_LOCAL_URL', 'CACHE_MEMCACHED_URL', 'CACHE_REDIS_URL']
+
+
+def test_get_many():
+    settings = Settings(A=1, B=Sensitive(2), C=Lazy(lambda: 3))
+    assert settings.get_many(['A', 'B', 'C', 'D']) == {'A': 1, 'B': 2, 'C': 3, 'D': None}
+
+
+def test_items_values_yield_once():
+    settings = Settings(A=1, SECRET=Sensitive('hunter2'), LAZY=Lazy(lambda: 3))
+    assert list(settings.items()) == [('A', 1), ('SECRET', 'hunter2'), ('LAZY', 3)]
+    assert list(settings.values()) == [1, 'hunter2', 3]
+    assert isinstance(list(settings.values(extract_from_sensitive=False))[1], Sensitive)
+
+
+@pytest.mark.parametrize('settings_class', [Settings, ConcurrentSettings])
+def test_masked_cache(settings_class):
+    lazy = Lazy(lambda: 'value')
+    settings = settings_class(A=1, SECRET=Sensitive('hunter2'), LAZY=lazy)
+    masked = settings.masked()
+    assert masked == {'A': 1, 'SECRET': '*' * 10, 'LAZY': '<not evaluated>'}
+    masked['A'] = 'changed by caller'
+    assert settings.masked()['A'] == 1
+
+    settings['A'] = 2
+    settings['SECRET'] = 'new'
+    settings['B'] = Sensitive('x', stars=3)
+    del settings['LAZY']
+    assert settings.masked() == {'A': 2, 'SECRET': '*' * 10, 'B': '***'}
+    assert settings.masked_view()['B'] == '***'
+
+    settings['LAZY'] = lazy
+    lazy.resolve()
+    assert settings.masked()['LAZY'] == 'value'
+
+    settings.swap({'C': Sensitive(3)})
+    assert settings.masked() == {'C': '*' * 10}
+
+
+LAYERS = [
+    ('env', {'APP_NAME': 'app', 'DEBUG': False, 'SECRET': Sensitive('hunter2'), 'WORKERS': 2}),
+    ('env_local', {'DEBUG': True, 'SECRET': 'local'}),
+    ('env_dev', {'WORKERS': 4}),
+]
+
+
+@pytest.mark.parametrize('settings_class', [Settings, ConcurrentSettings, LayeredSettings])
+def test_from_layers(settings_class):
+    settings = settings_class.from_layers(LAYERS)
+    assert dict(settings) == {'APP_NAME': 'app', 'DEBUG': True, 'SECRET': 'local', 'WORKERS': 4}
+    assert isinstance(settings.get('SECRET', extract_from_sensitive=False), Sensitive)
+    assert settings.masked()['SECRET'] == '*' * 10
+
+
+def test_layered_provenance():
+    settings = LayeredSettings.from_layers(LAYERS)
+    assert settings.source_of('APP_NAME') == 'env'
+    assert settings.source_of('DEBUG') == 'env_local'
+    assert settings.source_of('WORKERS') == 'env_dev'
+    assert settings.source_of('NOPE') is None
+    assert settings.explain('WORKERS') == [('env', 2), ('env_dev', 4)]
+
+
+def test_layered_replace_layer():
+    settings = LayeredSettings.from_layers(LAYERS)
+    settings.get_key_index()
+    settings.masked()
+    env_local = dict(LAYERS[1][1])
+
+    assert settings.replace_layer('env_local', {'DEBUG': True, 'CACHE_URL': 'local://'}) == {'SECRET', 'CACHE_URL'}
+    assert settings['SECRET'] == 'hunter2'
+    assert settings.source_of('SECRET') == 'env'
+    assert settings['CACHE_URL'] == 'local://'
+    assert list(settings.namespace('CACHE')) == ['URL']
+    assert settings.masked()['CACHE_URL'] == 'local://'
+    # layers given to the settings are never modified
+    assert LAYERS[1][1] == env_local
+
+    settings.replace_layer('request', {'WORKERS': 1})
+    assert settings['WORKERS'] == 1
+    assert settings.source_of('WORKERS') == 'request'
+
+    assert settings.remove_layer('request') == {'WORKERS'}
+    assert settings['WORKERS'] == 4
+    assert settings.remove_layer('env_dev') == {'WORKERS'}
+    assert settings['WORKERS'] == 2
+
+
+def test_layered_set_layers():
+    settings = LayeredSettings.from_layers(LAYERS)
+    write_count = settings.write_count
+    assert settings.set_layers(LAYERS) == set()
+    assert settings.set_layers(LAYERS[:2] + [('env_dev', {'WORKERS': 8})], atomic=True) == {'WORKERS'}
+    assert settings['WORKERS'] == 8
+    assert settings.write_count > write_count
+
+    # reordered layers are merged again
+    settings.set_layers([LAYERS[1], LAYERS[0]])
+    assert settings['DEBUG'] is False
+    assert 'WORKERS' in settings
+    assert settings.source_of('SECRET') == 'env'
+
+
+def test_layered_writes():
+    settings = LayeredSettings.from_layers(LAYERS)
+    settings['DEBUG'] = False
+    settings['SECRET'] = 'override'
+    assert settings.source_of('DEBUG') == LayeredSettings.override_layer
+    assert isinstance(settings.get('SECRET', extract_from_sensitive=False), Sensitive)
+
+    # a lower layer doesn't hide the override
+    settings.replace_layer('env_local', {'DEBUG': True})
+    assert settings['DEBUG'] is False
+
+    del settings['WORKERS']
+    assert 'WORKERS' not in settings
+    assert settings.explain('WORKERS') == []
+    assert LAYERS[2][1] == {'WORKERS': 4}
+    with pytest.raises(KeyError):
+        del settings['WORKERS']
+
+    settings.swap(dict(settings.data, APP_NAME='swapped', NEW=1))
+    assert settings['APP_NAME'] == 'swapped'
+    assert settings.source_of('APP_NAME') == 'env'
+    assert settings.source_of('NEW') == LayeredSettings.override_layer
+    assert LAYERS[0][1]['APP_NAME'] == 'app'
+
+
+def test_layered_swap_keeps_sensitive():
+    settings = LayeredSettings.from_layers([('env', {'PW': Sensitive('a')}), ('env_local', {'PW': 'b'})])
+    data = {'PW': 'c'}
+    settings.swap(data)
+    assert settings.masked() == {'PW': '**********'}
+    assert settings['PW'] == 'c'
+    assert data == {'PW': 'c'}
+    assert settings.layers['env_local'] == {'PW': 'c'}
+
+
+def test_layered_swap_matches_from_layers():
+    rng = random.Random(0)
+    keys = ['A', 'B', 'C', 'D']
+
+    def value():
+        val = rng.choice([1, 'x', None])
+        return Sensitive(val) if rng.random() < 0.3 else val
+
+    for _ in range(200):
+        layers = [(name, {key: value() for key in keys if rng.random() < 0.5}) for name in ('env', 'env_local')]
+        settings = LayeredSettings.from_layers(layers)
+        data = {key: value() for key in keys if rng.random() < 0.8}
+        settings.swap(data)
+        expected = LayeredSettings.from_layers(settings.layers.items())
+        assert settings.masked() == expected.masked()
+        assert {key: settings[key] for key in settings} == {key: expected[key] for key in expected}
+
+
+def test_layered_pickle():
+    settings = LayeredSettings.from_layers(LAYERS)
+    settings['EXTRA'] = 1
+    unpickled = pickle.loads(pickle.dumps(settings))
+    assert dict(unpickled) == dict(settings)
+    assert unpickled.source_of('DEBUG') == 'env_local'
+    unpickled['EXTRA'] = 2
+    assert settings['EXTRA'] == 1
@@ -0,0 +1,87 @@
+"""Tests for shared-memory settings snapshots"""
+import os
+import pickle
+import time
+
+import pytest
+
+from enpyronments.settings import Settings
+from enpyronments.shared import SharedSettings, publish
+from enpyronments.utils import Sensitive
+
+
+@pytest.fixture
+def settings():
+    return Settings(DEBUG=True, APP_NAME='shared', SECRET=Sensitive('hunter2', stars=3), HOSTS=['a', 'b'])
+
+
+def test_publish_and_attach(tmp_path, settings):
+    path = str(tmp_path / 'settings.snapshot')
+    assert publish(settings, path) == 1
+
+    shared = SharedSettings(path)
+    assert shared.generation == 1
+    assert shared['APP_NAME'] == 'shared'
+    assert shared.debug is True
+    assert shared.secret == 'hunter2'
+    assert shared.get('SECRET', extract_from_sensitive=False).stars == 3
+    assert shared.get('MISSING', 'default') == 'default'
+    assert shared.masked() == settings.masked()
+    assert dict(shared.items()) == {key: settings[key] for key in settings}
+    assert len(shared) == 4 and 'HOSTS' in shared
+    assert not hasattr(shared, 'missing')
+
+
+def test_masked_doesnt_decode_sensitive(tmp_path):
+    class Unpicklable:
+        def __reduce__(self):
+            return (raise_error, ())
+
+    path = str(tmp_path / 'settings.snapshot')
+    publish(Settings(SECRET=Sensitive(Unpicklable())), path)
+    shared = SharedSettings(path)
+    assert shared.masked() == {'SECRET': '*' * 10}
+
+
+def raise_error():
+    raise RuntimeError('decoded')
+
+
+def test_remap_on_new_generation(tmp_path, settings):
+    path = str(tmp_path / 'settings.snapshot')
+    publish(settings, path)
+    shared = SharedSettings(path)
+    manual = SharedSettings(path, auto_refresh=False)
+
+    settings['APP_NAME'] = 'republished'
+    assert publish(settings, path) == 2
+
+    assert shared['APP_NAME'] == 'republished'
+    assert shared.generation == 2
+    assert manual['APP_NAME'] == 'shared'
+    assert manual.refresh() is True
+    assert manual['APP_NAME'] == 'republished'
+    assert manual.refresh() is False
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_worker_sees_new_snapshot(tmp_path, settings):
+    path = str(tmp_path / 'settings.snapshot')
+    publish(settings, path)
+    shared = SharedSettings(path)
+    read, write = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        os.close(read)
+        deadline = time.monotonic() + 5
+        while shared.generation == 1 and time.monotonic() < deadline:
+            shared.refresh()
+        os.write(write, pickle.dumps(shared['APP_NAME']))
+        os._exit(0)
+
+    os.close(write)
+    settings['APP_NAME'] = 'from master'
+    publish(settings, path)
+    assert pickle.loads(os.read(read, 1024)) == 'from master'
+    os.waitpid(pid, 0)
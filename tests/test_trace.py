@@ -0,0 +1,64 @@
+"""Tests for load tracing"""
+import io
+import json
+import os
+
+import pytest
+
+from enpyronments.cache import SnapshotCache
+from enpyronments.loader import Loader
+from enpyronments.trace import LoadTrace
+
+sample_app_root = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_apps', 'mode_dev'
+)
+
+
+@pytest.mark.parametrize('options', [{}, {'lazy': True}, {'isolated': True}])
+def test_trace_settings(options):
+    events = []
+    trace = Loader(sample_app_root, **options).trace_settings('settings', callback=events.append)
+
+    assert trace.settings.app_name == 'enpyronments <dev>'
+    assert events == trace.events
+    assert {'glob', 'import', 'extract', 'mode', 'merge'} <= set(trace.by_phase())
+
+    modules = trace.by_module()
+    assert modules['env']['keys'] == 4
+    assert modules['env']['overridden'] == 0
+    assert modules['env_dev']['keys'] == 2
+    assert modules['env_dev']['overridden'] == 2
+    assert [module for module, _ in trace.slowest(10)]
+
+    mode_event = next(event for event in trace.events if event['phase'] == 'mode')
+    assert mode_event['mode'] == 'dev'
+    if options.get('lazy'):
+        assert 'env_prod' not in modules
+
+
+def test_trace_json():
+    trace = Loader(sample_app_root).trace_settings('settings')
+    report = json.loads(trace.to_json())
+    assert report['total'] == pytest.approx(trace.total)
+    assert set(report['modules']) == set(trace.by_module())
+
+    buffer = io.StringIO()
+    trace.dump(buffer, indent=2)
+    assert json.loads(buffer.getvalue()) == report
+
+
+def test_trace_snapshot(tmp_path):
+    loader = Loader(sample_app_root, cache=SnapshotCache(str(tmp_path)))
+    cold = loader.trace_settings('settings')
+    warm = loader.trace_settings('settings')
+
+    assert [event['hit'] for event in cold.events if event['phase'] == 'snapshot'] == [False]
+    assert [event['phase'] for event in warm.events] == ['snapshot']
+    assert warm.events[0]['hit'] is True
+
+
+def test_load_settings_with_trace():
+    trace = LoadTrace()
+    settings = Loader(sample_app_root).load_settings('settings', trace=trace)
+    assert settings.debug is True
+    assert trace.events
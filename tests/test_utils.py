@@ -1,6 +1,8 @@
 import os
+import pickle
 import re
 import sys
+import threading
 import unittest
 
 from enpyronments import utils
@@ -66,3 +68,57 @@ class TestSensitive(unittest.TestCase):
         for val in self.vals:
             sensitive = utils.Sensitive(val)
             repr(sensitive)
+
+
+class TestLazy(unittest.TestCase):
+    def setUp(self):
+        """ A Lazy that counts how many times it's computed """
+        self.calls = []
+        self.lazy = utils.Lazy(lambda: self.calls.append(1) or 'value')
+
+    def test_lazy_computes_once(self):
+        """ Ensure func is only called on the first resolve """
+        self.assertFalse(self.lazy.evaluated)
+        self.assertEqual(self.lazy.resolve(), 'value')
+        self.assertEqual(self.lazy.resolve(), 'value')
+        self.assertTrue(self.lazy.evaluated)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_lazy_peek(self):
+        """ Ensure peek doesn't compute the value """
+        self.assertEqual(self.lazy.peek('default'), 'default')
+        self.assertEqual(self.calls, [])
+        self.lazy.resolve()
+        self.assertEqual(self.lazy.peek('default'), 'value')
+
+    def test_lazy_threads(self):
+        """ Ensure concurrent first reads compute the value once """
+        gate = threading.Event()
+
+        def slow():
+            gate.wait()
+            self.calls.append(1)
+            return 'value'
+
+        lazy = utils.Lazy(slow)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(lazy.resolve())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_lazy_pickle(self):
+        """ Ensure evaluated lazies pickle their value, even if func can't be pickled """
+        self.lazy.resolve()
+        copied = pickle.loads(pickle.dumps(self.lazy))
+        self.assertTrue(copied.evaluated)
+        self.assertEqual(copied.resolve(), 'value')
+
+    def test_lazy_repr(self):
+        """ Ensure repr doesn't compute the value """
+        self.assertEqual(repr(self.lazy), 'Lazy (not evaluated)')
+        self.assertEqual(self.calls, [])
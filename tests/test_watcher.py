@@ -0,0 +1,124 @@
+"""Tests for the Watcher class"""
+import os
+import time
+
+import pytest
+
+from enpyronments.loader import Loader
+from enpyronments.settings import Settings
+from enpyronments.utils import Sensitive
+from enpyronments.watcher import get_changed_keys
+
+LOGGED = '''
+import os
+with open(os.path.join(os.path.dirname(__file__), "executed.log"), "a") as f:
+    f.write(__name__.split(".")[-1] + "\\n")
+'''
+
+
+def write(path, text):
+    """ Write text to path, making sure the mtime moves forward """
+    mtime = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(LOGGED + text)
+    os.utime(str(path), ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+
+
+@pytest.fixture
+def package(tmp_path):
+    package_dir = tmp_path / 'watched_settings'
+    package_dir.mkdir()
+    write(package_dir / 'env.py', 'APP_NAME = "watched"\nDEBUG = False\n')
+    write(package_dir / 'env_local.py', 'MODE = "dev"\n')
+    write(package_dir / 'env_dev.py', 'DEBUG = True\n')
+    write(package_dir / 'env_prod.py', 'DEBUG = False\nWORKERS = 8\n')
+    return package_dir
+
+
+def executed(package):
+    log = package / 'executed.log'
+    executed = log.read_text().split()
+    log.write_text('')
+    return executed
+
+
+def test_reload_only_changed(tmp_path, package):
+    watcher = Loader(str(tmp_path)).watch('watched_settings')
+    settings = watcher.settings
+    assert settings['DEBUG'] is True
+    executed(package)
+
+    changes = []
+    watcher.subscribe(changes.append)
+
+    assert watcher.check() == set()
+    write(package / 'env.py', 'APP_NAME = "rewatched"\nDEBUG = False\n')
+    assert watcher.check() == {'APP_NAME'}
+
+    assert executed(package) == ['env']
+    assert changes == [{'APP_NAME'}]
+    assert settings['APP_NAME'] == 'rewatched'
+    assert settings['DEBUG'] is True
+
+
+def test_reload_keeps_layers(tmp_path, package):
+    watcher = Loader(str(tmp_path)).watch('watched_settings')
+    settings = watcher.settings
+    assert settings.source_of('DEBUG') == 'env_dev'
+    env = settings.layers['env']
+
+    write(package / 'env_dev.py', 'WORKERS = 2\n')
+    assert watcher.check() == {'DEBUG', 'WORKERS'}
+    assert settings['DEBUG'] is False
+    assert settings.source_of('DEBUG') == 'env'
+    assert settings.source_of('WORKERS') == 'env_dev'
+    # unchanged modules are still the same layers
+    assert settings.layers['env'] is env
+
+
+def test_mode_change_lazy(tmp_path, package):
+    settings = Settings()
+    watcher = Loader(str(tmp_path), lazy=True).watch('watched_settings', settings=settings)
+    assert sorted(executed(package)) == ['env', 'env_dev', 'env_local']
+
+    write(package / 'env_local.py', 'MODE = "prod"\n')
+    assert watcher.check() == {'MODE', 'DEBUG', 'WORKERS'}
+    assert sorted(executed(package)) == ['env_local', 'env_prod']
+    assert settings['WORKERS'] == 8
+
+
+def test_removed_file(tmp_path, package):
+    watcher = Loader(str(tmp_path)).watch('watched_settings')
+    (package / 'env_dev.py').unlink()
+    assert watcher.check() == {'DEBUG'}
+    assert watcher.settings['DEBUG'] is False
+
+
+def test_failed_reload_keeps_settings(tmp_path, package):
+    watcher = Loader(str(tmp_path)).watch('watched_settings')
+    write(package / 'env.py', 'raise RuntimeError("broken")\n')
+    with pytest.raises(RuntimeError):
+        watcher.check()
+    assert watcher.settings['APP_NAME'] == 'watched'
+
+
+def test_background_poll(tmp_path, package):
+    changes = []
+    with Loader(str(tmp_path)).watch('watched_settings', interval=0.01) as watcher:
+        watcher.subscribe(changes.append)
+        write(package / 'env_dev.py', 'DEBUG = "very"\n')
+        deadline = time.monotonic() + 5
+        while not changes and time.monotonic() < deadline:
+            time.sleep(0.01)
+    assert changes == [{'DEBUG'}]
+    assert watcher.thread is None
+
+
+def test_unknown_backend(tmp_path, package):
+    with pytest.raises(ValueError):
+        Loader(str(tmp_path)).watch('watched_settings', backend='carrier pigeon')
+
+
+def test_get_changed_keys():
+    old = {'A': 1, 'B': Sensitive('x'), 'C': [1], 'D': 0}
+    new = {'A': 1, 'B': Sensitive('x'), 'C': [2], 'E': 0}
+    assert get_changed_keys(old, new) == {'C', 'D', 'E'}